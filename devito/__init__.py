@@ -9,6 +9,7 @@ from devito.finite_difference import *  # noqa
 from devito.dimension import *  # noqa
 from devito.interfaces import Forward, Backward, _SymbolCache  # noqa
 from devito.logger import error, warning, info  # noqa
+from devito.operator import _OperatorCache  # noqa
 from devito.parameters import (configuration, init_configuration,  # noqa
                                env_vars_mapper)
 from devito.tools import *  # noqa
@@ -16,6 +17,7 @@ from devito.tools import *  # noqa
 
 def clear_cache():
     cache.clear_cache()
+    _OperatorCache.clear()
     gc.collect()
 
     for key, val in list(_SymbolCache.items()):
@@ -31,6 +33,8 @@ del get_versions
 # Initialize the Devito backend
 configuration.add('travis_test', 0, [0, 1], lambda i: bool(i))
 configuration.add('autotuning', 'basic', ['none', 'basic', 'aggressive'])
+configuration.add('autotuning_db', 1, [0, 1], lambda i: bool(i))
+configuration.add('autotuning_retune', 0, [0, 1], lambda i: bool(i))
 init_configuration()
 init_backend(configuration['backend'])
 
@@ -1,4 +1,5 @@
 import abc
+from threading import local
 
 import numpy as np
 from sympy import Symbol
@@ -17,8 +18,47 @@ from devito.logger import debug
       argument itself. Each ArgumentProvider might provide one or more such objects
       which are used as placeholders for the argument as well as for verification and
       derivation of default values.
+
+    The values derived for Arguments and ArgumentProviders while processing the
+    arguments of a call are stored in thread-local storage, rather than in the
+    objects themselves, which are shared (e.g., the Dimensions). This way,
+    several Operators can process their arguments, and run, concurrently in
+    different threads.
 """
 
+_values = local()
+
+
+class DerivedValue(object):
+
+    """
+    Descriptor for the ``_value`` of an Argument or ArgumentProvider, that is the
+    value derived for it in the current thread. Defaults to ``_default_value``.
+    """
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return _values.mapper[id(obj)]
+        except AttributeError:
+            _values.mapper = {}
+        except KeyError:
+            pass
+        return obj._default_value
+
+    def __set__(self, obj, value):
+        try:
+            _values.mapper[id(obj)] = value
+        except AttributeError:
+            _values.mapper = {id(obj): value}
+
+    def __delete__(self, obj):
+        try:
+            _values.mapper.pop(id(obj), None)
+        except AttributeError:
+            pass
+
 
 class Argument(object):
 
@@ -32,10 +72,12 @@ class Argument(object):
     is_TensorArgument = False
     is_PtrArgument = False
 
+    _value = DerivedValue()
+
     def __init__(self, name, provider, default_value=None):
         self.name = name
         self.provider = provider
-        self._value = self._default_value = default_value
+        self._default_value = default_value
 
     @property
     def value(self):
@@ -60,7 +102,7 @@ class Argument(object):
         return self.provider.dtype
 
     def reset(self):
-        self._value = self._default_value
+        del self._value
 
     @abc.abstractproperty
     def verify(self, kwargs):
@@ -191,13 +233,10 @@ class DimensionArgProvider(ArgumentProvider):
 
     reducer = max
     _default_value = None
-
-    def __init__(self, *args, **kwargs):
-        super(DimensionArgProvider, self).__init__(*args, **kwargs)
-        self._value = self._default_value
+    _value = DerivedValue()
 
     def reset(self):
-        self._value = self._default_value
+        del self._value
 
     @property
     def value(self):
@@ -216,24 +255,20 @@ class DimensionArgProvider(ArgumentProvider):
     # TODO: Can we do without a verify on a dimension?
     def verify(self, value):
         verify = True
+        # The size of a subsampled dimension is not tied to that of its parent
+        parent = None if self.is_Subsampled else getattr(self, 'parent', None)
         if value is None:
             if self.value is not None:
                 return True
 
-            try:
-                parent_value = self.parent.value
-                if parent_value is None:
-                    return False
-            except AttributeError:
+            if parent is None or parent.value is None:
                 return False
 
-        try:
-            parent_value = self.parent.value
+        if parent is not None:
+            parent_value = parent.value
             if parent_value is not None:
                 value = self.reducer(value, parent_value)
-            verify = verify and self.parent.verify(value)
-        except AttributeError:
-            pass
+            verify = verify and parent.verify(value)
 
         if value == self.value:
             return True
@@ -0,0 +1,12 @@
+"""
+A self-contained benchmark suite for Devito, to sweep over the parameters
+(problem, shape, space order, DSE/DLE modes, auto-tuning, ...) of a set of
+:mod:`problems`, storing the build time and the run time of each combination
+in a versioned results directory, and to compare result sets to detect
+performance regressions. A command line interface is available as
+``python -m devito.benchmark``.
+"""
+
+from devito.benchmark.problems import *  # noqa
+from devito.benchmark.results import *  # noqa
+from devito.benchmark.runner import *  # noqa
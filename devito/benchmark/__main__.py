@@ -0,0 +1,96 @@
+"""
+Command line interface to the Devito benchmark suite. Examples: ::
+
+    # Sweep over some parameters of the acoustic problem
+    python -m devito.benchmark run -P acoustic -d 100 100 100 -so 4 8 \\
+        --dse basic advanced --dle basic advanced
+
+    # Compare the results obtained with two Devito versions
+    python -m devito.benchmark compare 2.0.1 2.1.0
+"""
+
+from __future__ import absolute_import
+
+import sys
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from collections import OrderedDict
+from os import path
+
+from devito.benchmark.problems import problems
+from devito.benchmark.results import ResultSet, compare
+from devito.benchmark.runner import sweep
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="The Devito benchmark suite",
+                            formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-r', '--resultsdir', default=path.join('.', 'results'),
+                        help="Directory containing the result sets")
+    subparsers = parser.add_subparsers(dest='command')
+
+    run = subparsers.add_parser('run', help="Run a parameter sweep",
+                                formatter_class=ArgumentDefaultsHelpFormatter)
+    run.add_argument('-P', '--problem', nargs='+', default=['acoustic'],
+                     choices=list(problems), help="Problems to benchmark")
+    run.add_argument('-d', '--shape', type=int, nargs='+', default=[50, 50, 50],
+                     help="Problem shape")
+    run.add_argument('-so', '--space_order', type=int, nargs='+', default=[4],
+                     help="Space orders")
+    run.add_argument('-to', '--time_order', type=int, nargs='+', default=None,
+                     help="Time orders (default: the problem's own)")
+    run.add_argument('--dse', nargs='+', default=['advanced'],
+                     choices=['noop', 'basic', 'advanced', 'speculative',
+                              'aggressive'], help="DSE modes")
+    run.add_argument('--dle', nargs='+', default=['advanced'],
+                     choices=['noop', 'basic', 'advanced', 'speculative'],
+                     help="DLE modes")
+    run.add_argument('-a', '--autotune', action='store_true',
+                     help="Benchmark with and without auto-tuning")
+    run.add_argument('-n', '--repeats', type=int, default=3,
+                     help="Number of runs of each parameter combination")
+    run.add_argument('-t', '--tag', default=None,
+                     help="Name of the result set (default: the Devito version)")
+
+    cmp = subparsers.add_parser('compare', help="Compare two result sets, "
+                                "flagging performance regressions",
+                                formatter_class=ArgumentDefaultsHelpFormatter)
+    cmp.add_argument('reference', help="Tag of the reference result set")
+    cmp.add_argument('current', help="Tag of the result set to be checked")
+    cmp.add_argument('--threshold', type=float, default=0.05,
+                     help="Relative slowdown flagged as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = ResultSet(args.resultsdir, args.tag).load()
+        parameters = OrderedDict()
+        parameters['shape'] = [tuple(args.shape)]
+        parameters['space_order'] = args.space_order
+        if args.time_order is not None:
+            parameters['time_order'] = args.time_order
+        parameters['dse'] = args.dse
+        parameters['dle'] = args.dle
+        parameters['autotune'] = [False, True] if args.autotune else False
+        for problem in args.problem:
+            sweep(problem, parameters, args.repeats, results)
+        print("Results stored in %s" % results.path)
+        return 0
+    elif args.command == 'compare':
+        reference = ResultSet(args.resultsdir, args.reference).load()
+        current = ResultSet(args.resultsdir, args.current).load()
+        comparisons = compare(reference, current, args.threshold)
+        for i in comparisons:
+            print("%s%s %s: %.3f s -> %.3f s (x%.2f)" %
+                  ('REGRESSION ' if i.regression else '', i.key, i.metric,
+                   i.reference, i.current, i.ratio))
+        regressions = [i for i in comparisons if i.regression]
+        print("%d benchmarks compared, %d regressions" %
+              (len(comparisons), len(regressions)))
+        return 1 if regressions else 0
+    else:
+        parser.print_help()
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
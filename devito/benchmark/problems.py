@@ -0,0 +1,111 @@
+"""
+The problems that can be benchmarked. A problem is a function that, given the
+problem parameters, returns a pair of callables ``(build, run)``: ``build()``
+constructs and JIT-compiles the Operators, while ``run()`` executes them and
+returns a :class:`PerformanceSummary`. This way, the build time and the run
+time can be measured separately.
+"""
+
+from __future__ import absolute_import
+
+from collections import OrderedDict
+
+import numpy as np
+from sympy import Eq
+
+from devito.base import Operator, TimeData
+from devito.dimension import t, x, y, z
+
+__all__ = ['problems', 'acoustic', 'tti', 'diffusion']
+
+
+def import_examples(name):
+    """Import the module ``name`` from the Devito examples, raising a helpful
+    error if the examples are not available (e.g., Devito is not being used
+    from a source checkout)."""
+    try:
+        return __import__(name, fromlist=['*'])
+    except ImportError:
+        raise ImportError("The `%s` problem requires the Devito examples; please "
+                          "run from a Devito source checkout" % name.split('.')[-2])
+
+
+def acoustic(shape=(50, 50, 50), space_order=4, time_order=2, dse='advanced',
+             dle='advanced', autotune=False, tn=250.0, nbpml=10):
+    """
+    The forward operator of the acoustic wave equation, see
+    ``examples/seismic/acoustic``.
+    """
+    example = import_examples('examples.seismic.acoustic.acoustic_example')
+    solver = example.acoustic_setup(shape=tuple(shape), spacing=(15.,)*len(shape),
+                                    tn=tn, time_order=time_order,
+                                    space_order=space_order, nbpml=nbpml,
+                                    dse=dse, dle=dle)
+
+    def build():
+        solver.op_fwd(False).cfunction
+
+    def run():
+        _, _, summary = solver.forward(autotune=autotune)
+        return summary
+
+    return build, run
+
+
+def tti(shape=(50, 50, 50), space_order=4, time_order=2, dse='advanced',
+        dle='advanced', autotune=False, tn=250.0, nbpml=10):
+    """
+    The forward operator of the TTI wave equation, with centered kernel, see
+    ``examples/seismic/tti``.
+    """
+    example = import_examples('examples.seismic.tti.tti_example')
+    solver = example.tti_setup(shape=tuple(shape), spacing=(20.,)*len(shape), tn=tn,
+                               time_order=time_order, space_order=space_order,
+                               nbpml=nbpml, dse=dse, dle=dle)
+
+    def build():
+        solver.op_fwd('centered', False).cfunction
+
+    def run():
+        _, _, _, summary = solver.forward(autotune=autotune, kernel='centered')
+        return summary
+
+    return build, run
+
+
+def diffusion(shape=(100, 100), space_order=2, dse='advanced', dle='advanced',
+              autotune=False, timesteps=100, a=0.5):
+    """
+    An explicit (forward Euler, hence first order in time) finite difference
+    scheme for the diffusion equation, with a "ring" as initial condition, see
+    ``examples/cfd/example_diffusion.py``.
+    """
+    spacing = 1./(shape[0] - 1)
+    dt = spacing**2/(2*a*len(shape))
+
+    u = TimeData(name='u', shape=tuple(shape), time_order=1, space_order=space_order)
+    grid = np.meshgrid(*[np.linspace(0., 1., i, dtype=np.float32) for i in shape],
+                       indexing='ij')
+    r = sum((i - .5)**2 for i in grid)
+    u.data[0, :] = np.logical_and(.05 <= r, r <= .1)
+
+    dims = [x, y, z][:len(shape)]
+    # The forward Euler update, written explicitly rather than through
+    # `solve`, which would turn the integer stencil offsets into floats
+    stencil = u + t.spacing*a*u.laplace
+    subs = {i.spacing: spacing for i in dims}
+    subs[t.spacing] = dt
+    handle = OrderedDict()
+
+    def build():
+        handle['op'] = Operator(Eq(u.forward, stencil), subs=subs, dse=dse, dle=dle)
+        handle['op'].cfunction
+
+    def run():
+        return handle['op'].apply(u=u, t=timesteps, autotune=autotune)
+
+    return build, run
+
+
+problems = OrderedDict([('acoustic', acoustic), ('tti', tti), ('diffusion', diffusion)])
+"""The problems that can be benchmarked, by name."""
@@ -0,0 +1,108 @@
+"""
+Storage and comparison of benchmark results.
+"""
+
+from __future__ import absolute_import
+
+import json
+from collections import OrderedDict, namedtuple
+from os import makedirs, path, rename
+from uuid import uuid4
+
+__all__ = ['ResultSet', 'Comparison', 'compare']
+
+
+class ResultSet(object):
+
+    """
+    A set of benchmark results, stored in ``<resultsdir>/<tag>/results.json``.
+
+    :param resultsdir: The directory containing all result sets.
+    :param tag: (Optional) the name of the result set. Defaults to the Devito
+                version, so that the results obtained with different versions
+                of Devito are stored, and can be compared, separately.
+    """
+
+    filename = 'results.json'
+
+    def __init__(self, resultsdir, tag=None):
+        if tag is None:
+            from devito import __version__
+            tag = __version__
+        self.resultsdir = resultsdir
+        self.tag = tag
+        self.records = OrderedDict()
+
+    @property
+    def path(self):
+        return path.join(self.resultsdir, self.tag, self.filename)
+
+    @classmethod
+    def key(cls, record):
+        """Return a key identifying the problem and parameters of ``record``."""
+        return json.dumps([record['problem'], sorted(record['params'].items())])
+
+    def add(self, record):
+        """Add ``record`` to the result set, replacing any record with the same
+        problem and parameters."""
+        self.records[self.key(record)] = record
+
+    def load(self):
+        """Load the result set from disk, if it exists. Return ``self``."""
+        try:
+            with open(self.path) as f:
+                for i in json.load(f, object_pairs_hook=OrderedDict):
+                    self.add(i)
+        except (IOError, ValueError):
+            # No results yet, or unreadable
+            pass
+        return self
+
+    def save(self):
+        """
+        Write the result set to disk. The file is written to a process-private
+        temporary file, which is then atomically renamed.
+        """
+        dirname = path.dirname(self.path)
+        if not path.exists(dirname):
+            makedirs(dirname)
+        tmp_filename = "%s-%s" % (self.path, uuid4().hex)
+        with open(tmp_filename, 'w') as f:
+            json.dump(list(self.records.values()), f, indent=1, default=str)
+        rename(tmp_filename, self.path)
+
+
+Comparison = namedtuple('Comparison', 'key metric reference current ratio regression')
+"""The comparison of a ``metric`` of the same benchmark in two result sets.
+``ratio`` is ``current/reference``; ``regression`` is True if ``ratio`` exceeds
+the given threshold."""
+
+
+def compare(reference, current, threshold=0.05):
+    """
+    Compare the run time and build time of the benchmarks in the result set
+    ``current`` with those of the same benchmarks in the result set ``reference``.
+    For the run time, the best of the repeats is used.
+
+    :param reference: A :class:`ResultSet`.
+    :param current: A :class:`ResultSet`.
+    :param threshold: (Optional) the relative slowdown beyond which a benchmark
+                      is flagged as a performance regression. Defaults to 5%.
+    :returns: A list of :class:`Comparison`, for the benchmarks in both result sets.
+    """
+    comparisons = []
+    for key, record in current.records.items():
+        if key not in reference.records:
+            continue
+        for metric in ['run_time', 'build_time']:
+            ref = best(reference.records[key][metric])
+            cur = best(record[metric])
+            ratio = cur/ref if ref > 0 else float('inf')
+            comparisons.append(Comparison(key, metric, ref, cur, ratio,
+                                          ratio > 1 + threshold))
+    return comparisons
+
+
+def best(value):
+    """Return the minimum of ``value`` if it is a list, ``value`` otherwise."""
+    return min(value) if isinstance(value, list) else value
@@ -0,0 +1,108 @@
+"""
+Execution of benchmarks over a parameter space.
+"""
+
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from itertools import product
+from timeit import default_timer as timer
+
+from devito.benchmark.problems import problems
+from devito.logger import info
+
+__all__ = ['execute', 'sweep']
+
+
+def execute(problem, repeats=3, **params):
+    """
+    Run the benchmark ``problem`` with the given parameters.
+
+    :param problem: The name of the problem, a key of ``problems``.
+    :param repeats: (Optional) the number of runs. The Operators are built once.
+    :param params: The problem parameters (e.g., ``shape``, ``space_order``,
+                   ``dse``, ``dle``, ``autotune``).
+    :returns: A dictionary with the problem, the parameters, the build time,
+              the run time of each repeat, and the performance of each section
+              and the run metadata (see :class:`PerformanceSummary`) of the
+              fastest repeat.
+
+    The build is cold: the Operators are compiled, and autotuned in the first
+    run, from scratch, rather than retrieved from the JIT cache and the
+    autotuning database.
+    """
+    from devito import clear_cache, configuration
+
+    if problem not in problems:
+        raise ValueError("Unknown problem `%s`; available: %s" %
+                         (problem, ', '.join(problems)))
+
+    # Start from scratch, so that the Operators are actually built
+    clear_cache()
+
+    build, run = problems[problem](**params)
+
+    def timed():
+        tic = timer()
+        handle = run()
+        return timer() - tic, handle
+
+    # Neither the JIT cache nor the autotuning database, possibly populated by
+    # previous benchmarks, may be used to build, and autotune in the first run
+    cold = OrderedDict([('jit_cache', False), ('autotuning_retune', True)])
+    saved = OrderedDict([(k, configuration[k]) for k in cold])
+    try:
+        for k, v in cold.items():
+            configuration[k] = v
+
+        tic = timer()
+        build()
+        build_time = timer() - tic
+
+        runs = [timed()]
+    finally:
+        for k, v in saved.items():
+            configuration[k] = v
+    runs.extend(timed() for _ in range(repeats - 1))
+
+    run_time = [i for i, _ in runs]
+    summary = min(runs, key=lambda i: i[0])[1]
+
+    info("Benchmark %s %s: build %.2f s, run %.2f s (best of %d)" %
+         (problem, dict(params), build_time, min(run_time), repeats))
+
+    record = OrderedDict()
+    record['problem'] = problem
+    record['params'] = OrderedDict(sorted(params.items()))
+    record['build_time'] = build_time
+    record['run_time'] = run_time
+    record['sections'] = OrderedDict([(k, OrderedDict(v._asdict()))
+                                      for k, v in summary.items()])
+    record['metadata'] = OrderedDict(summary.metadata)
+    record['metadata']['cold_build'] = True
+    return record
+
+
+def sweep(problem, parameters, repeats=3, results=None):
+    """
+    Run the benchmark ``problem`` for all combinations of parameters.
+
+    :param problem: The name of the problem, a key of ``problems``.
+    :param parameters: A dictionary mapping each parameter to a list of values.
+                       Parameters with a non-list value are kept fixed.
+    :param repeats: (Optional) the number of runs of each combination.
+    :param results: (Optional) a :class:`ResultSet`, to which the results are
+                    added, and which is saved after each combination.
+    :returns: The list of results, see :func:`execute`.
+    """
+    keys = list(parameters)
+    values = [v if isinstance(v, list) else [v] for v in parameters.values()]
+
+    records = []
+    for i in product(*values):
+        record = execute(problem, repeats, **dict(zip(keys, i)))
+        records.append(record)
+        if results is not None:
+            results.add(record)
+            results.save()
+    return records
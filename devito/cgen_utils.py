@@ -1,4 +1,5 @@
 from collections import OrderedDict
+from functools import reduce
 
 import cgen as c
 from mpmath.libmp import prec_to_dps, to_str
@@ -112,6 +113,40 @@ class CodePrinter(CCodePrinter):
         result = '%'.join(args)
         return result
 
+    def _print_IntDiv(self, expr):
+        """Print integer division using the / operator in C
+
+        :param expr: An integer division, e.g. IntDiv(a, b)
+        :returns: The resulting code as a string, e.g. (a)/(b)
+        """
+        return '/'.join('(%s)' % self._print(i) for i in expr.args)
+
+    def _print_Relational(self, expr):
+        """Print a relation using C comparison operators
+
+        :param expr: A relation, e.g. Eq(a, b)
+        :returns: The resulting code as a string, e.g. a == b
+        """
+        return '%s %s %s' % (self._print(expr.lhs), expr.rel_op, self._print(expr.rhs))
+
+    def _print_Max(self, expr):
+        """Print max using nested conditional operators
+
+        :param expr: A max expression, e.g. Max(a, b, c)
+        :returns: The resulting code as a string, e.g. ((a) > (b) ? (a) : (b))
+        """
+        args = [self._print(i) for i in expr.args]
+        return reduce(lambda a, b: '((%s) > (%s) ? (%s) : (%s))' % (a, b, a, b), args)
+
+    def _print_Min(self, expr):
+        """Print min using nested conditional operators
+
+        :param expr: A min expression, e.g. Min(a, b, c)
+        :returns: The resulting code as a string, e.g. ((a) < (b) ? (a) : (b))
+        """
+        args = [self._print(i) for i in expr.args]
+        return reduce(lambda a, b: '((%s) < (%s) ? (%s) : (%s))' % (a, b, a, b), args)
+
     def _print_Float(self, expr):
         """Always printing floating point numbers in scientific notation
 
@@ -179,3 +214,12 @@ printmark = lambda i: c.Line('printf("Here: %s\\n"); fflush(stdout);' % i)
 printvar = lambda i: c.Statement('printf("%s=%%s\\n", %s); fflush(stdout);' % (i, i))
 INT = Function('INT')
 FLOAT = Function('FLOAT')
+
+
+class IntDiv(Function):
+
+    """The integer division of two integer expressions, rounding towards zero
+    as in C."""
+
+    nargs = 2
+    is_integer = True
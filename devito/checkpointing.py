@@ -0,0 +1,250 @@
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from functools import reduce
+from operator import mul
+
+from devito.logger import info
+from devito.tools import as_tuple
+
+__all__ = ['CheckpointOperator', 'DataCheckpoint', 'Revolver', 'revolve',
+           'revolve_cost']
+
+"""
+Optimal checkpointing (a.k.a. "Revolve") of time-marching computations, see
+
+    A. Griewank and A. Walther, "Algorithm 799: Revolve: An Implementation of
+    Checkpointing for the Reverse or Adjoint Mode of Computational
+    Differentiation", ACM Trans. Math. Softw., 26(1), 2000.
+
+The adjoint of a time-marching computation consumes the forward states in
+reverse order. Rather than storing all of them, only a few states, or
+"checkpoints", are stored, and the others are recomputed from the closest
+checkpoint when needed. Given a number of checkpoints, the binomial schedule
+generated here minimizes the number of recomputed timesteps.
+"""
+
+# The actions of a checkpointing schedule
+ADVANCE = 'advance'
+TAKESHOT = 'takeshot'
+RESTORE = 'restore'
+FREE = 'free'
+REVERSE = 'reverse'
+
+
+class DataCheckpoint(object):
+
+    """
+    The state of a time-marching computation, that is the data of a set of
+    :class:`SymbolicData` objects (e.g., buffered :class:`TimeData`).
+
+    :param objects: The :class:`SymbolicData` objects making up the state.
+    """
+
+    def __init__(self, objects):
+        self.objects = as_tuple(objects)
+
+    @property
+    def nbytes(self):
+        """The size of a checkpoint, in bytes."""
+        return sum(i.data.nbytes for i in self.objects)
+
+    def save(self):
+        """Return a copy of the current state."""
+        return [i.data.copy() for i in self.objects]
+
+    def load(self, values):
+        """Overwrite the current state with a copy returned by :meth:`save`."""
+        for i, v in zip(self.objects, values):
+            i.data[:] = v
+
+
+class CheckpointOperator(object):
+
+    """
+    An :class:`Operator` applied by a :class:`Revolver` over windows of
+    timesteps ``[time_s, time_e)``.
+
+    :param op: The :class:`Operator`.
+    :param kwargs: The arguments passed to ``op.apply`` at each run.
+    """
+
+    def __init__(self, op, **kwargs):
+        self.op = op
+        self.kwargs = kwargs
+
+    def apply(self, time_s, time_e):
+        return self.op.apply(time_s=time_s, time_e=time_e, **self.kwargs)
+
+
+class Revolver(object):
+
+    """
+    Drive a forward computation and its adjoint, storing at most
+    ``ncheckpoints`` forward states at any time.
+
+    :param checkpoint: The :class:`DataCheckpoint` of the forward computation.
+    :param fwd_operator: The forward :class:`CheckpointOperator`. Its state
+                         after computing the timesteps ``[time_s, n]`` must
+                         be the one required by ``rev_operator`` to compute
+                         the timestep ``n``.
+    :param rev_operator: The reverse (adjoint) :class:`CheckpointOperator`.
+    :param ncheckpoints: The maximum number of forward states stored at once,
+                         including the initial one. At least 1.
+    :param time_s: The first timestep of the computation.
+    :param time_e: The last (excluded) timestep of the computation.
+
+    :meth:`apply_forward` computes all of the forward timesteps, taking
+    checkpoints along the way; :meth:`apply_reverse` then computes the adjoint
+    timesteps, from ``time_e - 1`` down to ``time_s``, recomputing the forward
+    states from the checkpoints. Anything depending on the complete forward
+    computation (e.g., a data residual) may be set up in between.
+    """
+
+    def __init__(self, checkpoint, fwd_operator, rev_operator, ncheckpoints,
+                 time_s, time_e):
+        if ncheckpoints < 1:
+            raise ValueError("At least one checkpoint is required")
+        if time_e <= time_s:
+            raise ValueError("Illegal time range [%d, %d)" % (time_s, time_e))
+        self.checkpoint = checkpoint
+        self.fwd_operator = fwd_operator
+        self.rev_operator = rev_operator
+        self.ncheckpoints = ncheckpoints
+        self.time_s = time_s
+        self.time_e = time_e
+
+        self._schedule = revolve(time_e - time_s, ncheckpoints - 1)
+        self._storage = OrderedDict()
+        self._pending = None
+
+        self.stats = OrderedDict([('timesteps', time_e - time_s),
+                                  ('forward', 0), ('reverse', 0),
+                                  ('checkpoints', 0)])
+
+    def apply_forward(self):
+        """Compute the forward timesteps, taking checkpoints along the way."""
+        if self._pending is not None:
+            raise RuntimeError("The forward computation has already been run")
+        for action in self._schedule:
+            if action[0] == REVERSE:
+                self._pending = action
+                break
+            self._execute(action)
+
+    def apply_reverse(self):
+        """Compute the adjoint timesteps, recomputing the forward states."""
+        if self._pending is None:
+            raise RuntimeError("The forward computation must be run first")
+        self._execute(self._pending)
+        for action in self._schedule:
+            self._execute(action)
+        self._storage.clear()
+
+        stats = self.stats
+        info("Revolver: %d timesteps, %d forward timesteps computed (%.2fx), "
+             "%d checkpoints of %.1f MB" %
+             (stats['timesteps'], stats['forward'],
+              float(stats['forward'])/stats['timesteps'],
+              stats['checkpoints'], self.checkpoint.nbytes/1024.**2))
+
+    def _execute(self, action):
+        name, args = action[0], [self.time_s + i for i in action[1:]]
+        if name == ADVANCE:
+            self.fwd_operator.apply(*args)
+            self.stats['forward'] += args[1] - args[0]
+        elif name == TAKESHOT:
+            self._storage[args[0]] = self.checkpoint.save()
+            self.stats['checkpoints'] = max(self.stats['checkpoints'],
+                                            len(self._storage))
+        elif name == RESTORE:
+            self.checkpoint.load(self._storage[args[0]])
+        elif name == FREE:
+            self._storage.pop(args[0])
+        else:
+            self.rev_operator.apply(args[0], args[0] + 1)
+            self.stats['reverse'] += 1
+
+
+def revolve(nsteps, nsnapshots):
+    """
+    Generate the actions of the binomial checkpointing schedule reversing
+    ``nsteps`` timesteps, with ``nsnapshots`` checkpoints besides the one
+    of the initial state. The actions are tuples: ::
+
+        * (ADVANCE, i, j): compute the forward timesteps [i, j).
+        * (TAKESHOT, i): store the forward state before the timestep i.
+        * (RESTORE, i): restore the forward state stored by (TAKESHOT, i).
+        * (FREE, i): drop the forward state stored by (TAKESHOT, i).
+        * (REVERSE, i): compute the adjoint timestep i, which requires the
+                        forward state after the timestep i.
+
+    The number of forward timesteps computed is given by :func:`revolve_cost`.
+    """
+    yield (TAKESHOT, 0)
+    for action in _revolve(0, nsteps, nsnapshots):
+        yield action
+    yield (FREE, 0)
+
+
+def _revolve(start, end, nsnapshots):
+    # On entry, the forward state before the timestep ``start`` is both
+    # current and stored
+    if end - start == 1:
+        yield (ADVANCE, start, end)
+        yield (REVERSE, start)
+    elif nsnapshots == 0:
+        for i in reversed(range(start, end)):
+            if i < end - 1:
+                yield (RESTORE, start)
+            yield (ADVANCE, start, i + 1)
+            yield (REVERSE, i)
+    else:
+        split = start + _split(end - start, nsnapshots)
+        yield (ADVANCE, start, split)
+        yield (TAKESHOT, split)
+        for action in _revolve(split, end, nsnapshots - 1):
+            yield action
+        yield (FREE, split)
+        yield (RESTORE, start)
+        for action in _revolve(start, split, nsnapshots):
+            yield action
+
+
+def _split(nsteps, nsnapshots):
+    """
+    Return the number of timesteps to be computed before taking the next
+    checkpoint, so that the total number of forward timesteps is minimal.
+    """
+    r = _repetitions(nsteps, nsnapshots + 1)
+    return min(binomial(nsnapshots + r, r - 1),
+               nsteps - binomial(nsnapshots + r - 1, r - 1))
+
+
+def _repetitions(nsteps, nsnapshots):
+    """
+    Return the least ``r`` such that ``nsteps`` timesteps can be reversed with
+    ``nsnapshots`` checkpoints, including the initial state, recomputing each
+    timestep at most ``r`` times.
+    """
+    r = 0
+    while binomial(nsnapshots + r, r) < nsteps:
+        r += 1
+    return r
+
+
+def revolve_cost(nsteps, nsnapshots):
+    """
+    Return the number of forward timesteps computed by :func:`revolve`.
+    """
+    r = _repetitions(nsteps, nsnapshots + 1)
+    if r == 0:
+        return nsteps
+    return nsteps + r*nsteps - binomial(nsnapshots + r + 1, r - 1)
+
+
+def binomial(n, k):
+    """Return the binomial coefficient ``n`` choose ``k``."""
+    if k < 0 or k > n:
+        return 0
+    return reduce(mul, range(n - k + 1, n + 1), 1) // reduce(mul, range(1, k + 1), 1)
@@ -1,9 +1,12 @@
 from functools import partial
 from hashlib import sha1
-from os import environ, getuid, mkdir, path
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from os import environ, getuid, listdir, makedirs, path, remove, rename, utime
 from tempfile import gettempdir
 from time import time
 from sys import platform
+from uuid import uuid4
 import subprocess
 
 import numpy.ctypeslib as npct
@@ -11,11 +14,12 @@ from codepy.jit import extension_file_from_string
 from codepy.toolchain import GCCToolchain
 
 from devito.exceptions import CompilationError
-from devito.logger import log
+from devito.logger import DEBUG, log
 from devito.parameters import configuration
-from devito.tools import change_directory
+from devito.tools import as_tuple, change_directory
 
-__all__ = ['jit_compile', 'load', 'make', 'GNUCompiler']
+__all__ = ['jit_compile', 'jit_compile_units', 'jit_pool', 'load', 'make',
+           'GNUCompiler']
 
 
 class Compiler(GCCToolchain):
@@ -66,6 +70,29 @@ class Compiler(GCCToolchain):
     def __repr__(self):
         return "DevitoJITCompiler[%s]" % self.__class__.__name__
 
+    @property
+    def cc_version(self):
+        """The version string reported by the underlying compiler, or
+        ``'unknown'`` if the compiler cannot be queried."""
+        try:
+            return self._cc_version
+        except AttributeError:
+            try:
+                output = subprocess.check_output([self.cc, '--version'],
+                                                 stderr=subprocess.STDOUT)
+                self._cc_version = output.decode().strip().split('\n')[0]
+            except (OSError, subprocess.CalledProcessError):
+                self._cc_version = 'unknown'
+            return self._cc_version
+
+    @property
+    def signature(self):
+        """A string uniquely identifying the toolchain (compiler class and
+        version, flags, linked libraries), used to key the JIT cache."""
+        return str((self.__class__.__name__, self.cc, self.ld, self.cc_version,
+                    self.cflags, self.ldflags, self.include_dirs, self.libraries,
+                    self.library_dirs, self.defines, self.undefines))
+
 
 class GNUCompiler(Compiler):
     """Set of standard compiler flags for the GCC toolchain."""
@@ -196,11 +223,46 @@ def get_tmp_dir():
     tmpdir = path.join(gettempdir(), "devito-%s" % getuid())
 
     if not path.exists(tmpdir):
-        mkdir(tmpdir)
+        try:
+            makedirs(tmpdir)
+        except OSError:
+            # Created by a concurrent process in the meantime
+            pass
 
     return tmpdir
 
 
+def get_jit_dir():
+    """Function to get the directory storing JIT-compiled shared objects.
+
+    :return: Path to ``configuration['jit_cache_dir']``, if set, otherwise
+             to the devito-specific tmp directory
+    """
+    jitdir = configuration['jit_cache_dir']
+    if jitdir is None:
+        return get_tmp_dir()
+
+    jitdir = path.expanduser(jitdir)
+    if not path.exists(jitdir):
+        try:
+            makedirs(jitdir)
+        except OSError:
+            # Created by a concurrent process in the meantime
+            pass
+
+    return jitdir
+
+
+def get_lib_ext():
+    """Return the file extension of shared objects on the current platform."""
+    if platform == "linux" or platform == "linux2":
+        return "so"
+    elif platform == "darwin":
+        return "dylib"
+    elif platform == "win32" or platform == "win64":
+        return "dll"
+
+
 def load(basename, compiler):
     """Load a compiled library
 
@@ -228,28 +290,186 @@ def jit_compile(ccode, compiler):
     :param compiler: The toolchain used for compilation.
 
     :return: The name of the compilation unit.
+
+    The name of the compilation unit is a hash of ``ccode`` and of
+    ``compiler.signature``. If ``configuration['jit_cache']`` is set and a
+    shared object with such a name already exists, compilation is skipped.
+    Compilation takes place in process-private temporary files, which are
+    then atomically renamed, so that concurrent processes (e.g., MPI ranks)
+    never observe partially written shared objects.
     """
-    hash_key = sha1(str(ccode).encode()).hexdigest()
-    basename = path.join(get_tmp_dir(), hash_key)
+    cachedir = get_jit_dir()
+    basename = path.join(cachedir, make_hash_key(ccode, compiler))
 
     src_file = "%s.%s" % (basename, compiler.src_ext)
-    if platform == "linux" or platform == "linux2":
-        lib_file = "%s.so" % basename
-    elif platform == "darwin":
-        lib_file = "%s.dylib" % basename
-    elif platform == "win32" or platform == "win64":
-        lib_file = "%s.dll" % basename
+    lib_file = "%s.%s" % (basename, get_lib_ext())
+
+    if cache_lookup(lib_file):
+        log("%s: cache hit, skipped compilation of %s" % (compiler, src_file))
+        return basename
+
+    tmp_name = "%s-%s" % (basename, uuid4().hex)
+    tmp_src_file = "%s.%s" % (tmp_name, compiler.src_ext)
+    tmp_lib_file = "%s.%s" % (tmp_name, get_lib_ext())
 
     tic = time()
-    extension_file_from_string(toolchain=compiler, ext_file=lib_file,
-                               source_string=ccode, source_name=src_file,
+    extension_file_from_string(toolchain=compiler, ext_file=tmp_lib_file,
+                               source_string=ccode, source_name=tmp_src_file,
                                debug=configuration['debug_compiler'])
+    rename(tmp_src_file, src_file)
+    rename(tmp_lib_file, lib_file)
     toc = time()
     log("%s: compiled %s [%.2f s]" % (compiler, src_file, toc-tic))
 
+    evict_jit_cache(cachedir, keep=lib_file)
+
+    return basename
+
+
+def jit_compile_units(units, compiler):
+    """JIT compile the given translation units into a single shared object.
+
+    :param units: Iterable of strings of C source code, one per translation unit.
+    :param compiler: The toolchain used for compilation.
+
+    :return: The name of the compilation unit.
+
+    Each translation unit is compiled into its own object file, and all object
+    files are then linked together. Object files are compiled concurrently, by
+    up to as many compiler processes as CPU cores. Like the shared object, each
+    object file is individually cached (see :func:`jit_compile`), so changing
+    a single translation unit only triggers the recompilation of that unit.
+    """
+    cachedir = get_jit_dir()
+    units = [str(i) for i in units]
+    keys = [make_hash_key(i, compiler) for i in units]
+    basename = path.join(cachedir, sha1(''.join(keys).encode()).hexdigest())
+
+    lib_file = "%s.%s" % (basename, get_lib_ext())
+
+    if cache_lookup(lib_file):
+        log("%s: cache hit, skipped compilation of %s" % (compiler, lib_file))
+        return basename
+
+    def build_object(args):
+        key, unit = args
+        src_file = path.join(cachedir, "%s.%s" % (key, compiler.src_ext))
+        obj_file = path.join(cachedir, "%s.o" % key)
+        if cache_lookup(obj_file):
+            log("%s: cache hit, skipped compilation of %s" % (compiler, src_file),
+                DEBUG)
+            return obj_file
+
+        tmp_name = path.join(cachedir, "%s-%s" % (key, uuid4().hex))
+        tmp_src_file = "%s.%s" % (tmp_name, compiler.src_ext)
+        tmp_obj_file = "%s.o" % tmp_name
+        with open(tmp_src_file, 'w') as f:
+            f.write(unit)
+        compiler.build_object(tmp_obj_file, [tmp_src_file],
+                              debug=configuration['debug_compiler'])
+        rename(tmp_src_file, src_file)
+        rename(tmp_obj_file, obj_file)
+        log("%s: compiled %s" % (compiler, src_file), DEBUG)
+        return obj_file
+
+    tic = time()
+    # Each task spawns a compiler process, so threads suffice to get parallelism
+    pool = ThreadPool(min(len(units), cpu_count()))
+    try:
+        obj_files = pool.map(build_object, list(zip(keys, units)))
+    finally:
+        pool.close()
+        pool.join()
+
+    tmp_lib_file = "%s-%s.%s" % (basename, uuid4().hex, get_lib_ext())
+    compiler.link_extension(tmp_lib_file, obj_files,
+                            debug=configuration['debug_compiler'])
+    rename(tmp_lib_file, lib_file)
+    toc = time()
+    log("%s: compiled %d translation units into %s [%.2f s]" %
+        (compiler, len(units), lib_file, toc-tic))
+
+    evict_jit_cache(cachedir, keep=[lib_file] + obj_files)
+
     return basename
 
 
+def jit_pool():
+    """
+    Return the pool of threads used for asynchronous JIT compilation. The pool
+    is created upon the first call. Threads suffice to overlap compilation with
+    Python-side work, since the compiler runs in a separate process.
+    """
+    if jit_pool.pool is None:
+        jit_pool.pool = ThreadPool(cpu_count())
+    return jit_pool.pool
+jit_pool.pool = None  # noqa
+
+
+def make_hash_key(ccode, compiler):
+    """Return a key uniquely identifying the compilation of ``ccode``
+    through ``compiler``."""
+    return sha1((str(ccode) + compiler.signature).encode()).hexdigest()
+
+
+def cache_lookup(filename):
+    """
+    Return True if ``configuration['jit_cache']`` is set and ``filename``
+    is in the JIT cache, False otherwise. On a cache hit, the modification
+    time of ``filename`` is updated, so that eviction is LRU.
+    """
+    if not configuration['jit_cache'] or not path.exists(filename):
+        return False
+    try:
+        utime(filename, None)
+    except OSError:
+        # Evicted by a concurrent process in the meantime
+        return False
+    return True
+
+
+def evict_jit_cache(cachedir, keep=None):
+    """
+    Remove the least recently used shared objects and object files (and their
+    sources) from ``cachedir`` until their total size drops below
+    ``configuration['jit_cache_size']`` MB. A size of 0 disables eviction.
+
+    :param cachedir: The directory storing the JIT-compiled shared objects.
+    :param keep: (Optional) one or more files that must never be evicted.
+    """
+    limit = configuration['jit_cache_size']*1024**2
+    if not limit:
+        return
+    keep = as_tuple(keep)
+
+    exts = (".%s" % get_lib_ext(), ".o")
+    entries = []
+    for i in listdir(cachedir):
+        if not i.endswith(exts):
+            continue
+        filename = path.join(cachedir, i)
+        try:
+            entries.append((path.getmtime(filename), path.getsize(filename), filename))
+        except OSError:
+            # Evicted by a concurrent process in the meantime
+            continue
+
+    total = sum(i[1] for i in entries)
+    for _, size, filename in sorted(entries):
+        if total <= limit:
+            break
+        if filename in keep:
+            continue
+        root = path.splitext(filename)[0]
+        for i in [filename] + ["%s.%s" % (root, j) for j in ['c', 'cpp']]:
+            try:
+                remove(i)
+            except OSError:
+                pass
+        total -= size
+        log("Evicted %s from the JIT cache" % filename, DEBUG)
+
+
 def make(loc, args):
     """
     Invoke ``make`` command from within ``loc`` with arguments ``args``.
@@ -296,3 +516,8 @@ configuration.add('compiler', 'custom', list(compiler_registry),
                   lambda i: compiler_registry[i]())
 configuration.add('openmp', 0, [0, 1], lambda i: bool(i))
 configuration.add('debug_compiler', 0, [0, 1], lambda i: bool(i))
+configuration.add('jit_cache', 1, [0, 1], lambda i: bool(i))
+configuration.add('jit_cache_dir', None)
+configuration.add('jit_cache_size', 1024, None, lambda i: int(i))
+configuration.add('jit_split', 0, [0, 1], lambda i: bool(i))
+configuration.add('jit_async', 0, [0, 1], lambda i: bool(i))
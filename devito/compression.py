@@ -0,0 +1,316 @@
+from __future__ import absolute_import
+
+import cgen as c
+import numpy as np
+from sympy import Eq, Float, Function, Indexed
+
+from devito.cgen_utils import CodePrinter
+from devito.logger import error
+from devito.tools import filter_ordered
+
+__all__ = ['Codec', 'FixedPoint', 'Float16', 'BFloat16', 'compress', 'get_codec']
+
+"""
+Lossy compression of saved wavefields.
+
+A :class:`TimeData` created with ``compression=codec`` stores, rather than
+float32 values, the codes produced by ``codec``. The codes are computed by the
+generated code each time a value is written (e.g., ``usave = u``) and
+decoded each time it is read (e.g., in the imaging condition of a gradient),
+so that the compressed data is never expanded in memory.
+
+All of the codecs are fixed-rate and pointwise, so that compressing and
+decompressing are local to each grid point and do not hamper vectorization
+or parallelization. The error introduced by a codec is bounded by
+:meth:`Codec.error`.
+"""
+
+
+class Codec(object):
+
+    """
+    A pointwise, fixed-rate lossy codec of float32 values.
+
+    :param name: Name of the codec; the generated code calls the C functions
+                 ``<name>_encode`` and ``<name>_decode``.
+    :param dtype: The data type of the codes.
+    :param cdef: The C definitions of the encode and decode functions.
+    """
+
+    def __init__(self, name, dtype, cdef):
+        self.name = name
+        self.dtype = dtype
+        self.cdef = c.LiteralLines("\n" + cdef)
+
+        self._encode = Function('%s_encode' % name)
+        self._decode = Function('%s_decode' % name)
+        CodePrinter.custom_functions[self._encode.__name__] = self._encode.__name__
+        CodePrinter.custom_functions[self._decode.__name__] = self._decode.__name__
+
+    def __repr__(self):
+        return "Codec[%s]" % self.name
+
+    def __eq__(self, other):
+        return isinstance(other, Codec) and self._key == other._key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key)
+
+    @property
+    def _key(self):
+        return (self.name,)
+
+    @property
+    def ratio(self):
+        """The compression ratio with respect to float32."""
+        return 4. / np.dtype(self.dtype).itemsize
+
+    @property
+    def params(self):
+        """Additional arguments of the encode and decode functions."""
+        return ()
+
+    def encode_expr(self, expr):
+        """Return a symbolic expression encoding ``expr``."""
+        return self._encode(expr, *self.params)
+
+    def decode_expr(self, expr):
+        """Return a symbolic expression decoding ``expr``."""
+        return self._decode(expr, *self.params)
+
+    def encode(self, values):
+        """Encode the float32 array ``values``, as in the generated code."""
+        raise NotImplementedError
+
+    def decode(self, codes):
+        """Decode the array ``codes``, as in the generated code."""
+        raise NotImplementedError
+
+    def error(self, values):
+        """Return an upper bound to the absolute error of the decoded
+        ``values``, pointwise."""
+        raise NotImplementedError
+
+
+class Float16(Codec):
+
+    """
+    IEEE 754 half precision, with rounding to nearest even: 11 significant bits,
+    and magnitudes up to 65504 (larger ones are encoded as infinity).
+    """
+
+    def __init__(self):
+        super(Float16, self).__init__('float16', np.uint16, """\
+static inline unsigned short float16_encode(float v)
+{
+  union { float f; unsigned int u; } f = {v}, magic = {0.5F};
+  unsigned int sign = f.u & 0x80000000u;
+  unsigned short h;
+  f.u ^= sign;
+  if (f.u >= 0x47800000u)
+  {
+    h = f.u > 0x7f800000u ? 0x7e00 : 0x7c00;
+  }
+  else if (f.u < 0x38800000u)
+  {
+    f.f += magic.f;
+    h = (unsigned short)(f.u - magic.u);
+  }
+  else
+  {
+    unsigned int odd = (f.u >> 13) & 1u;
+    f.u += 0xc8000fffu + odd;
+    h = (unsigned short)(f.u >> 13);
+  }
+  return h | (unsigned short)(sign >> 16);
+}
+
+static inline float float16_decode(unsigned short h)
+{
+  union { float f; unsigned int u; } f, magic = {6.10351562e-05F};
+  unsigned int exponent;
+  f.u = (h & 0x7fffu) << 13;
+  exponent = f.u & 0x0f800000u;
+  f.u += 0x38000000u;
+  if (exponent == 0x0f800000u)
+  {
+    f.u += 0x38000000u;
+  }
+  else if (exponent == 0)
+  {
+    f.u += 0x00800000u;
+    f.f -= magic.f;
+  }
+  f.u |= (h & 0x8000u) << 16;
+  return f.f;
+}""")
+
+    def encode(self, values):
+        return np.asarray(values, dtype=np.float32).astype(np.float16).view(np.uint16)
+
+    def decode(self, codes):
+        return np.asarray(codes, dtype=np.uint16).view(np.float16).astype(np.float32)
+
+    def error(self, values):
+        # Half of the spacing of half-precision numbers around ``values``
+        return np.maximum(np.abs(values)*2.**-11, 2.**-25)
+
+
+class BFloat16(Codec):
+
+    """
+    The upper half of IEEE 754 single precision, with rounding to nearest even:
+    8 significant bits, and the same range as float32.
+    """
+
+    def __init__(self):
+        super(BFloat16, self).__init__('bfloat16', np.uint16, """\
+static inline unsigned short bfloat16_encode(float v)
+{
+  union { float f; unsigned int u; } f = {v};
+  if ((f.u & 0x7fffffffu) > 0x7f800000u)
+  {
+    return (unsigned short)((f.u >> 16) | 0x40u);
+  }
+  f.u += 0x7fffu + ((f.u >> 16) & 1u);
+  return (unsigned short)(f.u >> 16);
+}
+
+static inline float bfloat16_decode(unsigned short h)
+{
+  union { float f; unsigned int u; } f;
+  f.u = (unsigned int)h << 16;
+  return f.f;
+}""")
+
+    def encode(self, values):
+        bits = np.asarray(values, dtype=np.float32).view(np.uint32)
+        rounded = bits + np.uint32(0x7fff) + ((bits >> 16) & np.uint32(1))
+        codes = (rounded >> 16).astype(np.uint16)
+        nan = (bits & np.uint32(0x7fffffff)) > np.uint32(0x7f800000)
+        codes[nan] = ((bits[nan] >> 16) | np.uint32(0x40)).astype(np.uint16)
+        return codes
+
+    def decode(self, codes):
+        bits = np.asarray(codes, dtype=np.uint16).astype(np.uint32)
+        return (bits << 16).view(np.float32)
+
+    def error(self, values):
+        return np.abs(values)*2.**-8
+
+
+class FixedPoint(Codec):
+
+    """
+    Fixed-point quantization of the values in ``[-amplitude, amplitude]`` onto
+    ``bits``-bit integers, with rounding to nearest. Values outside of this
+    range are clipped.
+
+    :param bits: The number of bits per value, either 8 or 16.
+    :param amplitude: The largest magnitude represented. The absolute error
+                      is ``amplitude/(2**bits - 2)`` within this range.
+    """
+
+    _dtypes = {8: np.int8, 16: np.int16}
+
+    def __init__(self, bits, amplitude):
+        if bits not in self._dtypes or not amplitude > 0:
+            error("Fixed-point compression requires 8 or 16 bits and a "
+                  "positive amplitude")
+            raise ValueError("Illegal fixed-point codec")
+        self.bits = bits
+        self.amplitude = float(amplitude)
+        self.levels = 2**(bits - 1) - 1
+        ctype = c.dtype_to_ctype(self._dtypes[bits])
+        super(FixedPoint, self).__init__('fixed%d' % bits, self._dtypes[bits], """\
+static inline %(ctype)s fixed%(bits)d_encode(float v, float scale)
+{
+  return (%(ctype)s)lrintf(fminf(fmaxf(v*scale, -%(levels)d.0F), %(levels)d.0F));
+}
+
+static inline float fixed%(bits)d_decode(%(ctype)s q, float scale)
+{
+  return q/scale;
+}""" % {'ctype': ctype, 'bits': bits, 'levels': self.levels})
+
+    @classmethod
+    def for_tolerance(cls, amplitude, tolerance):
+        """
+        Return the cheapest :class:`FixedPoint` codec whose absolute error is
+        at most ``tolerance``, for values bounded by ``amplitude``.
+        """
+        for bits in sorted(cls._dtypes):
+            if amplitude/(2.**bits - 2) <= tolerance:
+                return cls(bits, amplitude)
+        error("No fixed-point codec has an error within %g for amplitude %g"
+              % (tolerance, amplitude))
+        raise ValueError("Unattainable compression tolerance")
+
+    @property
+    def _key(self):
+        return (self.name, self.amplitude)
+
+    @property
+    def params(self):
+        return (Float(self.levels/self.amplitude),)
+
+    def encode(self, values):
+        scale = np.float32(self.levels/self.amplitude)
+        scaled = np.asarray(values, dtype=np.float32)*scale
+        return np.rint(np.clip(scaled, -self.levels, self.levels)).astype(self.dtype)
+
+    def decode(self, codes):
+        scale = np.float32(self.levels/self.amplitude)
+        return np.asarray(codes).astype(np.float32)/scale
+
+    def error(self, values):
+        clipped = np.maximum(np.abs(values) - self.amplitude, 0.)
+        return clipped + self.amplitude/(2.**self.bits - 2)
+
+
+codecs = {'float16': Float16(), 'bfloat16': BFloat16()}
+
+
+def get_codec(compression):
+    """
+    Return the :class:`Codec` identified by ``compression``, either a
+    :class:`Codec` or the name of a codec without parameters (``'float16'``,
+    ``'bfloat16'``).
+    """
+    if compression is None or isinstance(compression, Codec):
+        return compression
+    try:
+        return codecs[compression]
+    except (KeyError, TypeError):
+        error("Unknown compression %s; use one of %s or a Codec object"
+              % (compression, sorted(codecs)))
+        raise ValueError("Unknown compression")
+
+
+def compress(expressions):
+    """
+    Rewrite ``expressions`` so that the compressed data objects they access
+    are encoded on write and decoded on read.
+
+    :returns: The rewritten expressions and the :class:`Codec` objects used.
+    """
+    processed = []
+    used = []
+    for e in expressions:
+        mapper = {}
+        for i in e.rhs.atoms(Indexed):
+            codec = getattr(i.base.function, 'codec', None)
+            if codec is not None:
+                mapper[i] = codec.decode_expr(i)
+                used.append(codec)
+        rhs = e.rhs.xreplace(mapper)
+        codec = getattr(e.lhs.base.function, 'codec', None)\
+            if isinstance(e.lhs, Indexed) else None
+        if codec is not None:
+            rhs = codec.encode_expr(rhs)
+            used.append(codec)
+        processed.append(Eq(e.lhs, rhs) if mapper or codec else e)
+    return processed, filter_ordered(used)
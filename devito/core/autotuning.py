@@ -1,13 +1,25 @@
 from __future__ import absolute_import
 
 from collections import OrderedDict
-from itertools import combinations
+from itertools import product
 from functools import reduce
+from multiprocessing import cpu_count
+from numbers import Integral
 from operator import mul
+from os import environ, path, rename
+from uuid import uuid4
+import json
+import re
 import resource
 
+import cpuinfo
+from sympy import Symbol
+
+from devito.compiler import get_jit_dir
+from devito.dle.backends import BlockingArg, OmpArg, TilingArg
+from devito.dse import estimate_memory
 from devito.logger import info, info_at
-from devito.nodes import Iteration
+from devito.nodes import Expression, Iteration
 from devito.parameters import configuration
 from devito.visitors import FindNodes, FindSymbols
 
@@ -29,31 +41,51 @@ def autotune(operator, arguments, tunable):
             at_arguments[k] = v.copy()
 
     iterations = FindNodes(Iteration).visit(operator.body)
-    dim_mapper = {i.dim.name: i.dim for i in iterations}
+
+    mapper = OrderedDict([(i.argument.symbolic_size.name, i) for i in tunable
+                          if isinstance(i, BlockingArg)])
+    tiling_mapper = OrderedDict([(i.argument.name, i) for i in tunable
+                                 if isinstance(i, TilingArg)])
+    omp_mapper = OrderedDict([(i.argument.name, i) for i in tunable
+                              if isinstance(i, OmpArg)])
 
     # Shrink the iteration space of sequential dimensions so that auto-tuner
-    # runs take a negligible amount of time
-    sequentials = [i for i in iterations if i.is_Sequential]
+    # runs take a negligible amount of time. Iterations within a time tile
+    # are bounded by the Iteration over the time tiles, which is squeezed.
+    # Enough timesteps are run to fill the deepest attempted time tile
+    squeezer = options['at_squeezer']
+    if tiling_mapper:
+        squeezer = max([squeezer] + options['at_timetile'])
+    sequentials = [i for i in iterations if i.is_Sequential and not i.is_TimeTiled]
     if len(sequentials) == 0:
         timesteps = 1
     elif len(sequentials) == 1:
         sequential = sequentials[0]
         squeeze = sequential.dim.parent if sequential.dim.is_Buffered else sequential.dim
-        timesteps = sequential.extent(finish=options['at_squeezer'])
+        # The range of timesteps may be a runtime argument, in which case the
+        # extent of the original Iteration is squeezed
+        start, finish = [str(i) for i in sequential.limits[:2]]
+        ranged = finish in at_arguments and operator._time_iteration is not None
+        iteration = operator._time_iteration if ranged else sequential
+        timesteps = iteration.extent(finish=squeezer)
         if timesteps < 0:
-            timesteps = options['at_squeezer'] - timesteps + 1
+            timesteps = squeezer - timesteps + 1
             info_at("Adjusted auto-tuning timestep to %d" % timesteps)
-        at_arguments[squeeze.symbolic_size.name] = timesteps
+        if ranged:
+            at_arguments[finish] = at_arguments[start] + timesteps
+        else:
+            at_arguments[squeeze.symbolic_size.name] = timesteps
     else:
         info_at("Couldn't understand loop structure, giving up auto-tuning")
         return arguments
 
-    # Attempted block sizes
-    mapper = OrderedDict([(i.argument.symbolic_size.name, i) for i in tunable])
-    blocksizes = [OrderedDict([(i, v) for i in mapper])
-                  for v in options['at_blocksize']]
-    if configuration['autotuning'] == 'aggressive':
-        blocksizes = more_heuristic_attempts(blocksizes)
+    # Has the same problem already been auto-tuned ?
+    tunable = list(mapper) + list(tiling_mapper) + list(omp_mapper)
+    key = db_key(operator, arguments, tunable, sequentials)
+    best = db_lookup(key, tunable)
+    if best is not None:
+        info("Auto-tuned parameters (from database): %s" % best)
+        return tuned_arguments(operator, arguments, best)
 
     # How many temporaries are allocated on the stack?
     # Will drop block sizes that might lead to a stack overflow
@@ -62,63 +94,105 @@ def autotune(operator, arguments, tunable):
     stack_shapes = [i.shape for i in functions if i.is_TensorFunction and i._mem_stack]
     stack_space = sum(reduce(mul, i, 1) for i in stack_shapes)*operator.dtype().itemsize
 
-    # Note: there is only a single loop over 'blocksize' because only
-    # square blocks are tested
-    timings = OrderedDict()
-    for bs in blocksizes:
-        illegal = False
-        for k, v in at_arguments.items():
-            if k in bs:
-                val = bs[k]
-                handle = at_arguments.get(mapper[k].original_dim.symbolic_size.name)
-                if val <= mapper[k].iteration.end(handle):
-                    at_arguments[k] = val
-                else:
-                    # Block size cannot be larger than actual dimension
-                    illegal = True
-                    break
-        if illegal:
-            continue
-
-        # Make sure we remain within stack bounds, otherwise skip block size
-        dim_sizes = {}
-        for k, v in at_arguments.items():
-            if k in bs:
-                dim_sizes[mapper[k].argument.symbolic_size] = bs[k]
-            elif k in dim_mapper:
-                dim_sizes[dim_mapper[k].symbolic_size] = v
-        try:
-            bs_stack_space = stack_space.xreplace(dim_sizes)
-        except AttributeError:
-            bs_stack_space = stack_space
-        try:
-            if int(bs_stack_space) > options['at_stack_limit']:
-                continue
-        except TypeError:
-            # We should never get here
-            info_at("Couldn't determine stack size, skipping block size %s" % str(bs))
-            continue
+    # Attempted block sizes
+    if not mapper:
+        blocksizes = [OrderedDict()]
+    elif operator.config['autotuning'] == 'aggressive':
+        blocksizes = rectangular_attempts(mapper)
+    else:
+        blocksizes = [OrderedDict([(i, v) for i in mapper])
+                      for v in options['at_blocksize']]
+    blocksizes = [bs for bs in blocksizes
+                  if legal_attempt(bs, mapper, at_arguments, stack_space)]
+    if operator.config['autotuning'] == 'aggressive':
+        # Only time the most promising block sizes, according to a cache model
+        blocksizes = rank_attempts(blocksizes, operator, mapper, at_arguments,
+                                   stack_space)[:options['at_max_attempts']]
+
+    def run(bs, what='Block shape'):
+        at_arguments.update(bs)
 
         # Use AT-specific profiler structs
         at_arguments[operator.profiler.varname] = operator.profiler.setup()
 
         operator.cfunction(*list(at_arguments.values()))
         elapsed = sum(operator.profiler.timings.values())
-        timings[tuple(bs.items())] = elapsed
-        info_at("Block shape <%s> took %f (s) in %d time steps" %
-                (','.join('%d' % i for i in bs.values()), elapsed, timesteps))
+        info_at("%s <%s> took %f (s) in %d time steps" %
+                (what, ','.join('%d' % i for i in bs.values()), elapsed, timesteps))
+        return elapsed
+
+    # Successive halving: in each round, the surviving block sizes are run for
+    # twice as many times as in the previous round, and only the fastest half
+    # survive. In 'basic' mode, each block size is run exactly once. The runs
+    # of a block size are aborted as soon as they are slower than the fastest
+    # block size in the same round
+    timings = OrderedDict()
+    nruns = 1
+    while blocksizes:
+        timings = OrderedDict()
+        for bs in blocksizes:
+            elapsed = 0.
+            for i in range(nruns):
+                elapsed += run(bs)
+                if timings and elapsed > min(timings.values()):
+                    break
+            # Aborted runs are extrapolated to the full number of runs
+            timings[tuple(bs.items())] = elapsed*nruns/(i + 1)
+        if operator.config['autotuning'] != 'aggressive' or len(blocksizes) <= 2:
+            break
+        ranked = sorted(timings, key=timings.get)[:(len(blocksizes) + 1) // 2]
+        blocksizes = [OrderedDict(i) for i in ranked]
+        nruns *= 2
 
     try:
         best = dict(min(timings, key=timings.get))
-        info("Auto-tuned block shape: %s" % best)
+        if mapper:
+            info("Auto-tuned block shape: %s" % best)
     except ValueError:
         info("Auto-tuning request, but couldn't find legal block sizes")
         return arguments
 
-    # Build the new argument list
+    # Coordinate search of the time tile depth, with the best block shape
+    if tiling_mapper:
+        at_arguments.update(best)
+        timings = OrderedDict()
+        for i in options['at_timetile']:
+            attempt = OrderedDict([(k, i) for k in tiling_mapper])
+            timings[tuple(attempt.items())] = run(attempt, 'Time tile depth')
+        best.update(min(timings, key=timings.get))
+        info("Auto-tuned time tile depth: %s" %
+             OrderedDict([(i, best[i]) for i in tiling_mapper]))
+
+    # Coordinate search of the OpenMP parameters, with the best block shape
+    # (and time tile depth): first the loop schedule, then the number of threads
+    if omp_mapper:
+        at_arguments.update(best)
+        nthreads, kind, chunk = omp_mapper
+        schedules = [OrderedDict([(kind, i), (chunk, j)])
+                     for i, j in options['at_schedule']]
+        threads = [OrderedDict([(nthreads, i)]) for i in nthreads_attempts()]
+        for attempts in [schedules, threads]:
+            timings = OrderedDict()
+            for i in attempts:
+                timings[tuple(i.items())] = run(i, 'OpenMP parameters')
+            at_arguments.update(min(timings, key=timings.get))
+            best.update(min(timings, key=timings.get))
+        info("Auto-tuned OpenMP parameters: %s" %
+             OrderedDict([(i, best[i]) for i in omp_mapper]))
+
+    db_store(key, best)
+
+    return tuned_arguments(operator, arguments, best)
+
+
+def tuned_arguments(operator, arguments, best):
+    """
+    Build a new argument list in which the tunable arguments are given the
+    values in ``best``.
+    """
     tuned = OrderedDict()
     for k, v in arguments.items():
-        tuned[k] = best[k] if k in mapper else v
+        tuned[k] = best.get(k, v)
 
     # Reset the profiling struct
     assert operator.profiler.varname in tuned
@@ -127,33 +201,211 @@ def autotune(operator, arguments, tunable):
     return tuned
 
 
-def more_heuristic_attempts(blocksizes):
-    handle = []
+def db_file():
+    """Return the path to the auto-tuning database, which lives alongside the
+    JIT-compiled shared objects."""
+    return path.join(get_jit_dir(), 'autotuning.json')
 
-    for blocksize in blocksizes[:3]:
-        for i in blocksizes:
-            handle.append(OrderedDict(list(blocksize.items())[:-1] +
-                                      [list(i.items())[-1]]))
 
-    for blocksize in list(blocksizes):
-        ncombs = len(blocksize)
-        for i in range(ncombs):
-            for j in combinations(blocksize, i+1):
-                item = [(k, blocksize[k]*2 if k in j else v)
-                        for k, v in blocksize.items()]
-                handle.append(OrderedDict(item))
+def db_key(operator, arguments, mapper, sequentials):
+    """
+    Return a key identifying an auto-tuning problem, or None if the auto-tuning
+    database is disabled. The key is made of the name of the JIT-compiled
+    shared object (a hash of the C code and of the toolchain), the size of the
+    non-sequential dimensions, the number of threads and the auto-tuning mode.
+    The settings are those the Operator was built with.
+    """
+    config = operator.config
+    if not config['autotuning_db']:
+        return None
 
-    unique = []
-    for i in blocksizes + handle:
-        if i not in unique:
-            unique.append(i)
+    # Ensure the shared object has been loaded
+    operator.cfunction
+    sequentials = [i.dim.symbolic_size.name for i in sequentials] +\
+        [i.dim.parent.symbolic_size.name for i in sequentials if i.dim.is_Buffered]
+    sizes = [(k, int(v)) for k, v in arguments.items()
+             if k.endswith('_size') and k not in mapper and k not in sequentials]
+    nthreads = get_nthreads() if config['openmp'] else 1
+    return str((path.basename(operator._lib.name), sizes, nthreads,
+                config['autotuning']))
 
-    return unique
+
+def db_load():
+    """Return the content of the auto-tuning database, as a dict."""
+    try:
+        with open(db_file()) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        # No database yet, or unreadable
+        return {}
+
+
+def db_lookup(key, mapper):
+    """
+    Return the best block shape previously found for ``key``, or None if
+    ``key`` is not in the database or ``configuration['autotuning_retune']``
+    is set.
+    """
+    if key is None or configuration['autotuning_retune']:
+        return None
+    best = db_load().get(key)
+    if best is None or set(best) != set(mapper):
+        return None
+    return best
+
+
+def db_store(key, best):
+    """
+    Store the best block shape ``best`` found for ``key`` in the database. The
+    database is written to a process-private temporary file, which is then
+    atomically renamed, so that concurrent processes never observe a partially
+    written database.
+    """
+    if key is None:
+        return
+    db = db_load()
+    db[key] = best
+    filename = db_file()
+    tmp_filename = "%s-%s" % (filename, uuid4().hex)
+    with open(tmp_filename, 'w') as f:
+        json.dump(db, f, indent=1, sort_keys=True)
+    rename(tmp_filename, filename)
+
+
+def rectangular_attempts(mapper):
+    """
+    Return all block sizes obtained by picking, independently for each blocked
+    dimension, a value in ``options['at_blocksize']``.
+    """
+    return [OrderedDict(zip(mapper, i))
+            for i in product(options['at_blocksize'], repeat=len(mapper))]
+
+
+def legal_attempt(bs, mapper, arguments, stack_space):
+    """
+    Return True if no block in ``bs`` is larger than the dimension it tiles and
+    if the temporaries allocated on the stack fit within
+    ``options['at_stack_limit']``, False otherwise.
+    """
+    for k, v in bs.items():
+        handle = arguments.get(mapper[k].original_dim.symbolic_size.name)
+        if v > mapper[k].iteration.end(handle):
+            # Block size cannot be larger than actual dimension
+            return False
+
+    try:
+        return int(evaluate_space(stack_space, bs, arguments)) <=\
+            options['at_stack_limit']
+    except TypeError:
+        # We should never get here
+        info_at("Couldn't determine stack size, skipping block size %s" % str(bs))
+        return False
+
+
+def rank_attempts(blocksizes, operator, mapper, arguments, stack_space):
+    """
+    Sort ``blocksizes`` from the most to the least promising, according to an
+    analytical model of the working set of a block: the number of grid points
+    in a block times the bytes moved per grid point, plus the temporaries on
+    the stack. Block sizes whose working set fits in ``options['at_cache_size']``
+    come first, largest working set first (more reuse, less loop overhead);
+    then come the others, smallest working set first.
+    """
+    blocked = OrderedDict([(i.original_dim, k) for k, i in mapper.items()])
+    dimensions = set(i.dim for i in FindNodes(Iteration).visit(operator.body)
+                     if not i.is_Sequential)
+    dimensions -= set(i.argument for i in mapper.values())
+
+    exprs = FindNodes(Expression).visit(operator.body + operator.elemental_functions)
+    nbytes = estimate_memory([i.expr for i in exprs])*operator.dtype().itemsize
+
+    cache_size = options['at_cache_size'] or get_cache_size()
+
+    def working_set(bs):
+        points = 1
+        for d in dimensions:
+            if d in blocked:
+                points *= bs[blocked[d]]
+            elif d.is_Fixed:
+                points *= d.size
+            else:
+                points *= arguments.get(d.symbolic_size.name, 1)
+        return points*nbytes + int(evaluate_space(stack_space, bs, arguments))
+
+    def key(bs):
+        ws = working_set(bs)
+        return (0, -ws) if ws <= cache_size else (1, ws)
+
+    return sorted(blocksizes, key=key)
+
+
+def evaluate_space(space, bs, arguments):
+    """Evaluate a symbolic amount of memory ``space`` for the block size ``bs``."""
+    subs = {Symbol(k): bs.get(k, v) for k, v in arguments.items()
+            if k in bs or isinstance(v, int)}
+    try:
+        return space.xreplace(subs)
+    except AttributeError:
+        return space
+
+
+def get_nthreads():
+    """Return the number of threads an OpenMP parallel region would use by
+    default."""
+    return int(environ.get('OMP_NUM_THREADS', cpu_count()))
+
+
+def nthreads_attempts():
+    """
+    Return the attempted numbers of threads, obtained by repeatedly halving
+    the default number of threads, unless ``options['at_nthreads']`` is set.
+    """
+    if options['at_nthreads'] is not None:
+        return options['at_nthreads']
+    attempts = [get_nthreads()]
+    while attempts[-1] > 1:
+        attempts.append(attempts[-1] // 2)
+    return attempts
+
+
+def get_cache_size():
+    """
+    Return the size in bytes of the per-core (L2) cache of the current
+    architecture, or 1 MB if it cannot be determined.
+    """
+    if get_cache_size.size is None:
+        size = parse_cache_size(cpuinfo.get_cpu_info().get('l2_cache_size'))
+        get_cache_size.size = size or 1024**2
+    return get_cache_size.size
+get_cache_size.size = None  # noqa
+
+
+def parse_cache_size(size):
+    """
+    Return the size in bytes of a cache, as reported by cpuinfo: either an
+    integer, in bytes, or a string with a unit (e.g., ``'256 KB'``). Return
+    None if ``size`` cannot be parsed.
+    """
+    if isinstance(size, Integral):
+        return int(size)
+    try:
+        value, unit = re.match(r'\s*([\d.]+)\s*([KMG]?)', size).groups()
+    except (AttributeError, TypeError):
+        return None
+    scale = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3}[unit]
+    return int(float(value)*scale)
 
 
 options = {
     'at_squeezer': 5,
     'at_blocksize': [8, 16, 24, 32, 40, 64, 128],
-    'at_stack_limit': resource.getrlimit(resource.RLIMIT_STACK)[0] / 4
+    # Attempted time tile depths, in timesteps
+    'at_timetile': [1, 2, 4, 8],
+    'at_stack_limit': resource.getrlimit(resource.RLIMIT_STACK)[0] / 4,
+    'at_max_attempts': 8,
+    'at_cache_size': None,
+    # Loop schedules as (omp_sched_t, chunk size): static, dynamic, guided
+    'at_schedule': [(1, 0), (2, 1), (2, 8), (3, 0)],
+    'at_nthreads': None
 }
 """Autotuning options."""
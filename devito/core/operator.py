@@ -5,6 +5,7 @@ from devito.cgen_utils import printmark
 from devito.dle import filter_iterations, retrieve_iteration_tree
 from devito.nodes import List
 from devito.operator import OperatorRunnable
+from devito.parameters import configuration
 from devito.visitors import Transformer
 from devito.tools import flatten
 
@@ -16,10 +17,14 @@ class OperatorCore(OperatorRunnable):
     def _autotune(self, arguments):
         """
         Use auto-tuning on this Operator to determine empirically the
-        best block sizes when loop blocking is in use.
+        best block sizes when loop blocking is in use, the best time tile
+        depth when time tiling is in use, and the best OpenMP parameters when
+        OpenMP is in use.
         """
-        if self.dle_flags.get('blocking', False):
-            return autotune(self, arguments, self.dle_arguments)
+        if any(self.dle_flags.get(i, False) for i in ['blocking', 'tiling', 'openmp']):
+            # Auto-tuning runs use the Profiler's own timers, hence are serialized
+            with self._lock:
+                return autotune(self, arguments, self.dle_arguments)
         else:
             return arguments
 
@@ -35,7 +40,8 @@ class OperatorDebug(OperatorCore):
 
         # Minimize the trip count of the sequential loops
         iterations = set(flatten(retrieve_iteration_tree(self.body)))
-        mapper = {i: i._rebuild(limits=(max(i.offsets) + 2))
+        mapper = {i: i._rebuild(limits=(max(i.offsets) + 2)) if i.start() is not None
+                  else i._rebuild(limits=[i.limits[0], i.limits[0] + 2, i.limits[2]])
                   for i in iterations if i.is_Sequential}
         self.body = Transformer(mapper).visit(self.body)
 
@@ -52,6 +58,15 @@ class Operator(object):
 
     def __new__(cls, *args, **kwargs):
         cls = OperatorDebug if kwargs.pop('debug', False) else OperatorCore
-        obj = cls.__new__(cls, *args, **kwargs)
-        obj.__init__(*args, **kwargs)
+        # Both the lookup and the construction use the same configuration
+        kwargs['config'] = config = kwargs.get('config') or configuration.snapshot()
+        key = cls._cache_key(*args, **kwargs)
+        obj = cls._cache_get(key, *args, **kwargs)
+        if obj is None:
+            obj = cls.__new__(cls, *args, **kwargs)
+            obj.__init__(*args, **kwargs)
+            obj._cache_put(key)
+        if config['jit_async']:
+            # Overlap JIT compilation with whatever precedes the first apply()
+            obj.compile_async()
         return obj
@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+
+import numpy as np
+from sympy import Eq
+
+from devito.dimension import time
+from devito.interfaces import DenseData
+from devito.tools import as_tuple
+
+__all__ = ['FrequencyData']
+
+"""
+On-the-fly discrete Fourier transform (DFT) of time-varying fields.
+
+Rather than storing the whole time history of a field and transforming it
+afterwards, the Fourier coefficients at a few frequencies are accumulated at
+each timestep of the computation producing the field: ::
+
+    U(f) = sum_n u(n*dt) * exp(-2*pi*i*f*n*dt) * dt
+
+The complex exponentials, or "twiddle factors", only depend on the timestep
+and are thus precomputed, so that each accumulation is a multiply-add per
+grid point. The memory footprint is ``2*nfreq`` fields, regardless of the
+number of timesteps.
+"""
+
+
+class FrequencyData(object):
+
+    """
+    The Fourier coefficients of a time-varying field at a set of frequencies,
+    accumulated within the time loop of an :class:`Operator`.
+
+    :param name: Name prefix of the data objects.
+    :param shape: Shape of the (spatial) field being transformed.
+    :param frequencies: The frequencies, in the inverse of the unit of ``dt``.
+    :param nt: Number of timesteps of the transformed field.
+    :param dt: The timestep.
+    :param dimensions: (Optional) The (spatial) dimensions of the field.
+    :param dtype: (Optional) Data type of the accumulators.
+
+    The real and imaginary parts of the coefficients at the i-th frequency
+    are the :class:`DenseData` objects ``real[i]`` and ``imag[i]``; the
+    expressions updating them are given by :meth:`accumulate`. For example: ::
+
+        freq = FrequencyData(name='uf', shape=u.shape[1:], frequencies=[5., 10.],
+                             nt=nt, dt=dt)
+        op = Operator([Eq(u.forward, stencil)] + freq.accumulate(u))
+        op.apply(...)
+        freq.data  # Complex array of shape (2,) + u.shape[1:]
+    """
+
+    def __init__(self, name, shape, frequencies, nt, dt, dimensions=None,
+                 dtype=np.float32):
+        self.name = name
+        self.frequencies = as_tuple(frequencies)
+        self.nt = nt
+        self.dt = dt
+
+        kwargs = {'shape': shape, 'dtype': dtype}
+        if dimensions is not None:
+            kwargs['dimensions'] = dimensions
+        self.real = [DenseData(name='%s_re%d' % (name, i), **kwargs)
+                     for i in range(self.nfreq)]
+        self.imag = [DenseData(name='%s_im%d' % (name, i), **kwargs)
+                     for i in range(self.nfreq)]
+
+        # Precomputed twiddle factors, scaled by the timestep
+        phase = 2*np.pi*np.outer(self.frequencies, np.arange(nt)*dt)
+        self.cos = [DenseData(name='%s_cos%d' % (name, i), shape=(nt,),
+                              dimensions=[time], dtype=dtype)
+                    for i in range(self.nfreq)]
+        self.sin = [DenseData(name='%s_sin%d' % (name, i), shape=(nt,),
+                              dimensions=[time], dtype=dtype)
+                    for i in range(self.nfreq)]
+        for i in range(self.nfreq):
+            self.cos[i].data[:] = np.cos(phase[i])*dt
+            self.sin[i].data[:] = -np.sin(phase[i])*dt
+
+    @property
+    def nfreq(self):
+        """The number of frequencies."""
+        return len(self.frequencies)
+
+    @property
+    def data(self):
+        """The Fourier coefficients, as a complex array of shape
+        ``(nfreq,) + shape``."""
+        return np.array([r.data + 1j*i.data for r, i in zip(self.real, self.imag)])
+
+    def accumulate(self, expr):
+        """
+        Return the expressions adding the contribution of ``expr`` at the
+        current timestep to the Fourier coefficients, e.g.
+        ``uf_re0[x, y] = uf_re0[x, y] + uf_cos0[time]*u[t, x, y]``.
+
+        :param expr: The field, or an expression of fields, being transformed.
+                     Its value at the timestep ``time`` must be available at
+                     that timestep (e.g., ``u`` rather than ``u.forward``).
+        """
+        eqs = []
+        for r, i, c, s in zip(self.real, self.imag, self.cos, self.sin):
+            eqs.append(Eq(r, r + c*expr))
+            eqs.append(Eq(i, i + s*expr))
+        return eqs
+
+    def reset(self):
+        """Zero the Fourier coefficients, e.g. before a new run."""
+        for i in self.real + self.imag:
+            i.data[:] = 0.
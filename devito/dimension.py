@@ -1,12 +1,14 @@
 from sympy import Number, Symbol
 from devito.arguments import DimensionArgProvider, FixedDimensionArgProvider
 
-__all__ = ['Dimension', 'FixedDimension', 'x', 'y', 'z', 't', 'p', 'd', 'time']
+__all__ = ['Dimension', 'FixedDimension', 'x', 'y', 'z', 't', 'p', 'd', 'time',
+           'shot']
 
 
 class Dimension(Symbol, DimensionArgProvider):
 
     is_Buffered = False
+    is_Subsampled = False
     is_Lowered = False
     is_Fixed = False
 
@@ -90,6 +92,35 @@ class BufferedDimension(Dimension):
         return self.parent.spacing
 
 
+class SubsampledDimension(Dimension):
+
+    is_Subsampled = True
+
+    """
+    Dimension symbol that implies strided iteration along a parent dimension.
+    The i-th point of a SubsampledDimension is the (i*factor)-th point of its
+    parent; the parent points in between are skipped.
+
+    :param parent: Parent dimension over which to loop in strided fashion.
+    :param factor: The stride, in number of points of the parent dimension.
+    """
+
+    def __new__(cls, name, parent, factor, **kwargs):
+        newobj = Symbol.__new__(cls, name)
+        assert isinstance(parent, Dimension)
+        newobj.parent = parent
+        newobj.factor = factor
+        return newobj
+
+    @property
+    def reverse(self):
+        return self.parent.reverse
+
+    @property
+    def spacing(self):
+        return self.parent.spacing
+
+
 class LoweredDimension(Dimension):
 
     is_Lowered = True
@@ -133,3 +164,6 @@ z = Dimension('z', spacing=Symbol('h_z'))
 
 d = Dimension('d')
 p = Dimension('p')
+
+# Default dimension for batches of independent shots, see TimeData and PointData
+shot = Dimension('shot')
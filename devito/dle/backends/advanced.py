@@ -8,23 +8,25 @@ from itertools import combinations
 import cgen
 import numpy as np
 import psutil
+from sympy import Max, Min, Symbol
 
 from devito.cgen_utils import ccode
 from devito.dimension import Dimension
-from devito.dle import (compose_nodes, copy_arrays, filter_iterations,
-                        fold_blockable_tree, unfold_blocked_tree,
+from devito.dle import (analyze_time_tiling, compose_nodes, copy_arrays,
+                        filter_iterations, fold_blockable_tree, unfold_blocked_tree,
                         retrieve_iteration_tree)
-from devito.dle.backends import (BasicRewriter, BlockingArg, dle_pass, omplang,
-                                 simdinfo, get_simd_flag, get_simd_items)
+from devito.dle.backends import (BasicRewriter, BlockingArg, OmpArg, TilingArg,
+                                 dle_pass, omplang, simdinfo, get_simd_flag,
+                                 get_simd_items)
 from devito.dse import promote_scalar_expressions
 from devito.exceptions import DLEException
 from devito.interfaces import TensorFunction
 from devito.logger import dle_warning
 from devito.nodes import (Block, Denormals, Expression, Iteration, List,
-                          PARALLEL, ELEMENTAL, REMAINDER, tagger)
-from devito.tools import as_tuple, grouper, roundm
+                          PARALLEL, ELEMENTAL, REMAINDER, TIME_TILED, tagger)
+from devito.tools import as_tuple, filter_ordered, grouper, roundm
 from devito.visitors import (FindNodes, FindSymbols, IsPerfectIteration,
-                             SubstituteExpression, Transformer)
+                             NestedTransformer, SubstituteExpression, Transformer)
 
 
 class DevitoRewriter(BasicRewriter):
@@ -32,6 +34,8 @@ class DevitoRewriter(BasicRewriter):
     def _pipeline(self, state):
         self._avoid_denormals(state)
         self._loop_fission(state)
+        if self.params['blocktime']:
+            self._time_tiling(state)
         self._loop_blocking(state)
         self._simdize(state)
         if self.params['openmp'] is True:
@@ -137,7 +141,8 @@ class DevitoRewriter(BasicRewriter):
                 iterations = [i for i in tree if i.is_Parallel]
                 if exclude_innermost:
                     iterations = [i for i in iterations if not i.is_Vectorizable]
-                if len(iterations) <= 1:
+                if len(iterations) <= 1 or any(i.is_TimeTiled for i in tree):
+                    # Nothing to block, or already blocked by _time_tiling
                     continue
                 root = iterations[0]
                 if not IsPerfectIteration().visit(root):
@@ -159,8 +164,11 @@ class DevitoRewriter(BasicRewriter):
                 intra_blocks = []
                 remainders = []
                 for i in iterations:
-                    # Build Iteration over blocks
-                    dim = blocked.setdefault(i, Dimension("%s_block" % i.dim.name))
+                    # Build Iteration over blocks. Iterations over the same Dimension,
+                    # in different Iteration trees, share the block Dimension
+                    handle = [v for k, v in blocked.items() if k.dim == i.dim]
+                    dim = handle[0] if handle else\
+                        blocked.setdefault(i, Dimension("%s_block" % i.dim.name))
                     block_size = dim.symbolic_size
                     iter_size = i.dim.symbolic_size
                     start = i.limits[0] - i.offsets[0]
@@ -246,6 +254,146 @@ class DevitoRewriter(BasicRewriter):
 
         return {'nodes': processed, 'arguments': arguments, 'flags': 'blocking'}
 
+    @dle_pass
+    def _time_tiling(self, state, **kwargs):
+        """
+        Apply time tiling (also known as temporal blocking) to the sequential
+        :class:`Iteration` objects (e.g., a timestepping loop) embedding parallel
+        Iteration trees. Given: ::
+
+            for t
+              for x
+                for y
+                  u[t+1,x,y] = f(u[t,x-1,y], u[t,x+1,y], ...)
+
+        ``blocktime`` consecutive timesteps are executed, one after the other,
+        over the same block of the iteration space, before moving to the next
+        block. Blocks are skewed by the maximum distance of a read, so that they
+        only depend on points computed by previous blocks (a "wavefront"): ::
+
+            for t_tile = t_start to t_end, t_tile_size
+              for x_tile = x_start to x_end + s*(t_tile_size-1), x_tile_size
+                for t = t_tile to min(t_tile + t_tile_size, t_end)
+                  for x = max(x_tile - s*(t-t_tile), x_start) to
+                          min(x_tile + x_tile_size - s*(t-t_tile), x_end)
+                    for y
+                      u[t+1,x,y] = ...
+
+        This increases the temporal locality of time-marching schemes whose
+        working set does not fit in cache. Sparse point operations (e.g.,
+        injection and interpolation) are executed in the tile containing the
+        grid points they write or read. As with loop blocking, the innermost
+        dimension is not tiled unless ``blockinner`` is set, while ``blockshape``
+        may be used to specify the block shape.
+        """
+        exclude_innermost = not self.params.get('blockinner', False)
+        depth = self.params.get('blocktime')
+        if isinstance(depth, bool) or not isinstance(depth, int) or depth <= 0:
+            depth = 4
+
+        tiled = OrderedDict()
+        tilings = OrderedDict()
+        processed = []
+        for node in state.nodes:
+            mapper = {}
+            roots = filter_ordered([i[0] for i in retrieve_iteration_tree(node)
+                                    if i[0].is_Sequential])
+            for root in roots:
+                handle = analyze_time_tiling(root, exclude_innermost)
+                if handle is None:
+                    continue
+                skew, iterations, guards = handle
+
+                # The depth of the tiles is a runtime argument
+                name = '%s_tile_size' % root.index
+                tilings.setdefault(name, TilingArg(name, depth))
+                size = Symbol(name)
+
+                # Iteration over the time tiles
+                tile = Symbol('%s_tile' % root.index)
+                outer = root._rebuild([], index=tile.name, uindices=None,
+                                      limits=[root.limits[0], root.limits[1], size])
+
+                # Iteration within a time tile. The tiles are traversed in the
+                # same direction as the original Iteration
+                start, finish = root.bounds_symbolic
+                if root.reverse:
+                    limits = [Max(tile - size + 1, start), tile + 1, 1]
+                    steps = tile - Symbol(root.index)
+                else:
+                    limits = [tile, Min(tile + size, finish), 1]
+                    steps = Symbol(root.index) - tile
+                inner = root._rebuild(limits=limits, offsets=None,
+                                      properties=root.properties + (TIME_TILED,))
+
+                # Iterations over the (skewed) space tiles
+                bounds = OrderedDict()
+                tiles = OrderedDict()
+                for d, s in skew.items():
+                    handle = [i for i in iterations if i.dim == d]
+                    lower = Min(*[i.bounds_symbolic[0] for i in handle])
+                    upper = Max(*[i.bounds_symbolic[1] for i in handle])
+                    bounds[d] = (lower, upper)
+                    dim = tiled.setdefault(d, (Dimension('%s_tile' % d.name),
+                                               handle[0]))[0]
+                    tiles[d] = Iteration([], dim, [lower, upper + s*(size - 1),
+                                                   dim.symbolic_size],
+                                         properties=TIME_TILED)
+
+                # Iterations within a space tile, shifted back at each timestep
+                subs = {root: inner}
+                for i in iterations:
+                    dim, s = tiles[i.dim].dim, skew[i.dim]
+                    start, finish = i.bounds_symbolic
+                    limits = [Max(dim - s*steps, start),
+                              Min(dim + dim.symbolic_size - s*steps, finish), 1]
+                    subs[i] = i._rebuild(limits=limits, offsets=None,
+                                         properties=i.properties + (TIME_TILED,))
+
+                # Sparse point operations are guarded by their tile
+                for e, v in guards.items():
+                    condition = []
+                    for d, index in v.items():
+                        dim, s = tiles[d].dim, skew[d]
+                        index = ccode(Min(Max(index, bounds[d][0]), bounds[d][1] - 1))
+                        condition.append('%s <= %s && %s < %s' %
+                                         (ccode(dim - s*steps), index, index,
+                                          ccode(dim + dim.symbolic_size - s*steps)))
+                    subs[e] = Block(header=cgen.Line('if (%s)' % ' && '.join(condition)),
+                                    body=e)
+
+                mapper[root] = compose_nodes([outer] + list(tiles.values()) +
+                                             [NestedTransformer(subs).visit(root)])
+
+            processed.append(Transformer(mapper).visit(node))
+
+        if not tiled:
+            return {'nodes': processed}
+
+        # Determine the block shape, as in _loop_blocking
+        blockshape = self.params.get('blockshape')
+        if not blockshape:
+            # Within a time tile, each space tile is shifted back by up to
+            # ``skew*(depth - 1)`` points (6, with the default depth of 4 and
+            # a skew of 2, i.e. a space order of 4), which are computed in a
+            # partially filled iteration. Blocks of 32 points keep this
+            # fraction below 20%, which blocks of 8 points, as used by
+            # _loop_blocking, would not. Dimensions no larger than that are
+            # not split, the block spanning the whole Dimension
+            def heuristic(dim_size, size=32):
+                return size if dim_size > size else dim_size
+            blockshape = [heuristic]*len(tiled)
+        blockshape = as_tuple(blockshape)
+        blockshape = [blockshape[i] if i < len(blockshape) else None
+                      for i in range(len(tiled))]
+
+        # Track any additional arguments required to execute /state.nodes/
+        arguments = [BlockingArg(k, v, i)
+                     for (k, v), i in zip(tiled.values(), blockshape)]
+        arguments.extend(tilings.values())
+
+        return {'nodes': processed, 'arguments': arguments, 'flags': 'tiling'}
+
     @dle_pass
     def _simdize(self, state, **kwargs):
         """
@@ -283,10 +431,16 @@ class DevitoRewriter(BasicRewriter):
     @dle_pass
     def _ompize(self, state, **kwargs):
         """
-        Add OpenMP pragmas to the Iteration/Expression tree to emit parallel code
+        Add OpenMP pragmas to the Iteration/Expression tree to emit parallel code.
+
+        The number of threads and the loop schedule are runtime arguments of the
+        kernel (see ``omp_params``), so that they can be changed at each run
+        (e.g., by the auto-tuner) without recompiling.
         """
+        nthreads, kind, chunk = [OmpArg(k, v) for k, v in self.omp_params.items()]
 
         processed = []
+        parallel_regions = False
         for node in state.nodes:
 
             # Reset denormals flag each time a parallel region is entered
@@ -312,6 +466,7 @@ class DevitoRewriter(BasicRewriter):
                 was_tagged = is_tagged
 
             # Handle parallelizable loops
+            parallel_regions |= len(groups) > 0
             for group in groups.values():
                 private = []
                 for root, tree in group.items():
@@ -335,17 +490,41 @@ class DevitoRewriter(BasicRewriter):
                 private = sorted(set([i.name for i in private]))
                 private = ('private(%s)' % ','.join(private)) if private else ''
                 rebuilt = [v for k, v in mapper.items() if k in group]
-                par_region = Block(header=omplang['par-region'](private),
-                                   body=denormals + rebuilt)
+                header = (omplang['set-schedule'](kind.argument.name,
+                                                  chunk.argument.name),
+                          omplang['par-region-nthreads'](nthreads.argument.name,
+                                                         private))
+                par_region = Block(header=header, body=denormals + rebuilt)
                 for k, v in list(mapper.items()):
                     if isinstance(v, Iteration):
                         mapper[k] = None if v.is_Remainder else par_region
 
+            # Handle loops that are parallelizable through atomic updates, e.g.
+            # the injection of sparse points, as points may share grid cells.
+            # These are executed in parallel only if there are enough points
+            for tree in retrieve_iteration_tree(node):
+                candidates = [i for i in tree if i.is_ParallelAtomic]
+                if not candidates or any(i in mapper for i in tree):
+                    continue
+                root = candidates[0]
+                atomics = {i: List(header=omplang['atomic'], body=i)
+                           for i in FindNodes(Expression).visit(root) if i.is_tensor}
+                condition = '%s >= %d' % (ccode(root.extent_symbolic),
+                                          self.thresholds['min_atomic'])
+                parallel = omplang['par-for-nthreads-if'](nthreads.argument.name,
+                                                          condition)
+                mapper[root] = Transformer(atomics).visit(root)
+                mapper[root] = mapper[root]._rebuild(pragmas=root.pragmas + (parallel,))
+                parallel_regions = True
+
             handle = Transformer(mapper).visit(node)
             if handle is not None:
                 processed.append(handle)
 
-        return {'nodes': processed}
+        if not parallel_regions:
+            return {'nodes': processed}
+        return {'nodes': processed, 'arguments': (nthreads, kind, chunk),
+                'includes': 'omp.h', 'flags': 'openmp'}
 
     @dle_pass
     def _minimize_remainders(self, state, **kwargs):
@@ -424,6 +603,8 @@ class DevitoRewriterSafeMath(DevitoRewriter):
     """
 
     def _pipeline(self, state):
+        if self.params['blocktime']:
+            self._time_tiling(state)
         self._loop_blocking(state)
         self._simdize(state)
         if self.params['openmp'] is True:
@@ -438,6 +619,8 @@ class DevitoSpeculativeRewriter(DevitoRewriter):
         self._avoid_denormals(state)
         self._loop_fission(state)
         self._padding(state)
+        if self.params['blocktime']:
+            self._time_tiling(state)
         self._loop_blocking(state)
         self._simdize(state)
         self._nontemporal_stores(state)
@@ -543,6 +726,7 @@ class DevitoCustomRewriter(DevitoSpeculativeRewriter):
 
     passes_mapper = {
         'blocking': DevitoSpeculativeRewriter._loop_blocking,
+        'tiling': DevitoSpeculativeRewriter._time_tiling,
         'openmp': DevitoSpeculativeRewriter._ompize,
         'simd': DevitoSpeculativeRewriter._simdize,
         'fission': DevitoSpeculativeRewriter._loop_fission,
@@ -4,14 +4,18 @@ import abc
 from collections import OrderedDict, defaultdict
 from time import time
 
-from devito.dse import as_symbol, retrieve_terminals
+import numpy as np
+
+from devito.dse import as_symbol, retrieve_indexed, retrieve_terminals
+from devito.interfaces import Parameter
 from devito.logger import dle
-from devito.nodes import Iteration, SEQUENTIAL, PARALLEL, VECTOR
+from devito.nodes import Iteration, SEQUENTIAL, PARALLEL, PARALLEL_ATOMIC, VECTOR
 from devito.tools import as_tuple
 from devito.visitors import FindSections, IsPerfectIteration, NestedTransformer
 
 
-__all__ = ['AbstractRewriter', 'Arg', 'BlockingArg', 'State', 'dle_pass']
+__all__ = ['AbstractRewriter', 'Arg', 'BlockingArg', 'OmpArg', 'TilingArg', 'State',
+           'dle_pass']
 
 
 def dle_pass(func):
@@ -83,6 +87,38 @@ class BlockingArg(Arg):
         return self.iteration.dim
 
 
+class OmpArg(Arg):
+
+    def __init__(self, name, value):
+        """
+        Represent an OpenMP parameter (e.g., number of threads, loop schedule)
+        introduced in the kernel by Rewriter._ompize.
+
+        :param name: The name of the kernel argument.
+        :param value: The default value of the argument.
+        """
+        super(OmpArg, self).__init__(Parameter(name, np.int32, value), value)
+
+    def __repr__(self):
+        return "DLE-OmpArg[%s,default=%s]" % (self.argument, self.value)
+
+
+class TilingArg(Arg):
+
+    def __init__(self, name, value):
+        """
+        Represent the depth of the time tiles, that is the number of timesteps
+        per tile, introduced in the kernel by Rewriter._time_tiling.
+
+        :param name: The name of the kernel argument.
+        :param value: The default value of the argument.
+        """
+        super(TilingArg, self).__init__(Parameter(name, np.int32, value), value)
+
+    def __repr__(self):
+        return "DLE-TilingArg[%s,default=%s]" % (self.argument, self.value)
+
+
 class AbstractRewriter(object):
     """
     Transform Iteration/Expression trees to generate high performance C.
@@ -98,10 +134,22 @@ class AbstractRewriter(object):
     """
     thresholds = {
         'collapse': 32,  # Available physical cores
+        'min_atomic': 64,  # Sparse points, checked at runtime
         'max_fission': 800,  # Statements
         'min_fission': 20  # Statements
     }
 
+    """
+    Default values of the OpenMP runtime parameters of a kernel: number of
+    threads (0 stands for the OpenMP default), loop schedule (an ``omp_sched_t``,
+    1 stands for static) and chunk size (0 stands for the default chunk size).
+    """
+    omp_params = OrderedDict([
+        ('nthreads', 0),
+        ('sched_kind', 1),
+        ('sched_chunk', 0)
+    ])
+
     def __init__(self, nodes, params):
         self.nodes = nodes
         self.params = params
@@ -166,7 +214,23 @@ class AbstractRewriter(object):
                             (lhs.indices[0] != i.indices[0] or len(lhs.indices) == 1 or
                              lhs.indices[1] == i.indices[1])
 
+            # Determine whether the Iteration tree only performs indirect
+            # increments (e.g., injection of sparse points into a grid), that is
+            # ``A[f(p)] = A[f(p)] + ...`` where ``A`` is not read otherwise
+            increments = [e for e in exprs if not e.lhs.is_Symbol]
+            is_II = not is_FP and len(increments) > 0  # ... is indirect-increment
+            written = set(as_symbol(e.lhs) for e in increments)
+            for e in increments:
+                is_II &= e.rhs.is_Add and e.lhs in e.rhs.args and\
+                    not (e.rhs - e.lhs).has(e.lhs.base) and\
+                    any(retrieve_indexed(i) for i in e.lhs.indices) and\
+                    tree[-1].dim in e.lhs.free_symbols
+            for e in exprs:
+                is_II &= all(i == e.lhs for i in terms[e] if as_symbol(i) in written)
+
             # Build a node->property mapper
+            if is_II:
+                mapper.setdefault(tree[-1], []).append(PARALLEL_ATOMIC)
             if is_FP:
                 for i in tree:
                     mapper.setdefault(i, []).append(PARALLEL)
@@ -7,10 +7,23 @@ import cgen as c
 A dictionary to quickly access standard OpenMP pragmas
 """
 omplang = {
-    'for': c.Pragma('omp for schedule(static)'),
-    'collapse': lambda i: c.Pragma('omp for collapse(%d) schedule(static)' % i),
+    'for': c.Pragma('omp for schedule(runtime)'),
+    'collapse': lambda i: c.Pragma('omp for collapse(%d) schedule(runtime)' % i),
     'par-region': lambda i: c.Pragma('omp parallel %s' % i),
+    'par-region-nthreads': lambda i, j: c.Pragma('omp parallel num_threads(%s > 0 ? '
+                                                 '%s : omp_get_max_threads()) %s'
+                                                 % (i, i, j)),
+    'set-schedule': lambda i, j: c.Module([
+        c.Line('#ifdef _OPENMP'),
+        c.Statement('omp_set_schedule((omp_sched_t)%s, %s)' % (i, j)),
+        c.Line('#endif')
+    ]),
     'par-for': c.Pragma('omp parallel for schedule(static)'),
+    'par-for-nthreads-if': lambda i, j: c.Pragma('omp parallel for schedule(static) '
+                                                 'num_threads(%s > 0 ? %s : '
+                                                 'omp_get_max_threads()) if(%s)'
+                                                 % (i, i, j)),
+    'atomic': c.Pragma('omp atomic update'),
     'simd-for': c.Pragma('omp simd'),
     'simd-for-aligned': lambda i, j: c.Pragma('omp simd aligned(%s:%d)' % (i, j))
 }
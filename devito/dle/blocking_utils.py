@@ -1,15 +1,17 @@
+from collections import OrderedDict
+
 import cgen as c
 from sympy import Symbol
 
 from devito.cgen_utils import ccode
 from devito.dle import compose_nodes, is_foldable, retrieve_iteration_tree
-from devito.dse import xreplace_indices
+from devito.dse import retrieve_indexed, xreplace_indices
 from devito.nodes import Expression, Iteration, List, UnboundedIndex, ntags
-from devito.visitors import (FindAdjacentIterations, FindNodes, IsPerfectIteration,
-                             NestedTransformer, Transformer)
-from devito.tools import as_tuple
+from devito.visitors import (FindAdjacentIterations, FindNodes, FindSections,
+                             IsPerfectIteration, NestedTransformer, Transformer)
+from devito.tools import as_tuple, filter_ordered
 
-__all__ = ['fold_blockable_tree', 'unfold_blocked_tree']
+__all__ = ['fold_blockable_tree', 'unfold_blocked_tree', 'analyze_time_tiling']
 
 
 def fold_blockable_tree(node, exclude_innermost=False):
@@ -26,6 +28,9 @@ def fold_blockable_tree(node, exclude_innermost=False):
             assert len(i) > 1
             if any(not IsPerfectIteration().visit(j) for j in i):
                 continue
+            # Already blocked by time tiling
+            if any(j.is_TimeTiled for j in i):
+                continue
             # Only retain consecutive trees having same depth
             trees = [retrieve_iteration_tree(j)[0] for j in i]
             handle = []
@@ -187,6 +192,154 @@ def optimize_unfolded_tree(unfolded, root):
     return processed + [root]
 
 
+def analyze_time_tiling(root, exclude_innermost=False):
+    """
+    Determine whether the sequential :class:`Iteration` ``root`` (e.g., a
+    timestepping loop) can be time tiled, that is whether consecutive
+    iterations of ``root`` can be executed over skewed (parallelogram-shaped)
+    blocks of the iteration space.
+
+    The body of ``root`` must consist of: ::
+
+        * "stencil" trees: perfect, fully parallel Iteration nests, all over
+          the same tiled dimensions, writing at zero offset, and reading the
+          functions they write only at zero offset or from previous timesteps;
+        * "sparse" trees: Iteration nests not over the tiled dimensions (e.g.,
+          over sparse points), in which each tensor expression either injects
+          into a function written by the stencil trees or interpolates from
+          the functions written by the stencil trees.
+
+    :param root: The candidate :class:`Iteration`.
+    :param exclude_innermost: True if the innermost vectorizable Iterations
+                              should not be tiled.
+
+    :returns: None if time tiling is illegal or unsupported. Otherwise, a
+              3-tuple ``(skew, iterations, guards)``, in which ``skew`` maps
+              each tiled :class:`Dimension` to the maximum distance of a
+              read from a point of the iteration space; ``iterations`` is the
+              list of Iterations over the tiled dimensions; ``guards`` maps
+              each tensor :class:`Expression` in the sparse trees to the
+              grid point, along each tiled dimension, that determines the
+              tile in which the expression is executed.
+    """
+    sections = FindSections().visit(root)
+    if any(not e.is_Expression for v in sections.values() for e in v):
+        # E.g., function calls
+        return None
+
+    def is_sparse(exprs):
+        """True if ``exprs`` access sparse points or perform indirect accesses."""
+        indexeds = [i for e in exprs for i in retrieve_indexed(e.expr)]
+        return any(i.base.function.is_PointData or
+                   any(retrieve_indexed(j) for j in i.indices) for i in indexeds)
+
+    # Determine the tiled dimensions from the stencil trees
+    dims = None
+    stencils = OrderedDict()
+    for tree, exprs in sections.items():
+        if len(tree) == 1 or any(not i.is_Parallel for i in tree[1:]):
+            continue
+        if is_sparse(exprs):
+            continue
+        handle = [i for i in tree[1:] if not (exclude_innermost and i.is_Vectorizable)]
+        if not handle or not IsPerfectIteration().visit(tree[1]):
+            return None
+        if dims is None:
+            dims = [i.dim for i in handle]
+        if [i.dim for i in tree[1:len(dims) + 1]] != dims:
+            return None
+        stencils[tree] = exprs
+    if not stencils:
+        return None
+    sparse = OrderedDict([(k, v) for k, v in sections.items() if k not in stencils])
+    if any(i.dim in dims for tree in sparse for i in tree[1:]):
+        # E.g., boundary conditions
+        return None
+    iterations = filter_ordered([i for tree in stencils for i in tree[1:len(dims) + 1]])
+
+    def access(indexed):
+        """The index of ``indexed`` along each tiled dimension."""
+        function = indexed.base.function
+        return OrderedDict([(d, i) for d, i in zip(function.indices, indexed.indices)
+                            if d in dims])
+
+    # The written functions and the timesteps they are written at
+    writes = OrderedDict()
+    for exprs in stencils.values():
+        for e in exprs:
+            if e.is_scalar:
+                continue
+            f = e.output_function
+            if any(v != d for d, v in access(e.expr.lhs).items()):
+                return None
+            writes.setdefault(f, set()).add(e.expr.lhs.indices[0] if f.is_TimeData
+                                            else None)
+
+    # The skew is the maximum distance of a read from a written point
+    skew = OrderedDict([(d, 0) for d in dims])
+    reads = set()
+    for exprs in stencils.values():
+        for e in exprs:
+            for i in retrieve_indexed(e.expr.rhs):
+                f = i.base.function
+                reads.add(f)
+                if f not in writes:
+                    continue
+                current = not f.is_TimeData or i.indices[0] in writes[f]
+                for d, v in access(i).items():
+                    distance = v - d
+                    if not distance.is_Integer or (current and distance != 0):
+                        # Unknown dependence or dependence within a timestep
+                        return None
+                    skew[d] = max(skew[d], abs(int(distance)))
+
+    # Each tensor expression in the sparse trees is executed in the tile
+    # containing a given grid point, so that no sparse point is processed twice
+    guards = OrderedDict()
+    for exprs in sparse.values():
+        temporaries = {}
+        for e in exprs:
+            handle = [i for i in retrieve_indexed(e.expr.rhs)
+                      if i.base.function in writes]
+            for i in e.expr.rhs.free_symbols:
+                handle.extend(temporaries.get(i, []))
+            if e.is_scalar:
+                temporaries[e.output] = handle
+                continue
+            lhs = e.expr.lhs
+            f = e.output_function
+            if f in writes:
+                # Injection into the points being computed in this timestep
+                if not f.is_TimeData or lhs.indices[0] not in writes[f]:
+                    return None
+                if any(i != lhs for i in handle) or len(access(lhs)) != len(dims):
+                    return None
+                guards[e] = access(lhs)
+            else:
+                # Interpolation: executed in the tile containing the rightmost
+                # grid point read, as all points to its left have been computed
+                if not handle or f in reads:
+                    return None
+                if any(not i.base.function.is_TimeData for i in handle):
+                    return None
+                guard = OrderedDict()
+                for d in dims:
+                    offsets, bases = set(), set()
+                    for i in handle:
+                        if d not in access(i):
+                            return None
+                        offset, base = access(i)[d].as_coeff_Add()
+                        offsets.add(offset)
+                        bases.add(base)
+                    if len(bases) != 1:
+                        return None
+                    guard[d] = bases.pop() + max(offsets)
+                    skew[d] = max(skew[d], int(max(offsets) - min(offsets)))
+                guards[e] = guard
+
+    return skew, iterations, guards
+
+
 class IterationFold(Iteration):
 
     """
@@ -202,9 +355,10 @@ class IterationFold(Iteration):
     is_IterationFold = True
 
     def __init__(self, nodes, dimension, limits, index=None, offsets=None,
-                 properties=None, pragmas=None, uindices=None, folds=None):
+                 properties=None, pragmas=None, uindices=None, reverse=None, folds=None):
         super(IterationFold, self).__init__(nodes, dimension, limits, index, offsets,
-                                            properties, uindices, pragmas)
+                                            properties, uindices, pragmas,
+                                            reverse=reverse)
         self.folds = folds
 
     def __repr__(self):
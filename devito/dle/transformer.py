@@ -21,7 +21,8 @@ modes = {
 default_options = {
     'blockinner': False,
     'blockshape': None,
-    'blockalways': False
+    'blockalways': False,
+    'blocktime': False
 }
 """Default values for the various optimization options."""
 
@@ -31,7 +32,7 @@ configuration.add('dle_options',
                   list(default_options))
 
 
-def transform(node, mode='basic', options=None):
+def transform(node, mode='basic', options=None, config=None):
     """
     Transform Iteration/Expression trees to generate highly optimized C code.
 
@@ -40,6 +41,8 @@ def transform(node, mode='basic', options=None):
     :param mode: Drive the tree transformation. ``mode`` is a string indicating
                  a certain optimization pipeline.
     :param options: A dictionary with additional information to drive the DLE.
+    :param config: (Optional) The configuration parameters to be used (e.g., a
+                   snapshot of ``configuration``). Defaults to ``configuration``.
 
     The ``mode`` parameter accepts the following values: ::
 
@@ -60,6 +63,10 @@ def transform(node, mode='basic', options=None):
                         heuristic.
         * 'blockalways': Apply blocking even though the DLE thinks it's not
                          worthwhile applying it.
+        * 'blocktime': Apply time tiling to timestepping loops, executing
+                       ``blocktime`` timesteps per tile (True defaults to 4
+                       timesteps). Time tiling may also be requested as a
+                       custom ``mode``, 'tiling'.
     """
     # Check input parameters
     if not (mode is None or isinstance(mode, str)):
@@ -74,17 +81,18 @@ def transform(node, mode='basic', options=None):
         raise ValueError("Got illegal node of type %s." % type(node))
 
     # Parse options (local options take precedence over global options)
+    config = config or configuration
     options = options or {}
     params = options.copy()
     for i in options:
         if i not in default_options:
             dle_warning("Illegal DLE parameter '%s'" % i)
             params.pop(i)
-    params.update({k: v for k, v in configuration['dle_options'].items()
+    params.update({k: v for k, v in config['dle_options'].items()
                    if k not in params})
     params.update({k: v for k, v in default_options.items() if k not in params})
-    params['compiler'] = configuration['compiler']
-    params['openmp'] = configuration['openmp']
+    params['compiler'] = config['compiler']
+    params['openmp'] = config['openmp']
 
     # Process the Iteration/Expression tree through the DLE
     if mode is None or mode == 'noop':
@@ -2,6 +2,8 @@ from collections import OrderedDict, namedtuple
 
 from devito.dse.graph import temporaries_graph
 from devito.dse.manipulation import xreplace_indices
+from devito.dse.queries import q_indexed
+from devito.dse.search import retrieve_indexed
 
 from devito.interfaces import ScalarFunction
 from devito.stencil import Stencil
@@ -74,13 +76,26 @@ def merge(clusters):
     Given an ordered collection of :class:`Cluster` objects, return a
     (potentially) smaller sequence in which clusters with identical stencil
     have been merged into a single :class:`Cluster`.
+
+    A cluster is merged into an earlier one only if none of the clusters in
+    between accesses (i.e., writes to, or reads what is written by) the same
+    data; otherwise, the program order would be violated.
     """
-    mapper = OrderedDict()
+    groups = []
     for c in clusters:
-        mapper.setdefault((c.stencil.entries, c.atomics), []).append(c)
+        key = (c.stencil.entries, c.atomics)
+        for k, group in reversed(groups):
+            if k == key:
+                group.append(c)
+                break
+            elif any(_conflicts(c, i) for i in group):
+                groups.append((key, [c]))
+                break
+        else:
+            groups.append((key, [c]))
 
     processed = []
-    for (entries, atomics), clusters in mapper.items():
+    for (entries, atomics), clusters in groups:
         # Eliminate redundant temporaries
         temporaries = OrderedDict()
         for c in clusters:
@@ -93,6 +108,34 @@ def merge(clusters):
     return processed
 
 
+def _accesses(cluster):
+    """
+    Return the data written and read by ``cluster``, as two sets of
+    ``(function, time index)``; the time index is None unless the function
+    is a :class:`TimeData`, as the different time slices of a TimeData are
+    independent of each other.
+    """
+    def key(i):
+        f = i.base.function
+        return f, i.indices[0] if f.is_TimeData else None
+
+    writes, reads = set(), set()
+    for e in cluster.exprs:
+        if q_indexed(e.lhs):
+            writes.add(key(e.lhs))
+        reads.update(key(i) for i in retrieve_indexed(e.rhs))
+    return writes, reads
+
+
+def _conflicts(c1, c2):
+    """
+    Return True if the clusters ``c1`` and ``c2`` cannot be reordered.
+    """
+    writes1, reads1 = _accesses(c1)
+    writes2, reads2 = _accesses(c2)
+    return bool(writes1 & (writes2 | reads2) or writes2 & reads1)
+
+
 def optimize(clusters):
     """
     Attempt scalar promotion. Candidates are tensors, perhaps created by some
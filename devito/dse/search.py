@@ -108,11 +108,21 @@ def retrieve_indexed(expr, mode='unique'):
     return search(expr, q_indexed, mode, 'dfs')
 
 
-def retrieve_terminals(expr, mode='unique'):
+def retrieve_terminals(expr, mode='unique', deep=False):
     """
     Shorthand to retrieve :class:`Indexed` and :class:`Symbol` objects in ``expr``.
+
+    If ``deep`` is True, the objects appearing within the indices of the
+    :class:`Indexed` objects (e.g., integer tables used for indirect accesses)
+    are retrieved as well.
     """
-    return search(expr, q_terminal, mode, 'dfs')
+    found = search(expr, q_terminal, mode, 'dfs')
+    if deep:
+        for i in list(found):
+            if q_indexed(i):
+                for j in i.indices:
+                    found.update(retrieve_terminals(j, mode, deep))
+    return found
 
 
 def retrieve_trigonometry(expr):
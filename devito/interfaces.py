@@ -6,12 +6,14 @@ import sympy
 from sympy import Function, IndexedBase, as_finite_diff
 from sympy.abc import s
 
-from devito.dimension import t, x, y, z, time, Dimension
+from devito.compression import get_codec
+from devito.dimension import (t, x, y, z, time, shot, Dimension,
+                              SubsampledDimension)
 from devito.finite_difference import (centered, cross_derivative,
                                       first_derivative, left, right,
                                       second_derivative)
 from devito.logger import debug, error, warning
-from devito.memory import CMemory, first_touch
+from devito.memory import CMemory, MappedMemory, SharedMemory, first_touch
 from devito.arguments import (ConstantDataArgProvider, TensorDataArgProvider,
                               ScalarFunctionArgProvider, TensorFunctionArgProvider,
                               ObjectArgProvider)
@@ -22,6 +24,8 @@ __all__ = ['Symbol', 'Indexed',
            'Forward', 'Backward']
 
 configuration.add('first_touch', 0, [0, 1], lambda i: bool(i))
+configuration.add('mmap_dir', None)
+configuration.add('mmap_advice', 'normal', list(MappedMemory.advices))
 
 # This cache stores a reference to each created data object
 # so that we may re-create equivalent symbols during symbolic
@@ -427,6 +431,11 @@ class DenseData(TensorData):
     :param dimensions: The symbolic dimensions of the tensor.
     :param space_order: Discretisation order for space derivatives
     :param initializer: Function to initialize the data, optional
+    :param memmap: (Optional) Back the data with a memory-mapped file rather
+                   than with memory: either the path of the file, opened if
+                   it exists and created otherwise, or True, for a temporary
+                   file in the directory ``configuration['mmap_dir']``. See
+                   :class:`MappedMemory`.
 
     .. note::
 
@@ -451,6 +460,7 @@ class DenseData(TensorData):
             if self.initializer is not None:
                 assert(callable(self.initializer))
             self._first_touch = kwargs.get('first_touch', configuration['first_touch'])
+            self._memmap = kwargs.get('memmap', None)
             self._data_object = None
 
     @classmethod
@@ -478,10 +488,23 @@ class DenseData(TensorData):
                 dimensions = [Dimension("x%d" % i) for i in range(1, len(shape) + 1)]
         return dimensions
 
-    def _allocate_memory(self):
-        """Allocate memory in terms of numpy ndarrays."""
+    def _allocate_memory(self, shared=False):
+        """Allocate memory in terms of numpy ndarrays, in a :class:`SharedMemory`
+        segment if ``shared`` is True."""
         debug("Allocating memory for %s (%s)" % (self.name, str(self.shape)))
-        self._data_object = CMemory(self.shape, dtype=self.dtype)
+        if shared:
+            self._data_object = SharedMemory(self.shape, dtype=self.dtype)
+        elif self._memmap:
+            # New files are zero-filled, while existing ones hold the data;
+            # either way, the pages are only read and written as accessed
+            path = None if self._memmap is True else self._memmap
+            self._data_object = MappedMemory(self.shape, dtype=self.dtype,
+                                             path=path,
+                                             directory=configuration['mmap_dir'],
+                                             advice=configuration['mmap_advice'])
+            return
+        else:
+            self._data_object = CMemory(self.shape, dtype=self.dtype)
         if self._first_touch:
             first_touch(self)
         else:
@@ -495,6 +518,36 @@ class DenseData(TensorData):
             self._allocate_memory()
         return self._data_object.ndpointer
 
+    def share(self):
+        """Move the data into a :class:`SharedMemory` segment, so that it is
+        shared with, rather than copied to, other processes (e.g., the workers
+        of a :mod:`multiprocessing` pool forked afterwards).
+
+        :returns: The :class:`SharedMemory` now holding the data.
+
+        .. note::
+
+           Data already allocated is copied into the segment. Its former
+           buffer is kept alive as long as this object, so that any view
+           obtained earlier through :attr:`data` remains valid, but it no
+           longer reflects, nor affects, the shared data.
+        """
+        if self._data_object is None:
+            self._allocate_memory(shared=True)
+        elif not isinstance(self._data_object, SharedMemory):
+            shm = SharedMemory(self.shape, dtype=self.dtype)
+            shm.ndpointer[:] = self._data_object.ndpointer
+            self._data_retired = self._data_object
+            self._data_object = shm
+        return self._data_object
+
+    def advise(self, advice, start=None, stop=None):
+        """Hint the kernel on the expected access pattern of memory-mapped
+        data (e.g., ``'willneed'`` ahead of reading a range of timesteps), as
+        in :meth:`MappedMemory.advise`. Data in memory is left as is."""
+        if isinstance(self._data_object, MappedMemory):
+            self._data_object.advise(advice, start, stop)
+
     def initialize(self):
         """Apply the data initilisation function, if it is not None."""
         if self.initializer is not None:
@@ -633,12 +686,13 @@ class DenseData(TensorData):
     def laplace2(self, weight=1):
         """Symbol for the double laplacian wrt all spatial dimensions"""
         order = self.space_order/2
+        dims = [d for d in self.indices[1:] if d is not shot]
         first = sum([second_derivative(self, dim=d,
                                        order=order)
-                     for d in self.indices[1:]])
+                     for d in dims])
         second = sum([second_derivative(first * weight, dim=d,
                                         order=order)
-                      for d in self.indices[1:]])
+                      for d in dims])
         return second
 
 
@@ -658,6 +712,18 @@ class TimeData(DenseData):
     :param time_order: Order of the time discretization which affects the
                        final size of the leading time dimension of the
                        data buffer.
+    :param nshots: (Optional) Number of independent shots to be computed at
+                   once. If provided, a trailing ``shot`` dimension of size
+                   ``nshots`` is appended to the data buffer.
+    :param subsample: (Optional) If :param save: is True, save only every
+                      ``subsample``-th timestep, starting from the first one.
+                      The data buffer then holds ``ceil(time_dim/subsample)``
+                      timesteps.
+    :param compression: (Optional) If :param save: is True, a lossy
+                        :class:`Codec`, or the name of one (``'float16'``,
+                        ``'bfloat16'``), compressing the saved timesteps. The
+                        data buffer then holds the codes, whose data type is
+                        that of the codec; see :mod:`devito.compression`.
 
     .. note::
 
@@ -677,6 +743,28 @@ class TimeData(DenseData):
           In []: TimeData(name="a", shape=(20, 30))
           Out[]: a(t, x, y)
 
+       The ``shot`` dimension is placed innermost, so that the shots share
+       the loop over the grid points. This way, any time-invariant field
+       (e.g., the model parameters) is loaded once per grid point and then
+       reused across all shots:
+
+       .. code-block:: python
+
+          In []: TimeData(name="a", shape=(20, 30), nshots=4)
+          Out[]: a(t, x, y, shot)
+
+       With ``subsample``, the leading dimension is a strided view of the
+       ``time`` dimension, so that the timestep ``time`` is stored in the
+       entry ``time/subsample`` of the data buffer, if ``time`` is a multiple
+       of ``subsample``. Any equation accessing such an object is only
+       evaluated at these timesteps:
+
+       .. code-block:: python
+
+          In []: TimeData(name="a", shape=(20, 30), save=True, time_dim=100,
+                          subsample=4)
+          Out[]: a(tsub4, x, y)
+
     """
 
     is_TimeData = True
@@ -687,6 +775,23 @@ class TimeData(DenseData):
             time_dim = kwargs.get('time_dim', None)
             self.time_order = kwargs.get('time_order', 1)
             self.save = kwargs.get('save', False)
+            self.nshots = kwargs.get('nshots', None)
+            self.subsample = kwargs.get('subsample', None)
+
+            if self.subsample is not None and \
+                    (not self.save or int(self.subsample) != self.subsample or
+                     self.subsample < 1):
+                error('Subsampling (subsample) requires save=True and a '
+                      'positive integer factor for TimeData symbol %s' % self.name)
+                raise ValueError("Illegal subsampling factor")
+
+            self.codec = get_codec(kwargs.get('compression', None))
+            if self.codec is not None:
+                if not self.save:
+                    error('Compression requires save=True for TimeData symbol %s'
+                          % self.name)
+                    raise ValueError("Illegal compression")
+                self.dtype = self.codec.dtype
 
             if not self.save:
                 if time_dim is not None:
@@ -701,7 +806,11 @@ class TimeData(DenseData):
                     error('Time dimension (time_dim) is required'
                           'to save intermediate data with save=True')
                     raise ValueError("Unknown time dimensions")
+                if self.subsample is not None:
+                    time_dim = (time_dim + self.subsample - 1) // self.subsample
             self.shape = (time_dim,) + self.shape
+            if self.nshots is not None:
+                self.shape += (self.nshots,)
 
     def initialize(self):
         if self.initializer is not None:
@@ -718,14 +827,21 @@ class TimeData(DenseData):
         :return: Dimension indices used for each axis.
         """
         save = kwargs.get('save', None)
-        tidx = time if save else t
+        subsample = kwargs.get('subsample', None)
+        if save and subsample is not None:
+            tidx = SubsampledDimension('tsub%d' % subsample, parent=time,
+                                       factor=subsample)
+        else:
+            tidx = time if save else t
         _indices = DenseData._indices(**kwargs)
+        if kwargs.get('nshots', None) is not None:
+            _indices = list(_indices) + [shot]
         return tuple([tidx] + list(_indices))
 
     @property
     def dim(self):
         """Returns the spatial dimension of the data object"""
-        return len(self.shape[1:])
+        return len(self.shape[1:]) - (1 if self.nshots is not None else 0)
 
     @property
     def forward(self):
@@ -803,6 +919,21 @@ class Object(ObjectArgProvider):
         return self.name
 
 
+class Parameter(ConstantDataArgProvider):
+
+    """
+    Represent a generic scalar value passed to a kernel at runtime.
+    """
+
+    def __init__(self, name, dtype, value):
+        self.name = name
+        self.dtype = dtype
+        self.data = value
+
+    def __repr__(self):
+        return self.name
+
+
 # Extended SymPy hierarchy follows, for essentially two reasons:
 # - To keep track of `function`
 # - To override SymPy caching behaviour
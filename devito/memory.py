@@ -1,14 +1,20 @@
 from __future__ import absolute_import
 
+import atexit
 import ctypes
+import mmap
+import os
+from collections import OrderedDict
 from ctypes.util import find_library
 from functools import reduce
 from operator import mul
+from tempfile import gettempdir, mkstemp
+from uuid import uuid4
 
 import numpy as np
 from sympy import Eq
 
-from devito.logger import error
+from devito.logger import error, warning
 from devito.tools import numpy_to_ctypes
 import devito
 
@@ -31,6 +37,195 @@ class CMemory(object):
         self.ndpointer.fill(val)
 
 
+class SharedMemory(object):
+
+    """
+    Memory allocated in a POSIX shared memory segment, which other processes
+    may attach to by name. Since the segment is mapped with ``MAP_SHARED``,
+    the data is also shared, rather than copied-on-write, with the processes
+    forked after its creation.
+
+    :param shape: Shape of the array to allocate
+    :param dtype: Numpy datatype to allocate. Default to np.float32
+    :param name: (Optional) The name of an existing segment to attach to. If
+                 not provided, a new segment is created, and then removed when
+                 this object is garbage collected in the creating process.
+
+    Segments are page-aligned and are pickled by name, so that passing a
+    :class:`SharedMemory` to another process (e.g., through a
+    :mod:`multiprocessing` queue) attaches to the same segment.
+    """
+
+    def __init__(self, shape, dtype=np.float32, name=None):
+        self.shape = shape
+        self.dtype = dtype
+        # The pid of the creating process, which is also in charge of the cleanup
+        self.owner = os.getpid() if name is None else None
+        self.name = name or 'devito-%d-%s' % (os.getpid(), uuid4().hex)
+
+        size = int(reduce(mul, shape, 1))
+        nbytes = max(size * np.dtype(dtype).itemsize, 1)
+        flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if self.owner else 0)
+        fd = os.open(self.path, flags, 0o600)
+        try:
+            if self.owner:
+                _segments.add((self.owner, self.path))
+                os.ftruncate(fd, nbytes)
+            self._mmap = mmap.mmap(fd, nbytes, mmap.MAP_SHARED)
+        finally:
+            os.close(fd)
+        self.ndpointer = np.frombuffer(self._mmap, dtype=dtype, count=size)
+        self.ndpointer = self.ndpointer.reshape(shape)
+
+    def __del__(self):
+        if self.owner == os.getpid():
+            _unlink(self.owner, self.path)
+
+    def __reduce__(self):
+        return (SharedMemory, (self.shape, self.dtype, self.name))
+
+    @property
+    def path(self):
+        """The file backing the shared memory segment."""
+        return os.path.join(shmdir, self.name)
+
+    def fill(self, val):
+        self.ndpointer.fill(val)
+
+
+shmdir = '/dev/shm' if os.path.isdir('/dev/shm') else gettempdir()
+"""The directory of the POSIX shared memory segments."""
+
+# The segments created so far, as (creating pid, path) pairs
+_segments = set()
+
+
+def _unlink(pid, path):
+    _segments.discard((pid, path))
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+@atexit.register
+def _unlink_all():
+    """Remove the segments still alive at exit, which would otherwise
+    outlive the creating process."""
+    for pid, path in list(_segments):
+        if pid == os.getpid():
+            _unlink(pid, path)
+
+
+class MappedMemory(object):
+
+    """
+    Memory backed by a memory-mapped file, so that arrays larger than the
+    physical memory may be allocated, and the data of large files is only
+    read from disk as it is accessed. The pages are managed by the kernel,
+    which writes them back to the file, rather than to the swap space, under
+    memory pressure.
+
+    :param shape: Shape of the array to allocate
+    :param dtype: Numpy datatype to allocate. Default to np.float32
+    :param path: (Optional) The file backing the data. An existing file is
+                 opened, and its content, from ``offset``, is the data;
+                 otherwise, a new file is created and zero-filled. If not
+                 provided, an anonymous temporary file is created in
+                 ``directory``, and removed when the data is unmapped.
+    :param mode: (Optional) Either ``'r+'``, to write changes back to the file,
+                 or ``'c'`` (copy-on-write), to leave an existing file as is.
+    :param offset: (Optional) The offset, in bytes, of the data in the file
+                   (e.g., to skip a header).
+    :param directory: (Optional) The directory of the temporary files.
+                      Default to the system's temporary directory.
+    :param advice: (Optional) The expected access pattern, as a key of
+                   :attr:`MappedMemory.advices`, passed to ``madvise`` to
+                   control the page-in policy of the kernel.
+    """
+
+    advices = OrderedDict([('normal', 0), ('random', 1), ('sequential', 2),
+                           ('willneed', 3), ('dontneed', 4)])
+    """The ``madvise`` hints: ``'normal'`` read-ahead; ``'random'`` access, with
+    no read-ahead; ``'sequential'`` access, with aggressive read-ahead;
+    ``'willneed'``, to page in the data ahead of its use; ``'dontneed'``, to
+    release the pages (of which the changes are written back to the file, or
+    discarded with mode ``'c'``)."""
+
+    def __init__(self, shape, dtype=np.float32, path=None, mode='r+', offset=0,
+                 directory=None, advice='normal'):
+        if mode not in ('r+', 'c') or (mode == 'c' and not os.path.exists(path or '')):
+            error("Memory-mapping requires mode 'r+', or mode 'c' and an "
+                  "existing file")
+            raise ValueError("Illegal memory-mapping mode")
+        self.shape = shape
+        self.dtype = dtype
+        self.path = path
+
+        size = int(reduce(mul, shape, 1))
+        nbytes = max(size * np.dtype(dtype).itemsize, 1)
+        # The mapping must start at a multiple of the allocation granularity
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        if path is None:
+            fd, tmp = mkstemp(prefix='devito-', dir=directory)
+            # The file is removed right away, so that it never outlives the
+            # mapping, even on abnormal termination
+            os.unlink(tmp)
+        elif mode == 'r+':
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            fd = os.open(path, os.O_RDONLY)
+        try:
+            if os.fstat(fd).st_size == 0 and mode == 'r+':
+                os.ftruncate(fd, offset + nbytes)
+            elif os.fstat(fd).st_size < offset + nbytes:
+                error("File %s is smaller than the %d bytes of the data at "
+                      "offset %d" % (path, nbytes, offset))
+                raise ValueError("Illegal memory-mapped file")
+            access = mmap.ACCESS_WRITE if mode == 'r+' else mmap.ACCESS_COPY
+            self._mmap = mmap.mmap(fd, offset + nbytes - start, access=access,
+                                   offset=start)
+        finally:
+            os.close(fd)
+        self.ndpointer = np.frombuffer(self._mmap, dtype=dtype, count=size,
+                                       offset=offset - start)
+        self.ndpointer = self.ndpointer.reshape(shape)
+
+        buf = ctypes.c_char.from_buffer(self._mmap)
+        self._address = ctypes.addressof(buf)
+        del buf
+        self.advise(advice)
+
+    def advise(self, advice, start=None, stop=None):
+        """
+        Hint the kernel on the expected access pattern of the data.
+
+        :param advice: A key of :attr:`MappedMemory.advices`.
+        :param start: (Optional) The first index, along the leading dimension,
+                      of the data the hint applies to. Default to 0.
+        :param stop: (Optional) The index, along the leading dimension, past
+                     the data the hint applies to. Default to the whole data.
+        """
+        if advice not in self.advices:
+            error("Unknown memory-mapping advice %s; use one of %s"
+                  % (advice, list(self.advices)))
+            raise ValueError("Unknown memory-mapping advice")
+        data = self.ndpointer[slice(start, stop)]
+        if data.size == 0:
+            return
+        # The advised range must start at a page boundary
+        begin = data.ctypes.data - (data.ctypes.data - self._address) % mmap.PAGESIZE
+        length = data.ctypes.data + data.nbytes - begin
+        if libc.madvise(ctypes.c_void_p(begin), ctypes.c_size_t(length),
+                        self.advices[advice]) != 0:
+            warning("Unable to apply memory-mapping advice %s" % advice)
+
+    def flush(self):
+        """Write the changes back to the file."""
+        self._mmap.flush()
+
+    def fill(self, val):
+        self.ndpointer.fill(val)
+
+
 def malloc_aligned(shape, alignment=None, dtype=np.float32):
     """ Allocate memory using the C function malloc_aligned
     :param shape: Shape of the array to allocate
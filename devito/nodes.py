@@ -6,6 +6,7 @@ import inspect
 from collections import Iterable, OrderedDict
 
 import cgen as c
+import numpy as np
 from sympy import Eq
 
 from devito.cgen_utils import ccode
@@ -15,8 +16,8 @@ from devito.stencil import Stencil
 from devito.tools import as_tuple, filter_ordered, flatten
 from devito.arguments import ArgumentProvider, Argument
 
-__all__ = ['Node', 'Block', 'Denormals', 'Expression', 'Function', 'FunCall',
-           'Iteration', 'List', 'LocalExpression', 'TimedList']
+__all__ = ['Node', 'Block', 'Conditional', 'Denormals', 'Expression', 'Function',
+           'FunCall', 'Iteration', 'List', 'LocalExpression', 'TimedList']
 
 
 class Node(object):
@@ -28,6 +29,7 @@ class Node(object):
     is_Expression = False
     is_Function = False
     is_FunCall = False
+    is_Conditional = False
     is_List = False
     is_Element = False
 
@@ -151,6 +153,31 @@ class FunCall(Node):
         return "FunCall::\n\t%s(...)" % self.name
 
 
+class Conditional(Node):
+
+    """A node executing its body only if a condition holds.
+
+    :param condition: A SymPy relational, or a boolean combination of
+                      relationals, evaluated before executing ``then_body``.
+    :param then_body: A :class:`Node` or an iterable of :class:`Node` objects.
+    """
+
+    is_Conditional = True
+
+    _traversable = ['then_body']
+
+    def __init__(self, condition, then_body):
+        self.condition = condition
+        self.then_body = as_tuple(then_body)
+
+    def __repr__(self):
+        return "Conditional::\n\tif (%s)" % self.condition
+
+    @property
+    def children(self):
+        return (self.then_body,)
+
+
 class Expression(Node):
 
     """Class encpasulating a single SymPy equation."""
@@ -164,7 +191,8 @@ class Expression(Node):
 
         # Traverse /expression/ to determine meta information
         # Note: at this point, expressions have already been indexified
-        self.functions = [i.base.function for i in retrieve_terminals(self.expr)
+        self.functions = [i.base.function for i in
+                          retrieve_terminals(self.expr, deep=True)
                           if isinstance(i, (Indexed, Symbol))]
         self.dimensions = flatten(i.indices for i in self.functions)
         # Filter collected dimensions and functions
@@ -240,6 +268,8 @@ class Iteration(Node):
     :param uindices: a bag of UnboundedIndex objects, representing free iteration
                      variables (i.e., the Iteration end point is independent of
                      any of these UnboundedIndex).
+    :param reverse: (Optional) True if the iteration space is traversed backwards.
+                    Defaults to the direction of ``dimension``.
     """
 
     is_Iteration = True
@@ -255,10 +285,16 @@ class Iteration(Node):
         * vector-dim: A (SIMD) vectorizable iteration space.
         * elemental: Hoistable to an elemental function.
         * remainder: A remainder iteration (e.g., by-product of some transformations)
+        * parallel-atomic: An iteration space whose iterations can safely be
+                           executed in parallel, provided that the updates
+                           of the tensor expressions are performed atomically
+                           (e.g., the injection of sparse points into a grid).
+        * time-tiled: An iteration space within a time tile (i.e., a "wavefront"
+                      of blocks across consecutive timesteps).
     """
 
     def __init__(self, nodes, dimension, limits, index=None, offsets=None,
-                 properties=None, pragmas=None, uindices=None):
+                 properties=None, pragmas=None, uindices=None, reverse=None):
         # Ensure we deal with a list of Expression objects internally
         nodes = as_tuple(nodes)
         self.nodes = as_tuple([n if isinstance(n, Node) else Expression(n)
@@ -268,8 +304,11 @@ class Iteration(Node):
         self.dim = dimension
         self.index = index or self.dim.name
         # Store direction, as it might change on the dimension
-        # before we use it during code generation.
-        self.reverse = self.dim.reverse
+        # before we use it during code generation. Unless explicitly
+        # given, it is taken from the dimension, and then frozen, so
+        # that rebuilding the Iteration preserves it
+        self.reverse = self.dim.reverse if reverse is None else reverse
+        self._args['reverse'] = self.reverse
 
         # Generate loop limits
         if isinstance(limits, Iterable):
@@ -321,6 +360,10 @@ class Iteration(Node):
     def is_Parallel(self):
         return PARALLEL in self.properties
 
+    @property
+    def is_ParallelAtomic(self):
+        return PARALLEL_ATOMIC in self.properties
+
     @property
     def is_Vectorizable(self):
         return VECTOR in self.properties
@@ -333,6 +376,10 @@ class Iteration(Node):
     def is_Remainder(self):
         return REMAINDER in self.properties
 
+    @property
+    def is_TimeTiled(self):
+        return TIME_TILED in self.properties
+
     @property
     def tag(self):
         for i in self.properties:
@@ -395,16 +442,17 @@ class Iteration(Node):
         available (either statically known or provided through ``start``/
         ``finish``). ``None`` is used as a placeholder in the returned 2-tuple
         if a limit is unknown."""
+        lower = upper = None
         try:
             lower = int(self.limits[0]) - self.offsets[0]
         except (TypeError, ValueError):
-            if isinstance(start, int):
-                lower = start - self.offsets[0]
+            if isinstance(start, (int, np.integer)):
+                lower = int(start) - self.offsets[0]
         try:
             upper = int(self.limits[1]) - self.offsets[1]
         except (TypeError, ValueError):
-            if isinstance(finish, int):
-                upper = finish - self.offsets[1]
+            if isinstance(finish, (int, np.integer)):
+                upper = int(finish) - self.offsets[1]
         return (lower, upper)
 
     def extent(self, start=None, finish=None):
@@ -479,23 +527,49 @@ class TimedList(List):
 
     """Wrap a Node with C-level timers."""
 
-    def __init__(self, lname, gname, body):
+    def __init__(self, lname, gname, body, steps=False, counters=None):
         """
         Initialize a TimedList object.
 
         :param lname: Timer name in the local scope.
         :param gname: Name of the global struct tracking all timers.
         :param body: Timed block of code.
+        :param steps: (Optional) if True, the time taken by each execution of
+                      ``body`` is also recorded in the ``<lname>_steps`` buffer
+                      of the global struct, up to ``<lname>_maxsteps`` entries.
+        :param counters: (Optional) the names of the hardware counters read before
+                         and after ``body``. The i-th counter is read through the
+                         i-th file descriptor in ``perf_fds``.
         """
         self._name = lname
+        counters = as_tuple(counters)
+        handle = {'gn': gname, 'ln': lname}
         # TODO: need omp master pragma to be thread safe
-        header = [c.Statement("struct timeval start_%s, end_%s" % (lname, lname)),
-                  c.Statement("gettimeofday(&start_%s, NULL)" % lname)]
-        footer = [c.Statement("gettimeofday(&end_%s, NULL)" % lname),
-                  c.Statement(("%(gn)s->%(ln)s += " +
-                               "(double)(end_%(ln)s.tv_sec-start_%(ln)s.tv_sec)+" +
-                               "(double)(end_%(ln)s.tv_usec-start_%(ln)s.tv_usec)" +
-                               "/1000000") % {'gn': gname, 'ln': lname})]
+        header = [c.Statement("struct timeval start_%s, end_%s" % (lname, lname))]
+        if counters:
+            header.append(c.Statement("devito_perf_init(%s->perf_fds)" % gname))
+        for i, k in enumerate(counters):
+            header.append(c.Statement("long long %s_%s = devito_perf_read(%s->perf_fds"
+                                      "[%d])" % (lname, k, gname, i)))
+        header.append(c.Statement("gettimeofday(&start_%s, NULL)" % lname))
+        elapsed = ("(double)(end_%(ln)s.tv_sec-start_%(ln)s.tv_sec)+" +
+                   "(double)(end_%(ln)s.tv_usec-start_%(ln)s.tv_usec)" +
+                   "/1000000") % handle
+        footer = [c.Statement("gettimeofday(&end_%s, NULL)" % lname)]
+        if steps:
+            footer.extend([
+                c.Statement("double elapsed_%s = %s" % (lname, elapsed)),
+                c.Statement("%(gn)s->%(ln)s += elapsed_%(ln)s" % handle),
+                c.If("%(gn)s->%(ln)s_nsteps < %(gn)s->%(ln)s_maxsteps" % handle,
+                     c.Statement("%(gn)s->%(ln)s_steps[%(gn)s->%(ln)s_nsteps++] = "
+                                 "elapsed_%(ln)s" % handle))
+            ])
+        else:
+            footer.append(c.Statement("%s->%s += %s" % (gname, lname, elapsed)))
+        for i, k in enumerate(counters):
+            footer.append(c.Statement("%s->%s_%s += devito_perf_read(%s->perf_fds[%d])"
+                                      " - %s_%s" % (gname, lname, k, gname, i,
+                                                    lname, k)))
         super(TimedList, self).__init__(header, body, footer)
 
     def __repr__(self):
@@ -568,8 +642,11 @@ PARALLEL = IterationProperty('parallel')
 VECTOR = IterationProperty('vector-dim')
 ELEMENTAL = IterationProperty('elemental')
 REMAINDER = IterationProperty('remainder')
+PARALLEL_ATOMIC = IterationProperty('parallel-atomic')
+TIME_TILED = IterationProperty('time-tiled')
 
-known_properties = [SEQUENTIAL, PARALLEL, VECTOR, ELEMENTAL, REMAINDER]
+known_properties = [SEQUENTIAL, PARALLEL, VECTOR, ELEMENTAL, REMAINDER, PARALLEL_ATOMIC,
+                    TIME_TILED]
 
 
 def tagger(i):
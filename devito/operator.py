@@ -1,28 +1,47 @@
 from __future__ import absolute_import
 
 from collections import OrderedDict, namedtuple
+from copy import copy
+from datetime import datetime
 from operator import attrgetter
+from os import path
 
 import ctypes
+import platform
+import threading
+import weakref
 import numpy as np
 import sympy
 
 from devito.cgen_utils import Allocator
-from devito.compiler import jit_compile, load
+from devito.compiler import jit_compile, jit_compile_units, jit_pool, load
+from devito.compression import compress
 from devito.dimension import time, Dimension
 from devito.dle import compose_nodes, filter_iterations, transform
+from devito.dle.backends import BlockingArg
 from devito.dse import clusterize, indexify, rewrite, q_indexed, retrieve_terminals
-from devito.interfaces import Forward, Backward, CompositeData, Object
-from devito.logger import bar, error, info
-from devito.nodes import Element, Expression, Function, Iteration, List, LocalExpression
+from devito.interfaces import (AbstractSymbol, Forward, Backward, CompositeData,
+                               Object, Parameter, SymbolicData)
+from devito.logger import bar, debug, error, info
+from devito.nodes import (Conditional, Element, Expression, Function, Iteration, List,
+                          LocalExpression)
 from devito.parameters import configuration
-from devito.profiling import create_profile
+from devito.profiling import BuildProfile, create_profile
 from devito.stencil import Stencil
-from devito.tools import as_tuple, filter_sorted, flatten, numpy_to_ctypes, partial_order
-from devito.visitors import (FindScopes, ResolveIterationVariable,
-                             SubstituteExpression, Transformer, NestedTransformer)
+from devito.tools import (as_tuple, filter_ordered, filter_sorted, flatten,
+                          numpy_to_ctypes, partial_order)
+from devito.visitors import (CGenUnits, FindNodes, FindScopes,
+                             ResolveIterationVariable, SubstituteExpression,
+                             Transformer, NestedTransformer)
 from devito.exceptions import InvalidArgument, InvalidOperator
 
+configuration.add('operator_cache', 1, [0, 1], lambda i: bool(i))
+
+# Operators generated so far, indexed by a structural key of their input. Weak
+# references are used, so that an Operator is dropped from the cache as soon
+# as it is no longer in use.
+_OperatorCache = weakref.WeakValueDictionary()
+
 
 class Operator(Function):
 
@@ -46,6 +65,13 @@ class Operator(Function):
                 defaults to ``configuration['dse']``.
         * dle : Use the Devito Loop Engine to optimize the loops -
                 defaults to ``configuration['dle']``.
+        * config : The configuration parameters used throughout the construction
+                   of the Operator - defaults to a snapshot of ``configuration``
+                   taken upon instantiation.
+
+    Construction has no side effects on shared objects (e.g., the direction of
+    time is a property of the generated code, not of the :class:`Dimension`),
+    so that Operators can be built concurrently in different threads.
     """
     def __init__(self, expressions, **kwargs):
         expressions = as_tuple(expressions)
@@ -55,10 +81,13 @@ class Operator(Function):
             raise InvalidOperator("Only SymPy expressions are allowed.")
 
         self.name = kwargs.get("name", "Kernel")
+        self.config = config = kwargs.get("config") or configuration.snapshot()
         subs = kwargs.get("subs", {})
-        time_axis = kwargs.get("time_axis", Forward)
-        dse = kwargs.get("dse", configuration['dse'])
-        dle = kwargs.get("dle", configuration['dle'])
+        self.time_axis = kwargs.get("time_axis", Forward)
+        dse = kwargs.get("dse", config['dse'])
+        dle = kwargs.get("dle", config['dle'])
+        self.dse_mode = set_dse_mode(dse)
+        self.dle_mode = set_dle_mode(dle)
 
         # Header files, etc.
         self._headers = list(self._default_headers)
@@ -66,44 +95,73 @@ class Operator(Function):
         self._globals = list(self._default_globals)
 
         # Required for compilation
-        self._compiler = configuration['compiler']
+        self._compiler = config['compiler']
         self._lib = None
         self._cfunction = None
+        self._compiling = None
+
+        # Serializes the lazy, one-off, initialization steps (e.g., loading the
+        # JIT-compiled code) of concurrent calls to apply()
+        self._lock = threading.RLock()
+
+        # Binding plans for apply-time arguments, see _bind()
+        self._bindings = {}
 
-        # Set the direction of time acoording to the given TimeAxis
-        time.reverse = time_axis == Backward
+        # Profiling of the construction pipeline
+        self.build_profile = profile = BuildProfile()
+        profile.metadata.update([('name', self.name), ('dse', self.dse_mode),
+                                 ('dle', self.dle_mode[0]),
+                                 ('timestamp', datetime.now().isoformat())])
 
         # Expression lowering
-        expressions = [indexify(s) for s in expressions]
-        expressions = [s.xreplace(subs) for s in expressions]
+        with profile.stage('indexify', expressions) as stage:
+            expressions = [indexify(s) for s in expressions]
+            expressions = [s.xreplace(subs) for s in expressions]
+            expressions, codecs = compress(expressions)
+            stage.output = expressions
+
+        # C definitions of the compression codecs, if any
+        codecs = filter_ordered(codecs, key=attrgetter('name'))
+        self._globals.extend([i.cdef for i in codecs])
 
         # Analysis
-        self.dtype = self._retrieve_dtype(expressions)
-        self.input, self.output, self.dimensions = self._retrieve_symbols(expressions)
-        stencils = self._retrieve_stencils(expressions)
+        with profile.stage('analysis', expressions) as stage:
+            self.dtype = self._retrieve_dtype(expressions)
+            self.input, self.output, self.dimensions = self._retrieve_symbols(expressions)
+            stencils = self._retrieve_stencils(expressions)
+            stage.output = stencils
 
         # Parameters of the Operator (Dimensions necessary for data casts)
         parameters = self.input + [i for i in self.dimensions if not i.is_Fixed]
 
         # Group expressions based on their Stencil
-        clusters = clusterize(expressions, stencils)
+        with profile.stage('clusterize', expressions) as stage:
+            clusters = stage.output = clusterize(expressions, stencils)
 
         # Apply the Devito Symbolic Engine (DSE) for symbolic optimization
-        clusters = rewrite(clusters, mode=set_dse_mode(dse))
+        with profile.stage('dse', clusters) as stage:
+            clusters = stage.output = rewrite(clusters, mode=self.dse_mode)
 
         # Wrap expressions with Iterations according to dimensions
-        nodes = self._schedule_expressions(clusters)
+        with profile.stage('schedule', clusters) as stage:
+            nodes = self._schedule_expressions(clusters)
+            nodes = stage.output = self._restrict_time_range(nodes, parameters)
 
         # Introduce C-level profiling infrastructure
-        nodes, self.profiler = self._profile_sections(nodes, parameters)
+        with profile.stage('profile', nodes) as stage:
+            nodes, self.profiler = self._profile_sections(nodes, parameters)
+            stage.output = nodes
 
         # Resolve and substitute dimensions for loop index variables
-        subs = {}
-        nodes = ResolveIterationVariable().visit(nodes, subs=subs)
-        nodes = SubstituteExpression(subs=subs).visit(nodes)
+        with profile.stage('resolve', nodes) as stage:
+            subs = {}
+            nodes = ResolveIterationVariable().visit(nodes, subs=subs)
+            nodes = stage.output = SubstituteExpression(subs=subs).visit(nodes)
 
         # Apply the Devito Loop Engine (DLE) for loop optimization
-        dle_state = transform(nodes, *set_dle_mode(dle))
+        with profile.stage('dle', nodes) as stage:
+            dle_state = transform(nodes, *self.dle_mode, config=config)
+            stage.output = dle_state.nodes
 
         # Update the Operator state based on the DLE
         self.dle_arguments = dle_state.arguments
@@ -115,11 +173,20 @@ class Operator(Function):
                                 if isinstance(i.argument, Dimension)])
         self._includes.extend(list(dle_state.includes))
 
-        # Translate into backend-specific representation (e.g., GPU, Yask)
-        nodes = self._specialize(dle_state.nodes, parameters)
+        with profile.stage('specialize', dle_state.nodes) as stage:
+            # Introduce C-level profiling nodes within the parallel regions
+            nodes = self._profile_regions(dle_state.nodes)
+
+            # Translate into backend-specific representation (e.g., GPU, Yask)
+            nodes = stage.output = self._specialize(nodes, parameters)
 
         # Introduce all required C declarations
-        nodes = self._insert_declarations(nodes)
+        with profile.stage('declarations', nodes) as stage:
+            nodes = stage.output = self._insert_declarations(nodes)
+
+        debug("Operator <%s> built in %.2f s (%s)" %
+              (self.name, profile.total,
+               ', '.join('%s: %.2f s' % i for i in profile.timings.items())))
 
         # Finish instantiation
         super(Operator, self).__init__(self.name, nodes, 'int', parameters, ())
@@ -142,47 +209,119 @@ class Operator(Function):
                 # should have exactly one entry
                 assert(len(orig_param_l) == 1)
                 orig_param = orig_param_l[0]
-                # Pull out the children and add them to kwargs
+                # Pull out the children used by this Operator and add them to kwargs
                 for orig_child, new_child in zip(orig_param.children, v.children):
-                    new_params[orig_child.name] = new_child
+                    if orig_child in self.input:
+                        new_params[orig_child.name] = new_child
         kwargs.update(new_params)
 
-        # Derivation. It must happen in the order [tensors -> dimensions -> scalars]
-        for i in self.parameters:
-            if i.is_TensorArgument:
-                assert(i.verify(kwargs.pop(i.name, None)))
-        runtime_dimensions = [d for d in self.dimensions if d.value is not None]
-        for d in runtime_dimensions:
-            d.verify(kwargs.pop(d.name, None))
-        for i in self.parameters:
-            if i.is_ScalarArgument:
-                i.verify(kwargs.pop(i.name, None))
+        try:
+            # Derivation. It must happen in the order [tensors -> dimensions -> scalars]
+            for i in self.parameters:
+                if i.is_TensorArgument:
+                    assert(i.verify(kwargs.pop(i.name, None)))
+            runtime_dimensions = [d for d in self.dimensions if d.value is not None]
+            for d in runtime_dimensions:
+                d.verify(kwargs.pop(d.name, None))
+            for i in self.parameters:
+                if i.is_ScalarArgument:
+                    i.verify(kwargs.pop(i.name, None))
 
-        dim_sizes = OrderedDict([(d.name, d.value) for d in runtime_dimensions])
-        dle_arguments, autotune = self._dle_arguments(dim_sizes)
-        dim_sizes.update(dle_arguments)
+            dim_sizes = OrderedDict([(d.name, d.value) for d in runtime_dimensions])
+            dle_arguments, autotune = self._dle_arguments(dim_sizes)
+            dim_sizes.update(dle_arguments)
 
-        autotune = autotune and kwargs.pop('autotune', False)
+            autotune = autotune and kwargs.pop('autotune', False)
 
-        # Make sure we've used all arguments passed
-        if len(kwargs) > 0:
-            raise InvalidArgument("Unknown arguments passed: " + ", ".join(kwargs.keys()))
+            # Make sure we've used all arguments passed
+            if len(kwargs) > 0:
+                raise InvalidArgument("Unknown arguments passed: " +
+                                      ", ".join(kwargs.keys()))
 
-        mapper = OrderedDict([(d.name, d) for d in self.dimensions])
-        for d, v in dim_sizes.items():
-            assert(mapper[d].verify(v))
+            mapper = OrderedDict([(d.name, d) for d in self.dimensions])
+            for d, v in dim_sizes.items():
+                assert(mapper[d].verify(v))
 
-        arguments = self._default_args()
+            if self._time_iteration is not None:
+                dim_sizes.update(self._time_range(dim_sizes))
+
+            arguments = self._default_args()
+        finally:
+            # Clear the temp values we stored in the arg objects since we've pulled
+            # them out into the OrderedDict object above (or failed to)
+            self._reset_args()
 
         if autotune:
             arguments = self._autotune(arguments)
 
-        # Clear the temp values we stored in the arg objects since we've pulled them out
-        # into the OrderedDict object above
-        self._reset_args()
-
         return arguments, dim_sizes
 
+    def _bind(self, **kwargs):
+        """
+        Fast-path version of :meth:`arguments`, returning the runtime arguments
+        as a list ready to be passed to :attr:`cfunction` and the dimension sizes.
+
+        The first time a given set of apply-time arguments (names, types and
+        shapes of the data objects, values of the scalars) is seen, the
+        arguments are derived and verified through :meth:`arguments`, and a
+        :class:`BindingPlan` is stored. Subsequent calls matching the plan only
+        patch the slots of the data objects, the user-provided ones as well as
+        the default ones, whose buffers may have since been replaced (e.g.,
+        by :meth:`DenseData.share`).
+        """
+        key = binding_key(kwargs)
+        plan = self._bindings.get(key) if key is not None else None
+        if plan is None:
+            arguments, dim_sizes = self.arguments(**kwargs)
+            if key is None:
+                return list(arguments.values()), dim_sizes
+            patches = [(n, i.name) for n, i in enumerate(self.parameters)
+                       if isinstance(kwargs.get(i.name), (np.ndarray, SymbolicData))]
+            providers = [(n, i.provider) for n, i in enumerate(self.parameters)
+                         if i.is_TensorArgument and i.name not in kwargs and
+                         getattr(i.provider, 'is_SymbolicData', False)]
+            plan = BindingPlan(list(arguments.values()), dim_sizes, patches,
+                               providers)
+            self._bindings[key] = plan
+
+        values = list(plan.values)
+        for n, name in plan.patches:
+            value = kwargs[name]
+            if getattr(value, 'is_SymbolicData', False):
+                value = value._data_buffer
+            values[n] = value
+        for n, provider in plan.providers:
+            values[n] = provider._data_buffer
+        return values, plan.dim_sizes
+
+    def _time_range(self, dim_sizes):
+        """
+        Derive the values of ``time_s`` and ``time_e``, the first and the last
+        (excluded) timesteps computed by this Operator. Unless provided at
+        apply-time, they are set so that the whole iteration space of the
+        time dimension is computed.
+        """
+        iteration = self._time_iteration
+        dim = iteration.dim.parent if iteration.dim.is_Buffered else iteration.dim
+        defaults = iteration.bounds(finish=dim_sizes.get(dim.name))
+
+        time_range = OrderedDict()
+        for i, default in zip(self._time_arguments, defaults):
+            if i.value is None and not i.verify(default):
+                error('Unable to derive %s from defaults. '
+                      'Please provide an explicit value.' % i.name)
+                raise InvalidArgument('Unknown time range')
+            time_range[i.name] = i.value
+
+        time_s, time_e = time_range.values()
+        start, finish = defaults
+        if time_s > time_e or time_s < start or \
+                (finish is not None and time_e > finish):
+            error('Illegal time range [%d, %d), the time dimension may only be '
+                  'iterated within [%d, %s)' % (time_s, time_e, start, finish))
+            raise InvalidArgument('Illegal time range')
+        return time_range
+
     def _default_args(self):
         return OrderedDict([(x.name, x.value) for x in self.parameters])
 
@@ -198,6 +337,9 @@ class Operator(Function):
         dle_arguments = OrderedDict()
         autotune = True
         for i in self.dle_arguments:
+            if not isinstance(i, BlockingArg):
+                # Not a dimension size, so nothing to derive
+                continue
             dim_size = dim_sizes.get(i.original_dim.name,
                                      i.original_dim.size if i.original_dim.is_Fixed
                                      else None)
@@ -215,6 +357,89 @@ class Operator(Function):
                 dle_arguments[i.argument.name] = dim_size
         return dle_arguments, autotune
 
+    @classmethod
+    def _cache_key(cls, expressions, **kwargs):
+        """
+        Return a key identifying the Operator that ``cls`` would generate out of
+        the given input, or None if the Operator must not be cached.
+
+        Inputs that only differ in the identity of the :class:`SymbolicData`
+        and :class:`Dimension` objects they contain, but not in their type,
+        name, shape, data type and compression codec, share the same key, as
+        they are lowered into the very same code.
+        """
+        expressions = as_tuple(expressions)
+        config = kwargs.pop("config", None) or configuration.snapshot()
+        if not config['operator_cache'] or\
+                any(not isinstance(i, sympy.Eq) for i in expressions):
+            return None
+
+        functions, dimensions = retrieve_structure(expressions)
+        time_axis = kwargs.get("time_axis", Forward)
+
+        dse = set_dse_mode(kwargs.pop("dse", config['dse']))
+        dle, options = set_dle_mode(kwargs.pop("dle", config['dle']))
+        subs = sorted((sympy.srepr(k), sympy.srepr(v))
+                      for k, v in kwargs.pop("subs", {}).items())
+        kwargs["time_axis"] = time_axis == Backward
+
+        key = [cls, tuple(sympy.srepr(i) for i in expressions), dse, dle,
+               str(sorted(options.items())), tuple(subs), str(sorted(kwargs.items()))]
+        key.extend((type(i).__mro__[1], i.name, i.shape, i.dtype,
+                    tuple(d.name for d in i.indices), getattr(i, 'codec', None))
+                   for i in functions.values())
+        key.extend((type(i), i.name, i.size, getattr(i, 'modulo', None),
+                    is_reversed(i, time_axis)) for i in dimensions.values())
+        key.extend([config['backend'], config['openmp'],
+                    config['profiling'], config['profiling_counters'],
+                    config['profiling_report'], config['profiling_roofline'],
+                    config['autotuning'], config['autotuning_db'],
+                    str(sorted(config['dle_options'].items())),
+                    config['compiler'].signature])
+        return tuple(key)
+
+    @classmethod
+    def _cache_get(cls, key, expressions, **kwargs):
+        """
+        Return an Operator previously generated out of an input sharing the
+        structural key ``key``, rebound to the objects in ``expressions``.
+        Return None if no such Operator exists.
+        """
+        cached = _OperatorCache.get(key) if key is not None else None
+        if cached is None:
+            return None
+
+        debug("Operator <%s> retrieved from cache" % cached.name)
+        return cached._rebind(*retrieve_structure(as_tuple(expressions)))
+
+    def _cache_put(self, key):
+        """Make the Operator retrievable by :meth:`_cache_get` through ``key``."""
+        if key is not None:
+            _OperatorCache[key] = self
+
+    def _rebind(self, functions, dimensions):
+        """
+        Return a shallow copy of the Operator, sharing the Iteration/Expression
+        tree and the JIT-compiled code, in which the symbolic objects are
+        replaced with the structurally identical ones in ``functions`` and
+        ``dimensions`` (mappers from names to objects).
+        """
+        mapper = OrderedDict(functions)
+        mapper.update(dimensions)
+
+        parameters = []
+        for i in self.parameters:
+            provider = mapper.get(i.provider.name, i.provider)
+            parameters.extend([j for j in provider.rtargs if j.name == i.name] or [i])
+
+        obj = copy(self)
+        obj.input = [mapper.get(i.name, i) for i in self.input]
+        obj.output = [mapper.get(i.name, i) for i in self.output]
+        obj.dimensions = [mapper.get(i.name, i) for i in self.dimensions]
+        obj.parameters = tuple(parameters)
+        obj._bindings = {}
+        return obj
+
     @property
     def elemental_functions(self):
         return tuple(i.root for i in self.func_table.values())
@@ -227,24 +452,73 @@ class Operator(Function):
         It is ensured that JIT compilation will only be performed once per
         :class:`Operator`, reagardless of how many times this method is invoked.
 
+        If ``configuration['jit_split']`` is set, each elemental function is
+        emitted to, and compiled as, a separate translation unit.
+
         :returns: The file name of the JIT-compiled function.
         """
         if self._lib is None:
             # No need to recompile if a shared object has already been loaded.
-            return jit_compile(self.ccode, self._compiler)
+            # Code generation and compilation are profiled as the last stages
+            # of the construction pipeline
+            profile = self.build_profile
+            if self.config['jit_split'] and any(i.local for i in
+                                                self.func_table.values()):
+                with profile.stage('codegen', self.body) as stage:
+                    code = self.ccode_units
+                    stage.output = '\n'.join(str(i) for i in code)
+                with profile.stage('compile', stage.output):
+                    return jit_compile_units(code, self._compiler)
+            with profile.stage('codegen', self.body) as stage:
+                code = stage.output = str(self.ccode)
+            with profile.stage('compile', code):
+                return jit_compile(code, self._compiler)
         else:
             return self._lib.name
 
+    def compile_async(self):
+        """
+        JIT-compile the C code generated by the Operator in the background.
+
+        Like :attr:`compile`, JIT compilation is performed only once per
+        :class:`Operator`, regardless of how many times this method is invoked.
+        Accessing :attr:`cfunction` (e.g., through ``apply()``) blocks until
+        the background compilation has completed.
+
+        :returns: A :class:`multiprocessing.pool.AsyncResult` (a future), whose
+                  ``get()`` method returns the file name of the JIT-compiled
+                  function, or raises if compilation failed.
+        """
+        if self._compiling is None:
+            self._compiling = jit_pool().apply_async(lambda: self.compile)
+        return self._compiling
+
+    @property
+    def ccode_units(self):
+        """Generate C code as a tuple of translation units, the first one
+        containing the kernel and each of the others one of the elemental
+        functions."""
+        return CGenUnits().visit(self)
+
     @property
     def cfunction(self):
         """Returns the JIT-compiled C function as a ctypes.FuncPtr object."""
+        if self._cfunction is not None:
+            return self._cfunction
+        with self._lock:
+            return self._load()
+
+    def _load(self):
         if self._lib is None:
-            basename = self.compile
+            if self._compiling is not None:
+                basename = self._compiling.get()
+            else:
+                basename = self.compile
             self._lib = load(basename, self._compiler)
             self._lib.name = basename
 
         if self._cfunction is None:
-            self._cfunction = getattr(self._lib, self.name)
+            cfunction = getattr(self._lib, self.name)
             # Associate a C type to each argument for runtime type check
             argtypes = []
             for i in self.parameters:
@@ -254,7 +528,8 @@ class Operator(Function):
                     argtypes.append(np.ctypeslib.ndpointer(dtype=i.dtype, flags='C'))
                 else:
                     argtypes.append(ctypes.c_void_p)
-            self._cfunction.argtypes = argtypes
+            cfunction.argtypes = argtypes
+            self._cfunction = cfunction
 
         return self._cfunction
 
@@ -262,6 +537,11 @@ class Operator(Function):
         """Introduce C-level profiling nodes within the Iteration/Expression tree."""
         return List(body=nodes), None
 
+    def _profile_regions(self, nodes):
+        """Introduce C-level profiling nodes within the parallel regions
+        generated by the DLE."""
+        return nodes
+
     def _autotune(self, arguments):
         """Use auto-tuning on this Operator to determine empirically the
         best block sizes when loop blocking is in use."""
@@ -286,6 +566,7 @@ class Operator(Function):
             # Build the Expression objects to be inserted within an Iteration tree
             expressions = [Expression(v, np.int32 if i.trace.is_index(k) else self.dtype)
                            for k, v in i.trace.items()]
+            expressions = guard_subsampled(expressions)
 
             if not i.stencil.empty:
                 root = None
@@ -304,7 +585,8 @@ class Operator(Function):
                 needed = entries[index:]
 
                 # Build and insert the required Iterations
-                iters = [Iteration([], j.dim, j.dim.symbolic_size, offsets=j.ofs)
+                iters = [Iteration([], j.dim, j.dim.symbolic_size, offsets=j.ofs,
+                                   reverse=is_reversed(j.dim, self.time_axis))
                          for j in needed]
                 body, tree = compose_nodes(iters + [expressions], retrieve=True)
                 scheduling = OrderedDict(zip(needed, tree))
@@ -329,6 +611,33 @@ class Operator(Function):
 
         return List(body=processed)
 
+    def _restrict_time_range(self, nodes, parameters):
+        """
+        Make the range of timesteps computed by the Operator a runtime argument,
+        as the iteration space ``[time_s, time_e)`` of the Iterations over the
+        time dimension. This allows applying the Operator over any window of
+        timesteps, for example to resume a computation from a checkpoint.
+
+        Nothing is done if the Iterations over the time dimension do not share
+        the same iteration space.
+        """
+        iterations = [i for i in FindNodes(Iteration).visit(nodes)
+                      if time in (i.dim, getattr(i.dim, 'parent', None))]
+        self._time_iteration = None
+        if not iterations or \
+                len(set((tuple(i.limits), tuple(i.offsets)) for i in iterations)) > 1:
+            return nodes
+        self._time_iteration = iterations[0]
+
+        time_arguments = [Parameter('%s_%s' % (time.name, i), np.int32, None)
+                          for i in ['s', 'e']]
+        parameters.extend(time_arguments)
+        self._time_arguments = [i.rtargs[0] for i in time_arguments]
+
+        limits = [sympy.Symbol(i.name) for i in time_arguments] + [1]
+        mapper = {i: i._rebuild(limits=limits, offsets=None) for i in iterations}
+        return Transformer(mapper).visit(nodes)
+
     def _specialize(self, nodes, parameters):
         """Transform the Iteration/Expression tree into a backend-specific
         representation, such as code to be executed on a GPU or through a
@@ -389,7 +698,9 @@ class Operator(Function):
         is no common data type (ie, if at least one expression differs in the
         data type).
         """
-        lhss = set([s.lhs.base.function.dtype for s in expressions])
+        # Compressed data objects are computed in single precision
+        lhss = set([np.float32 if getattr(s.lhs.base.function, 'codec', None)
+                    else s.lhs.base.function.dtype for s in expressions])
         if len(lhss) != 1:
             raise RuntimeError("Expression types mismatch.")
         return lhss.pop()
@@ -397,6 +708,17 @@ class Operator(Function):
     def _retrieve_stencils(self, expressions):
         """Determine the :class:`Stencil` of each provided expression."""
         stencils = [Stencil(i) for i in expressions]
+
+        # Subsampled dimensions are iterated along with their parent, and their
+        # offsets have no impact on the iteration space of the parent
+        for n, i in enumerate(list(stencils)):
+            if any(d.is_Subsampled for d in i.dimensions):
+                stencils[n] = Stencil()
+                for d, v in i.items():
+                    if d.is_Subsampled:
+                        d, v = d.parent, {0}
+                    stencils[n][d] |= v
+
         dimensions = set.union(*[set(i.dimensions) for i in stencils])
 
         # Filter out aliasing buffered dimensions
@@ -413,7 +735,7 @@ class Operator(Function):
         Retrieve the symbolic functions read or written by the Operator,
         as well as all traversed dimensions.
         """
-        terms = flatten(retrieve_terminals(i) for i in expressions)
+        terms = flatten(retrieve_terminals(i, deep=True) for i in expressions)
 
         input = []
         for i in terms:
@@ -432,7 +754,8 @@ class Operator(Function):
                 dimensions.extend([k for k in i.free_symbols
                                    if isinstance(k, Dimension)])
             dimensions.extend(list(indexed.base.function.indices))
-        dimensions.extend([d.parent for d in dimensions if d.is_Buffered])
+        dimensions.extend([d.parent for d in dimensions
+                           if d.is_Buffered or d.is_Subsampled])
         dimensions = filter_sorted(dimensions, key=attrgetter('name'))
 
         return input, output, dimensions
@@ -448,33 +771,110 @@ class OperatorRunnable(Operator):
         self.apply(**kwargs)
 
     def apply(self, **kwargs):
-        """Apply the stencil kernel to a set of data objects"""
+        """
+        Apply the stencil kernel to a set of data objects.
+
+        The timesteps computed may be restricted to ``[time_s, time_e)``, within
+        the iteration space of the time dimension, by passing ``time_s`` and/or
+        ``time_e``.
+
+        Several calls may run concurrently, in different threads, as each of
+        them derives its arguments and records its timings independently.
+        """
         # Build the arguments list to invoke the kernel function
-        arguments, dim_sizes = self.arguments(**kwargs)
+        arguments, dim_sizes = self._bind(**kwargs)
+
+        # Each run gets its own timers
+        timers = self.profiler.allocate(dim_sizes)
+        for n, i in enumerate(self.parameters):
+            if i.name == self.profiler.varname:
+                arguments[n] = ctypes.byref(timers.struct)
 
         # Invoke kernel function with args
-        self.cfunction(*list(arguments.values()))
+        self.cfunction(*arguments)
 
         # Output summary of performance achieved
-        return self._profile_output(dim_sizes)
+        return self._profile_output(dim_sizes, arguments, timers)
 
-    def _profile_output(self, dim_sizes):
-        """Return a performance summary of the profiled sections."""
-        summary = self.profiler.summary(dim_sizes, self.dtype)
+    def _profile_output(self, dim_sizes, arguments=None, timers=None):
+        """
+        Return a performance summary of the profiled sections. If the
+        ``profiling_report`` of the Operator's configuration is set, the
+        summary is also appended to the file it points to.
+
+        :param dim_sizes: The run-time extent of each :class:`Dimension`.
+        :param arguments: (Optional) the values passed to the kernel, in the
+                          same order as ``self.parameters``.
+        :param timers: (Optional) the :class:`Timers` of the run. Defaults to
+                       those of the Profiler.
+        """
+        summary = self.profiler.summary(dim_sizes, self.dtype, timers, self.config)
+        summary.metadata.update(self._profile_metadata(arguments))
         with bar():
             for k, v in summary.items():
                 name = '%s<%s>' % (k, ','.join('%d' % i for i in v.itershape))
-                info("Section %s with OI=%.2f computed in %.3f s [Perf: %.2f GFlops/s]" %
-                     (name, v.oi, v.time, v.gflopss))
+                if v.roofline is None:
+                    perf = "%.2f GFlops/s" % v.gflopss
+                else:
+                    perf = "%.2f GFlops/s, %.0f%% of roofline" % (v.gflopss, v.roofline)
+                info("Section %s with OI=%.2f computed in %.3f s [Perf: %s]" %
+                     (name, v.oi, v.time, perf))
+                if k not in summary.details:
+                    continue
+                steps, threads, counters = summary.details[k]
+                if steps.size > 0:
+                    info("  %d steps, min/avg/max: %.3g/%.3g/%.3g s" %
+                         (steps.size, steps.min(), steps.mean(), steps.max()))
+                if threads.size > 1:
+                    info("  %d threads, imbalance (max/avg): %.2f" %
+                         (threads.size, threads.max()/threads.mean()))
+                if counters:
+                    info("  %s" % ', '.join('%s=%d' % i for i in counters.items()))
+        if self.config['profiling_report']:
+            summary.save(self.config['profiling_report'])
         return summary
 
+    def _profile_metadata(self, arguments=None):
+        """
+        Return the information characterizing a run of the Operator, to be
+        attached to its performance summary.
+        """
+        metadata = OrderedDict()
+        metadata['name'] = self.name
+        metadata['timestamp'] = datetime.now().isoformat()
+        metadata['hostname'] = platform.node()
+        metadata['dse'] = self.dse_mode
+        metadata['dle'] = self.dle_mode[0]
+        metadata['dle_options'] = OrderedDict(sorted(self.dle_mode[1].items()))
+        metadata['compiler'] = self._compiler.__class__.__name__
+        metadata['cc_version'] = self._compiler.cc_version
+        metadata['cflags'] = ' '.join(self._compiler.cflags)
+        metadata['ldflags'] = ' '.join(self._compiler.ldflags)
+        metadata['openmp'] = self.config['openmp']
+        # The block sizes and OpenMP parameters, possibly auto-tuned
+        providers = [i.argument for i in self.dle_arguments]
+        metadata['dle_arguments'] = OrderedDict(
+            [(i.name, int(v)) for i, v in zip(self.parameters, arguments or [])
+             if i.provider in providers]
+        )
+        basename = getattr(self._lib, 'name', None)
+        metadata['ccode_hash'] = path.basename(basename) if basename else None
+        return metadata
+
     def _profile_sections(self, nodes, parameters):
         """Introduce C-level profiling nodes within the Iteration/Expression tree."""
-        nodes, profiler = create_profile(nodes)
+        nodes, profiler = create_profile(nodes, self.config)
+        self._includes.extend(profiler.includes)
         self._globals.append(profiler.cdef)
+        self._globals.extend(profiler.cglobals)
         parameters.append(Object(profiler.varname, profiler.dtype, profiler.setup()))
         return nodes, profiler
 
+    def _profile_regions(self, nodes):
+        """Introduce C-level profiling nodes within the parallel regions
+        generated by the DLE."""
+        return self.profiler.instrument(nodes)
+
 
 # Misc helpers
 
@@ -485,6 +885,16 @@ Metadata for functions called by an Operator. ``local = True`` means that
 the function was generated by Devito itself.
 """
 
+BindingPlan = namedtuple('BindingPlan', 'values dim_sizes patches providers')
+"""
+Runtime arguments of an Operator, as derived for a given set of apply-time
+arguments. ``patches`` is a list of ``(index, name)`` pairs, indicating which
+entries in ``values`` must be replaced by the data object passed as ``name``.
+``providers`` is a list of ``(index, data object)`` pairs, indicating which
+entries in ``values`` must be replaced by the current buffer of the default
+data objects, i.e. those not passed at apply-time.
+"""
+
 
 def set_dse_mode(mode):
     """
@@ -515,3 +925,91 @@ def set_dle_mode(mode):
         elif len(mode) == 2 and isinstance(mode[1], dict):
             return mode
     raise TypeError("Illegal DLE mode %s." % str(mode))
+
+
+def is_reversed(dimension, time_axis):
+    """
+    Return True if ``dimension`` is traversed backwards by an :class:`Operator`
+    advancing along ``time_axis``. The direction of ``time``, and of the
+    :class:`Dimension` objects derived from it, is dictated by ``time_axis``,
+    while any other Dimension retains its own direction.
+    """
+    if time in (dimension, getattr(dimension, 'parent', None)):
+        return time_axis == Backward
+    return dimension.reverse
+
+
+def guard_subsampled(expressions):
+    """
+    Wrap the tensor :class:`Expression` objects accessing data along a
+    subsampled :class:`Dimension`, directly or through scalar temporaries,
+    within :class:`Conditional` objects, so that they are only executed at the
+    points of the parent Dimension that are sampled, e.g. ``if (time % 4 == 0)``.
+    """
+    processed = []
+    guards = {}
+    for e in expressions:
+        subsampled = set(d for d in e.dimensions if d.is_Subsampled)
+        subsampled.update(*[guards[i] for i in e.expr.rhs.free_symbols if i in guards])
+        if e.is_scalar and subsampled:
+            # Scalar temporaries are declared in the scope they are computed in,
+            # so they are computed unconditionally
+            guards[e.output] = subsampled
+            subsampled = set()
+        if not subsampled:
+            processed.append(e)
+            continue
+
+        condition = sympy.And(*[sympy.Eq(sympy.Mod(sympy.Symbol(d.parent.name),
+                                                   d.factor), 0)
+                                for d in sorted(subsampled, key=attrgetter('name'))])
+        if processed and processed[-1].is_Conditional and \
+                processed[-1].condition == condition:
+            processed[-1] = Conditional(condition, processed[-1].then_body + (e,))
+        else:
+            processed.append(Conditional(condition, e))
+    return processed
+
+
+def binding_key(kwargs):
+    """
+    Return a key identifying the :class:`BindingPlan` suitable for the
+    apply-time arguments ``kwargs``, or None if the arguments must be
+    derived from scratch.
+    """
+    key = []
+    for k, v in sorted(kwargs.items()):
+        if isinstance(v, CompositeData) or (k == 'autotune' and v):
+            return None
+        elif isinstance(v, (np.ndarray, SymbolicData)):
+            key.append((k, v.shape, v.dtype))
+        else:
+            try:
+                hash(v)
+            except TypeError:
+                return None
+            # The value itself, rather than its hash, so that distinct values
+            # never share a plan
+            key.append((k, type(v), v))
+    return tuple(key)
+
+
+def retrieve_structure(expressions):
+    """
+    Retrieve the symbolic functions and the dimensions appearing in
+    ``expressions``, as two mappers from names to objects.
+    """
+    functions = OrderedDict()
+    dimensions = OrderedDict()
+    for expr in expressions:
+        for i in sympy.preorder_traversal(expr):
+            function = getattr(i, 'function', None)
+            if isinstance(function, AbstractSymbol):
+                functions[function.name] = function
+                dimensions.update([(d.name, d) for d in function.indices])
+            elif isinstance(i, Dimension):
+                dimensions[i.name] = i
+    for i in list(dimensions.values()):
+        if i.is_Buffered or i.is_Subsampled:
+            dimensions[i.parent.name] = i.parent
+    return functions, dimensions
@@ -1,6 +1,6 @@
 """The parameters dictionary contains global parameter settings."""
 
-from collections import OrderedDict
+from collections import Mapping, OrderedDict
 from os import environ
 
 __all__ = ['configuration', 'init_configuration']
@@ -47,7 +47,8 @@ class Parameters(OrderedDict):
         """
         Add a new parameter ``key`` with default value ``value``.
 
-        Associate ``key`` with a list of ``accepted`` values.
+        Associate ``key`` with a list of ``accepted`` values. If ``accepted``
+        is None, any value is accepted.
 
         If provided, make sure ``callback`` is executed when the value of ``key``
         changes.
@@ -74,6 +75,36 @@ class Parameters(OrderedDict):
         for k, v in self.items():
             self._updated(k, v)
 
+    def snapshot(self):
+        """
+        Return an immutable copy of the current parameters. This is the local
+        context that objects built over time (e.g., an Operator) should read
+        from, so that they are unaffected by concurrent changes to ``self``.
+        """
+        return Snapshot(self)
+
+
+class Snapshot(Mapping):
+    """
+    A read-only copy of a :class:`Parameters` dictionary, see
+    :meth:`Parameters.snapshot`.
+    """
+
+    def __init__(self, parameters):
+        self._mapper = OrderedDict(parameters.items())
+
+    def __getitem__(self, key):
+        return self._mapper[key]
+
+    def __iter__(self):
+        return iter(self._mapper)
+
+    def __len__(self):
+        return len(self._mapper)
+
+    def __repr__(self):
+        return 'Snapshot(%s)' % dict(self._mapper)
+
 
 configuration = Parameters("Devito-Configuration")
 """The Devito configuration parameters."""
@@ -81,6 +112,8 @@ configuration = Parameters("Devito-Configuration")
 env_vars_mapper = {
     'DEVITO_ARCH': 'compiler',
     'DEVITO_AUTOTUNING': 'autotuning',
+    'DEVITO_AUTOTUNING_DB': 'autotuning_db',
+    'DEVITO_AUTOTUNING_RETUNE': 'autotuning_retune',
     'DEVITO_BACKEND': 'backend',
     'DEVITO_DSE': 'dse',
     'DEVITO_DLE': 'dle',
@@ -88,8 +121,21 @@ env_vars_mapper = {
     'DEVITO_OPENMP': 'openmp',
     'DEVITO_LOGGING': 'log_level',
     'DEVITO_FIRST_TOUCH': 'first_touch',
+    'DEVITO_MMAP_DIR': 'mmap_dir',
+    'DEVITO_MMAP_ADVICE': 'mmap_advice',
     'DEVITO_TRAVIS_TEST': 'travis_test',
     'DEVITO_DEBUG_COMPILER': 'debug_compiler',
+    'DEVITO_JIT_CACHE': 'jit_cache',
+    'DEVITO_JIT_CACHE_DIR': 'jit_cache_dir',
+    'DEVITO_JIT_CACHE_SIZE': 'jit_cache_size',
+    'DEVITO_JIT_SPLIT': 'jit_split',
+    'DEVITO_JIT_ASYNC': 'jit_async',
+    'DEVITO_OPERATOR_CACHE': 'operator_cache',
+    'DEVITO_PROFILING': 'profiling',
+    'DEVITO_PROFILING_COUNTERS': 'profiling_counters',
+    'DEVITO_PROFILING_REPORT': 'profiling_report',
+    'DEVITO_PROFILING_ROOFLINE': 'profiling_roofline',
+    'DEVITO_PROFILING_BUILD': 'profiling_build',
 }
 
 
@@ -126,7 +172,7 @@ def init_configuration():
                 except (TypeError, ValueError):
                     keys[i] = j
         accepted = configuration._accepted[k]
-        if any(i not in accepted for i in keys):
+        if accepted is not None and any(i not in accepted for i in keys):
             raise ValueError("Illegal configuration parameter (%s, %s). "
                              "Accepted: %s" % (k, v, str(accepted)))
         if len(keys) == len(values):
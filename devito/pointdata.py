@@ -1,15 +1,20 @@
 from collections import OrderedDict
 
-from sympy import Eq, Function, Matrix, symbols
+import numpy as np
+from sympy import Eq, Function, Matrix, lambdify, symbols
 
 from devito.cgen_utils import INT, FLOAT
-from devito.dimension import d, p, t, time, x, y, z
+from devito.dimension import Dimension, d, p, shot, t, time, x, y, z
 from devito.dse.inspection import indexify, retrieve_indexed
 from devito.interfaces import DenseData, CompositeData
 from devito.logger import error
+from devito.tools import as_tuple
 
 __all__ = ['PointData']
 
+# Dimension for the corners of the grid cell enclosing a sparse point
+corner = Dimension('corner')
+
 
 class PointData(CompositeData):
     """
@@ -21,6 +26,19 @@ class PointData(CompositeData):
     :param ndim: Dimension of the coordinate data, eg. 2D or 3D
     :param coordinates: Optional coordinate data for the sparse points
     :param dtype: Data type of the buffered data
+    :param nshots: (Optional) Number of independent shots, each having its own
+                   set of ``npoint`` points. If provided, the point data has
+                   shape ``(nt, nshots, npoint)`` and the coordinates have
+                   shape ``(nshots, npoint, ndim)``. Such point data is meant
+                   to be injected into, or interpolated from, a
+                   :class:`TimeData` with the same number of shots.
+
+    By default, the code generated by :meth:`interpolate` and :meth:`inject`
+    computes, for each point and at each timestep, the indices of the grid
+    cell enclosing the point and the interpolation coefficients. As the
+    coordinates do not change during a run, these can instead be computed
+    once through :meth:`precompute`, in which case the generated code simply
+    reads them from the ``gridpoints`` and ``weights`` tables.
     """
 
     is_PointData = True
@@ -30,25 +48,46 @@ class PointData(CompositeData):
             self.nt = kwargs.get('nt')
             self.npoint = kwargs.get('npoint')
             self.ndim = kwargs.get('ndim')
-            kwargs['shape'] = (self.nt, self.npoint)
+            self.nshots = kwargs.get('nshots', None)
+            kwargs['shape'] = self._shape(**kwargs)
             super(PointData, self).__init__(self, *args, **kwargs)
 
             # Allocate and copy coordinate data
             self.coordinates = DenseData(name='%s_coords' % self.name,
-                                         dimensions=[self.indices[1], d],
-                                         shape=(self.npoint, self.ndim))
+                                         dimensions=self.point_dimensions + [d],
+                                         shape=self.shape[1:] + (self.ndim,))
             self._children.append(self.coordinates)
             coordinates = kwargs.get('coordinates', None)
             if coordinates is not None:
                 self.coordinates.data[:] = coordinates[:]
 
+            # Precomputed grid indices and interpolation weights, see precompute()
+            self.gridpoints = DenseData(name='%s_gridpoints' % self.name,
+                                        dimensions=self.point_dimensions + [d],
+                                        shape=self.shape[1:] + (self.ndim,),
+                                        dtype=np.int32)
+            self.weights = DenseData(name='%s_weights' % self.name,
+                                     dimensions=self.point_dimensions + [corner],
+                                     shape=self.shape[1:] + (2**self.ndim,),
+                                     dtype=self.dtype)
+            self._children.extend([self.gridpoints, self.weights])
+            self.precomputed = False
+
     def __new__(cls, *args, **kwargs):
-        nt = kwargs.get('nt')
-        npoint = kwargs.get('npoint')
-        kwargs['shape'] = (nt, npoint)
+        kwargs['shape'] = cls._shape(**kwargs)
 
         return DenseData.__new__(cls, *args, **kwargs)
 
+    @classmethod
+    def _shape(cls, **kwargs):
+        """Return the shape of the point data, that is ``(nt, npoint)``, or
+        ``(nt, nshots, npoint)`` for batched shots."""
+        nshots = kwargs.get('nshots', None)
+        if nshots is None:
+            return (kwargs.get('nt'), kwargs.get('npoint'))
+        else:
+            return (kwargs.get('nt'), nshots, kwargs.get('npoint'))
+
     @classmethod
     def _indices(cls, **kwargs):
         """Return the default dimension indices for a given data shape
@@ -57,7 +96,17 @@ class PointData(CompositeData):
         :return: indices used for axis.
         """
         dimensions = kwargs.get('dimensions', None)
-        return dimensions or [time, p]
+        if dimensions:
+            return dimensions
+        elif kwargs.get('nshots', None) is not None:
+            return [time, shot, p]
+        else:
+            return [time, p]
+
+    @property
+    def point_dimensions(self):
+        """The dimensions identifying a point, that is all dimensions but time"""
+        return list(self.indices[1:])
 
     @property
     def coefficients(self):
@@ -133,13 +182,17 @@ class PointData(CompositeData):
     @property
     def coordinate_symbols(self):
         """Symbol representing the coordinate values in each dimension"""
-        p_dim = self.indices[1]
-        return tuple([self.coordinates.indexify((p_dim, i))
+        p_dims = tuple(self.point_dimensions)
+        return tuple([self.coordinates.indexify(p_dims + (i,))
                       for i in range(self.ndim)])
 
     @property
     def coordinate_indices(self):
         """Symbol for each grid index according to the coordinates"""
+        if self.precomputed:
+            p_dims = tuple(self.point_dimensions)
+            return tuple([self.gridpoints.indexify(p_dims + (i,))
+                          for i in range(self.ndim)])
         indices = (x, y, z)
         return tuple([INT(Function('floor')(c / i.spacing))
                       for c, i in zip(self.coordinate_symbols, indices[:self.ndim])])
@@ -153,6 +206,64 @@ class PointData(CompositeData):
                                            self.coordinate_indices,
                                            indices[:self.ndim])])
 
+    @property
+    def interpolation_coefficients(self):
+        """Symbolic coefficient, for each corner of the grid cell enclosing the
+        point, of the interpolation, in terms of the point coordinates, or
+        read from the ``weights`` table if :meth:`precompute` was called."""
+        if self.precomputed:
+            p_dims = tuple(self.point_dimensions)
+            return tuple([self.weights.indexify(p_dims + (i,))
+                          for i in range(len(self.point_increments))])
+        subs = OrderedDict(zip(self.point_symbols, self.coordinate_bases))
+        return tuple([b.subs(subs) for b in self.coefficients])
+
+    def precompute(self, spacing):
+        """
+        Compute, once for all, the indices of the grid cell enclosing each
+        point and the corresponding interpolation weights. From then on,
+        :meth:`interpolate` and :meth:`inject` generate code that reads them
+        from the ``gridpoints`` and ``weights`` tables, rather than computing
+        them at each timestep. This method must be called again if the
+        coordinates change.
+
+        :param spacing: The grid spacing, either a single value or one value
+                        per dimension. It must match the spacing substituted
+                        into the Operator (``subs``).
+        """
+        spacing = as_tuple(spacing)
+        if len(spacing) == 1:
+            spacing = spacing*self.ndim
+        if len(spacing) != self.ndim:
+            raise ValueError("Expected %d spacing values, got %d" %
+                             (self.ndim, len(spacing)))
+
+        # Mimic the generated code, which computes in the data type of the points
+        coords = self.coordinates.data
+        h = np.array(spacing, dtype=coords.dtype)
+        indices = np.floor(coords / h)
+        bases = coords - indices*h
+
+        # Evaluate the very same coefficients used by the non-precomputed mode
+        dims = (x, y, z)[:self.ndim]
+        args = self.point_symbols[:self.ndim] + tuple(i.spacing for i in dims)
+        values = list(np.moveaxis(bases, -1, 0)) + list(h)
+        weights = lambdify(args, self.coefficients, 'numpy')(*values)
+
+        self.gridpoints.data[:] = indices.astype(np.int32)
+        self.weights.data[:] = np.stack(np.broadcast_arrays(*weights), axis=-1)
+        self.precomputed = True
+
+    def _index_grid(self, v, idx):
+        """Replace the space indices of the :class:`Indexed` ``v`` with ``idx``.
+        These are the last ``ndim`` indices, ignoring the ``shot`` dimension,
+        if any, which instead is left untouched."""
+        indices = list(v.indices)
+        space = [i for i, j in enumerate(v.base.function.indices) if j is not shot]
+        for i, j in zip(space[-self.ndim:], idx):
+            indices[i] = j
+        return v.base[indices]
+
     def interpolate(self, expr, offset=0, **kwargs):
         """Creates a :class:`sympy.Eq` equation for the interpolation
         of an expression onto this sparse point collection.
@@ -181,13 +292,10 @@ class PointData(CompositeData):
         # Generate index substituions for all grid variables
         idx_subs = []
         for i, idx in enumerate(index_matrix):
-            v_subs = [(v, v.base[v.indices[:-self.ndim] + idx])
-                      for v in variables]
+            v_subs = [(v, self._index_grid(v, idx)) for v in variables]
             idx_subs += [OrderedDict(v_subs)]
-        # Substitute coordinate base symbols into the coefficients
-        subs = OrderedDict(zip(self.point_symbols, self.coordinate_bases))
-        rhs = sum([expr.subs(vsub) * b.subs(subs)
-                   for b, vsub in zip(self.coefficients, idx_subs)])
+        rhs = sum([expr.subs(vsub) * b
+                   for b, vsub in zip(self.interpolation_coefficients, idx_subs)])
 
         # Apply optional time symbol substitutions to lhs of assignment
         lhs = self if p_t is None else self.subs(self.indices[0], p_t)
@@ -225,12 +333,12 @@ class PointData(CompositeData):
         # the sparse `PointData` types
         idx_subs = []
         for i, idx in enumerate(index_matrix):
-            v_subs = [(v, v.base[v.indices[:-self.ndim] + idx])
+            v_subs = [(v, self._index_grid(v, idx))
                       for v in variables if not v.base.function.is_PointData]
             idx_subs += [OrderedDict(v_subs)]
 
         # Substitute coordinate base symbols into the coefficients
         subs = OrderedDict(zip(self.point_symbols, self.coordinate_bases))
         return [Eq(field.subs(vsub),
-                   field.subs(vsub) + expr.subs(subs).subs(vsub) * b.subs(subs))
-                for b, vsub in zip(self.coefficients, idx_subs)]
+                   field.subs(vsub) + expr.subs(subs).subs(vsub) * b)
+                for b, vsub in zip(self.interpolation_coefficients, idx_subs)]
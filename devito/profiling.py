@@ -1,20 +1,64 @@
 from __future__ import absolute_import
 
+import csv
+import json
 import operator
 from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from ctypes import POINTER, Structure, byref, c_double, c_int, c_longlong
 from functools import reduce
-
-from ctypes import Structure, byref, c_double
-from cgen import Struct, Value
-
+from multiprocessing import cpu_count
+from os import environ, path, rename
+from platform import node
+from threading import Lock, current_thread
+from timeit import default_timer as timer
+from uuid import uuid4
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+import cgen as c
+import numpy as np
+from cgen import Pointer, Struct, Value
+
+from devito.compiler import get_jit_dir, jit_compile, load
+from devito.dimension import time
+from devito.logger import info
 from devito.dse import estimate_cost, estimate_memory
-from devito.nodes import Expression, TimedList
+from devito.nodes import Block, Expression, List, Node, TimedList
+from devito.parameters import configuration
+from devito.tools import as_tuple
 from devito.visitors import IsPerfectIteration, FindSections, FindNodes, Transformer
 
-__all__ = ['Profile', 'create_profile']
+__all__ = ['BuildProfile', 'Profile', 'Roofline', 'calibrate', 'create_profile']
+
+
+"""
+The hardware counters that can be collected in ``advanced`` profiling mode,
+through the Linux ``perf_event`` interface. Each counter name is mapped to the
+corresponding generic hardware event.
+"""
+perf_events = OrderedDict([
+    ('cycles', 'PERF_COUNT_HW_CPU_CYCLES'),
+    ('instructions', 'PERF_COUNT_HW_INSTRUCTIONS'),
+    ('cache_references', 'PERF_COUNT_HW_CACHE_REFERENCES'),
+    ('cache_misses', 'PERF_COUNT_HW_CACHE_MISSES'),
+    ('branch_instructions', 'PERF_COUNT_HW_BRANCH_INSTRUCTIONS'),
+    ('branch_misses', 'PERF_COUNT_HW_BRANCH_MISSES')
+])
+
+configuration.add('profiling', 'basic', ['basic', 'advanced'])
+configuration.add('profiling_counters', 'none', ['none'] + list(perf_events),
+                  lambda i: () if i == 'none' else as_tuple(i))
+configuration.add('profiling_report', None)
+configuration.add('profiling_roofline', 0, [0, 1], lambda i: bool(i))
+configuration.add('profiling_build', 'basic', ['basic', 'advanced'])
 
 
-def create_profile(node):
+def create_profile(node, config=None):
     """
     Create a :class:`Profiler` for the Iteration/Expression tree ``node``.
     The following code sections are profiled: ::
@@ -31,8 +75,15 @@ def create_profile(node):
           Both Iterations have dimension ``x``, and will be profiled as a single
           section, though their extent is different.
         * Any perfectly nested loops.
+
+    If ``configuration['profiling']`` is set to ``advanced``, the timers are
+    placed within the time loop, so that the time taken by each timestep is
+    also recorded, and the hardware counters in
+    ``configuration['profiling_counters']`` are collected. A snapshot of
+    ``configuration`` to be used instead may be provided as ``config``.
     """
-    profiler = Profiler()
+    config = config or configuration
+    profiler = Profiler(config['profiling'], config['profiling_counters'])
 
     # Group by root Iteration
     mapper = OrderedDict()
@@ -62,12 +113,17 @@ def create_profile(node):
         name = 'section_%d' % i
         section, remainder = group[0], group[1:]
 
-        index = len(section) > 1 and not IsPerfectIteration().visit(section[0])
+        index = int(len(section) > 1 and not IsPerfectIteration().visit(section[0]))
+        if profiler.is_advanced and index < len(section) - 1 and\
+                time in (section[index].dim, getattr(section[index].dim, 'parent', None)):
+            # Time each step of the time loop
+            index += 1
         root = section[index]
 
         # Prepare to transform the Iteration/Expression tree
         body = tuple(j[index] for j in group)
-        mapper[root] = TimedList(gname=profiler.varname, lname=name, body=body)
+        mapper[root] = TimedList(gname=profiler.varname, lname=name, body=body,
+                                 steps=profiler.is_advanced, counters=profiler.counters)
         for j in remainder:
             mapper[j[index]] = None
 
@@ -77,7 +133,7 @@ def create_profile(node):
         memory = estimate_memory([e.expr for e in expressions])
 
         # Keep track of the new profiled section
-        profiler.add(name, section, ops, memory)
+        profiler.add(name, section, ops, memory, section[:index])
 
     # Transform the Iteration/Expression tree introducing the C-level timers
     processed = Transformer(mapper).visit(node)
@@ -89,17 +145,44 @@ class Profiler(object):
 
     """
     A Profiler is used to manage profiling information for Devito generated C code.
+
+    :param mode: (Optional) the profiling mode, ``basic`` (default) or ``advanced``.
+                 In ``basic`` mode, only the time spent in each profiled section
+                 is measured. In ``advanced`` mode, also the time spent in each
+                 timestep, the time spent by each thread in the OpenMP parallel
+                 regions (to expose load imbalance) and, optionally, hardware
+                 counters are measured.
+    :param counters: (Optional) the hardware counters to be collected in
+                     ``advanced`` mode, as keys of ``perf_events``.
+
+    The measurements of a run are stored in a C-level Struct, along with the
+    buffers it references in ``advanced`` mode, wrapped by a :class:`Timers`.
+    Each run may use its own :class:`Timers` (see :meth:`allocate`), so that
+    concurrent runs do not interfere with each other.
     """
 
     varname = "timings"
     structname = "profile"
 
-    def __init__(self):
+    def __init__(self, mode='basic', counters=None):
+        self.mode = mode
+        self.counters = as_tuple(counters) if self.is_advanced else ()
+
         # To be populated as new sections are tracked
         self._sections = OrderedDict()
-        self._C_timings = None
+        self._outer = OrderedDict()
+
+        # The Timers used by default, see setup()
+        self._timers = None
 
-    def add(self, name, section, ops, memory):
+        # The hardware counters file descriptors, shared by all Timers
+        self._perf_fds = None
+
+    @property
+    def is_advanced(self):
+        return self.mode == 'advanced'
+
+    def add(self, name, section, ops, memory, outer=None):
         """
         Add a profiling section.
 
@@ -107,18 +190,70 @@ class Profiler(object):
         :param section: The code section, represented as a tuple of :class:`Iteration`s.
         :param ops: The number of floating-point operations in the section.
         :param memory: The memory traffic in the section, as bytes moved from/to memory.
+        :param outer: (Optional) the :class:`Iteration`s in ``section`` enclosing
+                      the C-level timer, that is those determining how many times
+                      the timer is executed.
         """
         self._sections[section] = Profile(name, ops, memory)
+        self._outer[name] = as_tuple(outer)
 
     def setup(self):
         """
-        Allocate and return a pointer to the timers C-level Struct, which includes
-        all timers added to ``self`` through ``self.add(...)``.
+        Allocate new :class:`Timers`, which become the default ones (i.e., those
+        read by :attr:`timings` and :meth:`summary`), and return a pointer to
+        their C-level Struct, which includes all timers added to ``self`` through
+        ``self.add(...)``.
+        """
+        self._timers = self.allocate()
+        return byref(self._timers.struct)
+
+    def allocate(self, dim_sizes=None):
         """
-        self._C_timings = self.dtype()
-        return byref(self._C_timings)
+        Allocate new, zeroed, :class:`Timers`.
 
-    def summary(self, dim_sizes, dtype):
+        :param dim_sizes: (Optional) The run-time extent of each :class:`Iteration`
+                          tracked by this Profiler. If provided, the Timers are
+                          also prepared for a run, see :meth:`prepare`.
+        """
+        timers = Timers(self.dtype())
+        if self.is_advanced:
+            # Generous, as the number of threads may be set at apply time
+            maxthreads = max(256, cpu_count(), int(environ.get('OMP_NUM_THREADS', 0)))
+            for i in self._sections.values():
+                timers.attach(i.name, 'threads', np.zeros(maxthreads, dtype=np.float64))
+                timers.attach(i.name, 'steps', np.zeros(0, dtype=np.float64))
+            if self.counters:
+                if self._perf_fds is None:
+                    # -2 means "not opened yet"; the C code opens them lazily
+                    self._perf_fds = np.full(len(self.counters), -2, dtype=np.int32)
+                timers.struct.perf_fds = self._perf_fds.ctypes.data_as(POINTER(c_int))
+            if dim_sizes is not None:
+                self.prepare(dim_sizes, timers)
+        return timers
+
+    def prepare(self, dim_sizes, timers=None):
+        """
+        In ``advanced`` mode, allocate the buffers recording the time taken by
+        each timestep, based on the run-time extent of each :class:`Iteration`.
+        Must be called before each run; only the steps of the last run are
+        recorded.
+
+        :param dim_sizes: The run-time extent of each :class:`Iteration` tracked
+                          by this Profiler.
+        :param timers: (Optional) The :class:`Timers` to be prepared. Defaults
+                       to those allocated by :meth:`setup`.
+        """
+        if not self.is_advanced:
+            return
+        timers = timers or self._timers
+        if timers is None:
+            raise RuntimeError("Cannot prepare a non-finalized Profiler.")
+        for name, outer in self._outer.items():
+            extents = [extent(i, dim_sizes) for i in outer]
+            nsteps = reduce(operator.mul, extents, 1) if None not in extents else 0
+            timers.attach(name, 'steps', np.zeros(nsteps, dtype=np.float64))
+
+    def summary(self, dim_sizes, dtype, timers=None, config=None):
         """
         Return a summary of the performance numbers measured.
 
@@ -127,17 +262,28 @@ class Profiler(object):
                           and the perfomance achieved in GFlops/s.
         :param dtype: The data type of the objects in the profiled sections. Used
                       to compute the operational intensity.
+        :param timers: (Optional) The :class:`Timers` of the run. Defaults to
+                       those allocated by :meth:`setup`.
+        :param config: (Optional) A snapshot of ``configuration`` to be used
+                       instead, e.g. that of the :class:`Operator` being run.
         """
+        config = config or configuration
+        timers = timers or self._timers
+        timings = self._timings(timers)
 
         summary = PerformanceSummary()
+        roofline = calibrate(config=config) if config['profiling_roofline'] else None
+        if roofline is not None:
+            summary.metadata['max_bw'] = roofline.bandwidth
+            summary.metadata['max_flops'] = roofline.flops
         for itspace, profile in self._sections.items():
             dims = {i: i.dim.parent if i.dim.is_Buffered else i.dim for i in itspace}
 
             # Time
-            time = self.timings[profile.name]
+            time = timings[profile.name]
 
             # Flops
-            itershape = [i.extent(finish=dim_sizes.get(dims[i].name)) for i in itspace]
+            itershape = [extent(i, dim_sizes) for i in itspace]
             iterspace = reduce(operator.mul, itershape)
             flops = float(profile.ops*iterspace)
             gflops = flops/10**9
@@ -151,12 +297,29 @@ class Profiler(object):
             # Derived metrics
             oi = flops/traffic
             gflopss = gflops/time
+            if roofline is not None:
+                # Percentage of the attainable performance at this OI
+                attainable = min(roofline.flops, roofline.bandwidth*oi)
+                peak = 100.*gflopss/attainable if attainable > 0 else None
+            else:
+                peak = None
 
             # Keep track of performance achieved
-            summary.setsection(profile.name, time, gflopss, oi, itershape, datashape)
+            summary.setsection(profile.name, time, gflopss, oi, itershape, datashape,
+                               peak)
+
+            # Keep track of the advanced metrics
+            if self.is_advanced:
+                name = profile.name
+                nsteps = getattr(timers.struct, '%s_nsteps' % name)
+                steps = timers.steps[name][:nsteps].copy()
+                threads = np.trim_zeros(timers.threads[name], 'b')
+                counters = OrderedDict([(k, getattr(timers.struct, '%s_%s' % (name, k)))
+                                        for k in self.counters])
+                summary.setdetails(name, steps, threads, counters)
 
         # Rename the most time consuming section as 'main'
-        summary['main'] = summary.pop(max(summary, key=summary.get))
+        summary.rename(max(summary, key=summary.get), 'main')
 
         return summary
 
@@ -165,10 +328,33 @@ class Profiler(object):
         """
         Return the timings, up to microseconds, as a dictionary.
         """
-        if self._C_timings is None:
+        return self._timings(self._timers)
+
+    def _timings(self, timers):
+        if timers is None:
             raise RuntimeError("Cannot extract timings with non-finalized Profiler.")
-        return {field: max(getattr(self._C_timings, field), 10**-6)
-                for field, _ in self._C_timings._fields_}
+        return {i.name: max(getattr(timers.struct, i.name), 10**-6)
+                for i in self._sections.values()}
+
+    @property
+    def _fields(self):
+        """
+        Return the fields of the profiler C type as (name, C type, ctypes type).
+        """
+        fields = []
+        for i in self._sections.values():
+            fields.append((i.name, 'double', c_double))
+            if self.is_advanced:
+                fields.extend([('%s_steps' % i.name, 'double*', POINTER(c_double)),
+                               ('%s_nsteps' % i.name, 'int', c_int),
+                               ('%s_maxsteps' % i.name, 'int', c_int),
+                               ('%s_threads' % i.name, 'double*', POINTER(c_double)),
+                               ('%s_maxthreads' % i.name, 'int', c_int)])
+                fields.extend([('%s_%s' % (i.name, k), 'long long', c_longlong)
+                               for k in self.counters])
+        if self.counters:
+            fields.append(('perf_fds', 'int*', POINTER(c_int)))
+        return fields
 
     @property
     def dtype(self):
@@ -176,7 +362,7 @@ class Profiler(object):
         Return the profiler C type in ctypes format.
         """
         return type(Profiler.structname, (Structure,),
-                    {"_fields_": [(i.name, c_double) for i in self._sections.values()]})
+                    {"_fields_": [(i, j) for i, _, j in self._fields]})
 
     @property
     def cdef(self):
@@ -185,17 +371,239 @@ class Profiler(object):
         (a ``struct``).
         """
         return Struct(Profiler.structname,
-                      [Value('double', i.name) for i in self._sections.values()])
+                      [Pointer(Value(j[:-1], i)) if j.endswith('*') else Value(j, i)
+                       for i, j, _ in self._fields])
 
+    @property
+    def cglobals(self):
+        """
+        Return the C-level definitions, besides the profiler data structure,
+        required by the generated code (e.g., to read the hardware counters).
+        """
+        if not self.counters:
+            return []
+        events = ', '.join(perf_events[i] for i in self.counters)
+        return [c.Line(perf_helpers % {'ncounters': len(self.counters),
+                                       'events': events})]
+
+    @property
+    def includes(self):
+        """
+        Return the header files required by the generated code.
+        """
+        if not self.counters:
+            return []
+        return ['string.h', 'unistd.h', 'sys/syscall.h', 'linux/perf_event.h']
 
-class PerformanceSummary(OrderedDict):
+    def instrument(self, nodes):
+        """
+        In ``advanced`` mode, add per-thread timers to the OpenMP parallel regions
+        within the profiled sections of the Iteration/Expression tree ``nodes``.
+
+        The last ``omp for`` loop in a parallel region is made ``nowait``, so that
+        the time a thread spends waiting for the others at the end of the region
+        (i.e., load imbalance) is not measured.
+        """
+        if not self.is_advanced:
+            return nodes
+
+        mapper = {}
+        for section in FindNodes(TimedList).visit(nodes):
+            name = section.name
+            for region in FindNodes(Block).visit(section):
+                if not any(isinstance(i, c.Pragma) and i.value.startswith('omp parallel')
+                           for i in region.header):
+                    continue
+                body = list(region.body)
+                if body and body[-1].is_Iteration:
+                    pragmas = [c.Pragma('%s nowait' % i.value)
+                               if i.value.startswith('omp for') else i
+                               for i in body[-1].pragmas]
+                    body[-1] = body[-1]._rebuild(pragmas=pragmas)
+                handle = {'gn': self.varname, 'ln': name}
+                header = [c.Line('#ifdef _OPENMP'),
+                          c.Statement('double tstart_%(ln)s = omp_get_wtime()' % handle),
+                          c.Line('#endif')]
+                footer = [c.Line('#ifdef _OPENMP'),
+                          c.Statement('int tid_%(ln)s = omp_get_thread_num()' % handle),
+                          c.If('tid_%(ln)s < %(gn)s->%(ln)s_maxthreads' % handle,
+                               c.Statement('%(gn)s->%(ln)s_threads[tid_%(ln)s] += '
+                                           'omp_get_wtime() - tstart_%(ln)s' % handle)),
+                          c.Line('#endif')]
+                timed = List(header=header, body=body, footer=footer)
+                mapper[region] = region._rebuild(body=timed)
+
+        return Transformer(mapper).visit(nodes)
+
+
+class Timers(object):
+
+    """
+    The C-level Struct of a :class:`Profiler`, storing the measurements of a
+    run, along with the buffers it references in ``advanced`` mode.
+    """
+
+    def __init__(self, struct):
+        self.struct = struct
+        self.steps = {}
+        self.threads = {}
+
+    def attach(self, name, field, buffer):
+        """Make the pointer ``<name>_<field>`` of the C-level Struct refer to
+        ``buffer``, and reset the associated counter/capacity."""
+        getattr(self, field)[name] = buffer
+        setattr(self.struct, '%s_%s' % (name, field),
+                buffer.ctypes.data_as(POINTER(c_double)))
+        setattr(self.struct, '%s_max%s' % (name, field), buffer.size)
+        if field == 'steps':
+            setattr(self.struct, '%s_nsteps' % name, 0)
+
+
+def extent(iteration, dim_sizes):
+    """
+    Return the run-time extent of ``iteration``, or None if unknown.
+
+    :param iteration: An :class:`Iteration`.
+    :param dim_sizes: The run-time extent of each :class:`Dimension`, by name,
+                      as well as the values of any symbolic loop limits.
+    """
+    dim = iteration.dim.parent if iteration.dim.is_Buffered else iteration.dim
+    start, finish = [str(i) for i in iteration.limits[:2]]
+    return iteration.extent(start=dim_sizes.get(start),
+                            finish=dim_sizes.get(finish, dim_sizes.get(dim.name)))
+
+
+class Report(OrderedDict):
+
+    """
+    A dictionary of structured entries (namedtuples), with the information
+    characterizing the entries as a whole stored in ``metadata``, which can be
+    exported to JSON or CSV files.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Report, self).__init__(*args, **kwargs)
+        self.metadata = OrderedDict()
+
+    @property
+    def records(self):
+        """
+        Return the entries as a list of flat dictionaries, one per entry, each
+        of which also includes ``metadata``.
+        """
+        records = []
+        for k, v in self.items():
+            record = OrderedDict(self.metadata)
+            record[self._keyname] = k
+            record.update(v._asdict())
+            records.append(record)
+        return records
+
+    def as_dict(self):
+        """
+        Return the entries as a (JSON-serializable) dictionary.
+        """
+        entries = OrderedDict([(k, OrderedDict(v._asdict())) for k, v in self.items()])
+        return OrderedDict([('metadata', self.metadata), (self._tablename, entries)])
+
+    def to_json(self, filename, append=True):
+        """
+        Write the entries to ``filename`` in JSON Lines format, that is one
+        JSON object (see :meth:`as_dict`) per line.
+
+        :param filename: The output file.
+        :param append: (Optional) if True (default), append to ``filename`` if
+                       it exists, so that the performance of multiple runs can
+                       be tracked in the same file.
+        """
+        with open(filename, 'a' if append else 'w') as f:
+            f.write(json.dumps(self.as_dict(), default=str) + '\n')
+
+    def to_csv(self, filename, append=True):
+        """
+        Write the entries to ``filename`` in CSV format, one row per entry (see
+        :attr:`records`). Non-scalar values are encoded as JSON.
+
+        :param filename: The output file.
+        :param append: (Optional) if True (default), append to ``filename`` if
+                       it exists, so that the performance of multiple runs can
+                       be tracked in the same file. The header is only written
+                       to new files.
+        """
+        records = self.records
+        if not records:
+            return
+        exists = append and path.exists(filename) and path.getsize(filename) > 0
+        with open(filename, 'a' if append else 'w') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            if not exists:
+                writer.writerow(list(records[0]))
+            for i in records:
+                writer.writerow([j if isinstance(j, (int, float, str)) or j is None
+                                 else json.dumps(j, default=str) for j in i.values()])
+
+    def save(self, filename, append=True):
+        """
+        Write the entries to ``filename``, in CSV format if ``filename`` has
+        extension ``.csv``, and in JSON Lines format otherwise.
+        """
+        if filename.endswith('.csv'):
+            self.to_csv(filename, append)
+        else:
+            self.to_json(filename, append)
+
+
+class PerformanceSummary(Report):
 
     """
     A special dictionary to track and quickly access performance data.
+
+    In ``advanced`` profiling mode, the time taken by each step, the time spent
+    by each thread and the hardware counters of each section are also available.
+
+    The information characterizing the run (e.g., the Operator name, the DSE and
+    DLE modes, the compiler, the auto-tuned block sizes) is stored in ``metadata``.
     """
 
-    def setsection(self, key, time, gflopss, oi, itershape, datashape):
-        self[key] = PerfEntry(time, gflopss, oi, itershape, datashape)
+    _keyname = 'section'
+    _tablename = 'sections'
+
+    def __init__(self, *args, **kwargs):
+        super(PerformanceSummary, self).__init__(*args, **kwargs)
+        self.details = OrderedDict()
+
+    def setsection(self, key, time, gflopss, oi, itershape, datashape, roofline=None):
+        self[key] = PerfEntry(time, gflopss, oi, itershape, datashape, roofline)
+
+    def setdetails(self, key, steps, threads, counters):
+        self.details[key] = PerfDetails(steps, threads, counters)
+
+    def rename(self, key, newkey):
+        """Rename the section ``key`` as ``newkey``."""
+        self[newkey] = self.pop(key)
+        if key in self.details:
+            self.details[newkey] = self.details.pop(key)
+
+    def histogram(self, key, bins=10):
+        """
+        Return the histogram of the time taken by the steps of the section
+        ``key``, as computed by :func:`numpy.histogram`.
+        """
+        if key not in self.details:
+            raise ValueError("No per-step timings for section `%s`; was advanced "
+                             "profiling enabled?" % key)
+        return np.histogram(self.details[key].steps, bins=bins)
+
+    def as_dict(self):
+        """
+        Return the performance data as a (JSON-serializable) dictionary.
+        """
+        ret = super(PerformanceSummary, self).as_dict()
+        for k, (steps, threads, counters) in self.details.items():
+            ret['sections'][k]['steps'] = steps.tolist()
+            ret['sections'][k]['threads'] = threads.tolist()
+            ret['sections'][k]['counters'] = counters
+        return ret
 
     @property
     def gflopss(self):
@@ -209,10 +617,336 @@ class PerformanceSummary(OrderedDict):
     def timings(self):
         return OrderedDict([(k, v.time) for k, v in self.items()])
 
+    @property
+    def roofline(self):
+        return OrderedDict([(k, v.roofline) for k, v in self.items()])
+
+    @property
+    def steps(self):
+        return OrderedDict([(k, v.steps) for k, v in self.details.items()])
+
+    @property
+    def threads(self):
+        return OrderedDict([(k, v.threads) for k, v in self.details.items()])
+
+    @property
+    def counters(self):
+        return OrderedDict([(k, v.counters) for k, v in self.details.items()])
+
+
+class BuildProfile(Report):
+
+    """
+    A special dictionary to track the construction ("lowering") of an
+    :class:`Operator`, from the input equations down to the JIT-compiled code.
+    For each stage of the pipeline, the wall time, the peak Python memory
+    (in ``advanced`` build profiling mode, see ``configuration['profiling_build']``)
+    and the number of items (expressions, clusters, Iteration/Expression tree
+    nodes, lines of C code) in input and output are tracked.
+
+    The information characterizing the Operator (e.g., the name, the DSE and
+    DLE modes) is stored in ``metadata``.
+    """
+
+    _keyname = 'stage'
+    _tablename = 'stages'
+
+    def __init__(self, *args, **kwargs):
+        super(BuildProfile, self).__init__(*args, **kwargs)
+        self.memory = configuration['profiling_build'] == 'advanced' and\
+            tracemalloc is not None
+        self._thread = current_thread()
+
+    @contextmanager
+    def stage(self, name, input=None):
+        """
+        A context manager to profile the stage ``name`` of the pipeline. The
+        stage output should be assigned to the ``output`` attribute of the
+        object returned by the context manager: ::
+
+            with profile.stage('clusterize', expressions) as stage:
+                stage.output = clusterize(expressions, stencils)
+
+        :param name: The name of the stage.
+        :param input: (Optional) the stage input.
+        """
+        handle = BuildStage()
+        # tracemalloc is process-wide, so the memory is only tracked by the
+        # stages starting, and then stopping, the tracing, one at a time. The
+        # peak of any other stage, nested, executed by other threads (e.g.,
+        # asynchronous JIT compilation or concurrent constructions), or run
+        # while the user is tracing, is None
+        owned = self.memory and current_thread() is self._thread and\
+            _tracing.acquire(False)
+        if owned:
+            if tracemalloc.is_tracing():
+                _tracing.release()
+                owned = False
+            else:
+                tracemalloc.start()
+        tic = timer()
+        try:
+            yield handle
+        finally:
+            elapsed = timer() - tic
+            peak = None
+            if owned:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                _tracing.release()
+        self[name] = BuildEntry(elapsed, peak, count(input), count(handle.output))
+
+    @property
+    def total(self):
+        """The total time spent in the pipeline."""
+        return sum(v.time for v in self.values())
+
+    @property
+    def timings(self):
+        return OrderedDict([(k, v.time) for k, v in self.items()])
+
+    @property
+    def memory_peaks(self):
+        return OrderedDict([(k, v.memory) for k, v in self.items()])
+
+
+_tracing = Lock()
+"""Held by the :meth:`BuildProfile.stage` tracing memory allocations, if any."""
+
+
+class BuildStage(object):
+
+    """The handle of a stage being profiled by :meth:`BuildProfile.stage`."""
+
+    output = None
+
+
+def count(items):
+    """
+    Return the number of items in ``items``, which may be a list of expressions
+    or clusters, an Iteration/Expression tree, or a string of code (the number
+    of lines). Return None if ``items`` is None.
+    """
+    if items is None:
+        return None
+    elif isinstance(items, str):
+        return items.count('\n') + 1
+    items = as_tuple(items)
+    if items and all(isinstance(i, Node) for i in items):
+        return sum(len(FindNodes(Node).visit(i)) for i in items)
+    return len(items)
+
 
 Profile = namedtuple('Profile', 'name ops memory')
 """Metadata for a profiled code section."""
 
 
-PerfEntry = namedtuple('PerfEntry', 'time gflopss oi itershape datashape')
-"""Structured performance data."""
+PerfEntry = namedtuple('PerfEntry', 'time gflopss oi itershape datashape roofline')
+"""Structured performance data. ``roofline`` is the performance achieved as a
+percentage of the attainable performance (see :func:`calibrate`), or None."""
+
+
+PerfDetails = namedtuple('PerfDetails', 'steps threads counters')
+"""Structured performance data collected in advanced profiling mode."""
+
+
+BuildEntry = namedtuple('BuildEntry', 'time memory nin nout')
+"""Structured build profiling data: the wall time, in seconds, the peak Python
+memory, in bytes (None if not tracked), and the number of input and output items
+of a stage of the Operator construction pipeline."""
+
+
+Roofline = namedtuple('Roofline', 'bandwidth flops')
+"""The attainable memory bandwidth, in GB/s, and the attainable floating-point
+performance, in GFlops/s, of the machine."""
+
+
+def calibrate(size=2**23, nflops=2**21, repeats=5, force=False, config=None):
+    """
+    Return the :class:`Roofline` of the machine, measured by running a STREAM
+    triad and a peak FMA microkernel JIT-compiled with the configured compiler
+    and OpenMP settings. The best of ``repeats`` runs is taken.
+
+    The results are cached in memory and in ``roofline.json``, alongside the
+    JIT-compiled shared objects, so that the microkernels are run only once
+    per host, compiler, and number of threads.
+
+    :param size: (Optional) the number of elements of each of the three STREAM
+                 arrays, in double precision. Should be much larger than the
+                 last level cache.
+    :param nflops: (Optional) the number of iterations of the FMA microkernel.
+    :param repeats: (Optional) the number of runs of each microkernel.
+    :param force: (Optional) if True, run the microkernels even if cached
+                  results exist.
+    :param config: (Optional) a snapshot of ``configuration`` providing the
+                   compiler and OpenMP settings to be used instead.
+    """
+    config = config or configuration
+    compiler = config['compiler']
+    nthreads = environ.get('OMP_NUM_THREADS', cpu_count())
+    key = str((node(), compiler.signature, config['openmp'], nthreads))
+
+    if not force:
+        if key in calibrate.cache:
+            return calibrate.cache[key]
+        cached = calibration_load().get(key)
+        if cached is not None:
+            calibrate.cache[key] = Roofline(*cached)
+            return calibrate.cache[key]
+
+    lib = load(jit_compile(calibration_kernels, compiler), compiler)
+
+    # STREAM triad, 3 arrays of doubles (no write-allocate traffic)
+    a, b, c = [np.ones(size, dtype=np.float64) for _ in range(3)]
+    args = [np.ctypeslib.as_ctypes(i) for i in (a, b, c)]
+    elapsed = []
+    for _ in range(repeats):
+        tic = timer()
+        lib.stream_triad(args[0], args[1], args[2], c_int(size))
+        elapsed.append(timer() - tic)
+    bandwidth = 3*8*size/min(elapsed)/10**9
+
+    # Peak FMA, on each thread
+    out = np.zeros(1, dtype=np.float32)
+    threads = np.zeros(1, dtype=np.int32)
+    elapsed = []
+    for _ in range(repeats):
+        tic = timer()
+        lib.peak_fma(np.ctypeslib.as_ctypes(out), np.ctypeslib.as_ctypes(threads),
+                     c_int(nflops))
+        elapsed.append(timer() - tic)
+    flops = 2.*calibration_nacc*nflops*int(threads[0])/min(elapsed)/10**9
+
+    roofline = Roofline(bandwidth, flops)
+    info("Calibration: attainable bandwidth %.2f GB/s, attainable performance "
+         "%.2f GFlops/s" % roofline)
+
+    calibrate.cache[key] = roofline
+    calibration_store(key, roofline)
+    return roofline
+calibrate.cache = {}  # noqa
+
+
+def calibration_file():
+    """Return the path to the calibration results, which live alongside the
+    JIT-compiled shared objects."""
+    return path.join(get_jit_dir(), 'roofline.json')
+
+
+def calibration_load():
+    """Return the calibration results, as a dict."""
+    try:
+        with open(calibration_file()) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        # No results yet, or unreadable
+        return {}
+
+
+def calibration_store(key, roofline):
+    """Store the calibration results ``roofline`` for ``key``. The file is
+    atomically replaced, so that concurrent processes never observe partially
+    written results."""
+    results = calibration_load()
+    results[key] = list(roofline)
+    filename = calibration_file()
+    tmp_filename = "%s-%s" % (filename, uuid4().hex)
+    with open(tmp_filename, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    rename(tmp_filename, filename)
+
+
+calibration_nacc = 128
+"""Number of independent accumulators in the peak FMA microkernel. Must be large
+enough to hide the latency of the FMA units, at any SIMD width. The FMAs are
+explicit (``fmaf``), as ``-std=c99`` disables the contraction of multiplies
+and adds into FMAs."""
+
+
+calibration_kernels = """\
+#include <math.h>
+#ifdef _OPENMP
+#include "omp.h"
+#endif
+
+void stream_triad(double *restrict a, const double *restrict b,
+                  const double *restrict c, const int size)
+{
+  #pragma omp parallel for schedule(static)
+  for (int i = 0; i < size; i++)
+  {
+    a[i] = b[i] + 3.0*c[i];
+  }
+}
+
+void peak_fma(float *restrict out, int *restrict nthreads, const int n)
+{
+  float r = 0.F;
+  nthreads[0] = 1;
+  #pragma omp parallel reduction(+:r)
+  {
+    float acc[%(nacc)d];
+    for (int j = 0; j < %(nacc)d; j++)
+    {
+      acc[j] = (float) j;
+    }
+    for (int i = 0; i < n; i++)
+    {
+      #pragma omp simd
+      for (int j = 0; j < %(nacc)d; j++)
+      {
+        acc[j] = fmaf(acc[j], 0.999999F, 0.000001F);
+      }
+    }
+    for (int j = 0; j < %(nacc)d; j++)
+    {
+      r += acc[j];
+    }
+    #ifdef _OPENMP
+    #pragma omp single
+    nthreads[0] = omp_get_num_threads();
+    #endif
+  }
+  out[0] = r;
+}
+""" % {'nacc': calibration_nacc}
+"""The STREAM triad and peak FMA microkernels."""
+
+
+perf_helpers = """\
+extern long syscall(long number, ...);
+
+static void devito_perf_init(int *fds)
+{
+  static const unsigned long long events[%(ncounters)d] = {%(events)s};
+  struct perf_event_attr attr;
+  if (fds[0] != -2)
+  {
+    return;
+  }
+  for (int i = 0; i < %(ncounters)d; i++)
+  {
+    memset(&attr, 0, sizeof(attr));
+    attr.type = PERF_TYPE_HARDWARE;
+    attr.size = sizeof(attr);
+    attr.config = events[i];
+    attr.exclude_kernel = 1;
+    attr.exclude_hv = 1;
+    attr.inherit = 1;
+    fds[i] = (int) syscall(__NR_perf_event_open, &attr, 0, -1, -1, 0);
+  }
+}
+
+static long long devito_perf_read(int fd)
+{
+  long long value = 0;
+  if (fd < 0 || read(fd, &value, sizeof(value)) != sizeof(value))
+  {
+    return 0;
+  }
+  return value;
+}"""
+"""C helpers to open and read hardware counters through ``perf_event``. If a
+counter cannot be opened (e.g., insufficient permissions, see
+``/proc/sys/kernel/perf_event_paranoid``), it reads as 0. A counter accounts
+for the calling thread and for any thread it spawns after the counter is opened."""
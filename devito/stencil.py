@@ -70,7 +70,14 @@ class Stencil(DefaultOrderedDict):
             elif q_indexed(e):
                 d = []
                 for a in e.indices:
-                    found = [i for i in a.free_symbols if isinstance(i, Dimension)]
+                    # Indirect indices (e.g., A[B[x, y]]) contribute the dimensions
+                    # of the nested Indexeds, in the same order as their layout
+                    nested = retrieve_indexed(a)
+                    if nested:
+                        found = [k for i in nested for j in i.indices
+                                 for k in j.free_symbols if isinstance(k, Dimension)]
+                    else:
+                        found = [i for i in a.free_symbols if isinstance(i, Dimension)]
                     d.extend([i for i in found if i not in d])
                 dims[tuple(d)] = e
         # ... giving higher priority to TimeData objects; time always go first
@@ -83,6 +90,10 @@ class Stencil(DefaultOrderedDict):
             for a in e.indices:
                 if isinstance(a, Dimension):
                     stencil[a].update([0])
+                elif q_indexed(a):
+                    # Indirect access, e.g. through an integer table; the
+                    # accesses of the table itself are in ``indexeds``
+                    continue
                 d = None
                 off = [0]
                 for i in a.args:
@@ -13,7 +13,7 @@ from operator import attrgetter
 import cgen as c
 from sympy import Symbol
 
-from devito.cgen_utils import blankline, ccode
+from devito.cgen_utils import CodePrinter, IntDiv, blankline, ccode
 from devito.dimension import LoweredDimension
 from devito.exceptions import VisitorException
 from devito.nodes import Iteration, Node, UnboundedIndex
@@ -22,7 +22,7 @@ from devito.tools import as_tuple, filter_ordered, filter_sorted, flatten, ctype
 
 __all__ = ['FindNodes', 'FindSections', 'FindSymbols', 'FindScopes',
            'IsPerfectIteration', 'SubstituteExpression', 'printAST', 'CGen',
-           'ResolveIterationVariable', 'Transformer', 'NestedTransformer',
+           'CGenUnits', 'ResolveIterationVariable', 'Transformer', 'NestedTransformer',
            'FindAdjacentIterations']
 
 
@@ -214,6 +214,13 @@ class PrintAST(Visitor):
             detail, props = '', ''
         return self.indent + "<%sIteration %s%s>\n%s" % (props, o.dim.name, detail, body)
 
+    def visit_Conditional(self, o):
+        self._depth += 1
+        body = self.visit(o.children)
+        self._depth -= 1
+        detail = ' %s' % o.condition if self.verbose else ''
+        return self.indent + "<If%s>\n%s" % (detail, body)
+
     def visit_Expression(self, o):
         if self.verbose:
             body = "%s = %s" % (o.expr.lhs, o.expr.rhs)
@@ -284,6 +291,10 @@ class CGen(Visitor):
     def visit_FunCall(self, o):
         return c.Statement('%s(%s)' % (o.name, ','.join(o.params)))
 
+    def visit_Conditional(self, o):
+        then_body = c.Block(flatten(self.visit(i) for i in o.children))
+        return c.If(CodePrinter().doprint(o.condition, None), then_body)
+
     def visit_Iteration(self, o):
         body = flatten(self.visit(i) for i in o.children)
 
@@ -341,27 +352,54 @@ class CGen(Visitor):
         return c.FunctionBody(signature, c.Block(casts + body))
 
     def visit_Operator(self, o):
-        # Kernel signature and body
+        kernel = self._operator_kernel(o)
+
+        # Elemental functions
+        efuncs = [i.root.ccode for i in o.func_table.values() if i.local] + [blankline]
+
+        return c.Module(self._operator_preamble(o, kernel) + efuncs + [kernel])
+
+    def _operator_kernel(self, o):
+        """Build the kernel signature and body of an :class:`Operator`."""
         body = flatten(self.visit(i) for i in o.children)
         decls = self._args_decl(o.parameters)
         casts = self._args_cast(o.parameters)
         signature = c.FunctionDeclaration(c.Value(o.retval, o.name), decls)
         retval = [c.Statement("return 0")]
-        kernel = c.FunctionBody(signature, c.Block(casts + body + retval))
+        return c.FunctionBody(signature, c.Block(casts + body + retval))
 
-        # Elemental functions
-        efuncs = [i.root.ccode for i in o.func_table.values() if i.local] + [blankline]
-
-        # Header files, extra definitions, ...
+    def _operator_preamble(self, o, kernel):
+        """Build the header files, extra definitions, ... of an :class:`Operator`."""
         header = [c.Line(i) for i in o._headers]
         includes = [c.Include(i, system=False) for i in o._includes]
         includes += [blankline]
         cglobals = list(o._globals)
         if o._compiler.src_ext == 'cpp':
-            cglobals += [c.Extern('C', signature)]
+            cglobals += [c.Extern('C', kernel.fdecl)]
         cglobals = [i for j in cglobals for i in (j, blankline)]
+        return header + includes + cglobals
+
 
-        return c.Module(header + includes + cglobals + efuncs + [kernel])
+class CGenUnits(CGen):
+
+    """
+    Return a representation of an :class:`Operator` as a tuple of :module:`cgen`
+    trees, one per translation unit. The first translation unit contains the
+    kernel, while each of the others contains one of the elemental functions.
+    This allows elemental functions to be compiled separately (and concurrently).
+    """
+
+    def visit_Operator(self, o):
+        kernel = self._operator_kernel(o)
+        preamble = self._operator_preamble(o, kernel)
+
+        efuncs = [i.root.ccode for i in o.func_table.values() if i.local]
+        prototypes = [i.fdecl for i in efuncs] + [blankline]
+
+        units = [c.Module(preamble + prototypes + [kernel])]
+        units.extend([c.Module(preamble + [i]) for i in efuncs])
+
+        return tuple(units)
 
 
 class FindSections(Visitor):
@@ -459,6 +497,7 @@ class FindSymbols(Visitor):
 
     def __init__(self, mode='kernel-data'):
         super(FindSymbols, self).__init__()
+        self.mode = mode
         self.rule = self.rules[mode]
 
     def visit_tuple(self, o):
@@ -469,6 +508,12 @@ class FindSymbols(Visitor):
         symbols = flatten([self.visit(i) for i in o.children])
         return filter_sorted(symbols, key=attrgetter('name'))
 
+    def visit_Conditional(self, o):
+        symbols = flatten([self.visit(i) for i in o.children])
+        if self.mode == 'free-symbols':
+            symbols += list(o.condition.free_symbols)
+        return filter_sorted(symbols, key=attrgetter('name'))
+
     def visit_Expression(self, o):
         return filter_sorted([f for f in self.rule(o)], key=attrgetter('name'))
 
@@ -693,14 +738,17 @@ class ResolveIterationVariable(Transformer):
            {
                int t0 = (t) % 2;
                int t1 = (t + 1) % 2;
+
+    Subsampled dimensions are lowered in the same way, as integer divisions of
+    the loop variable, eg. ``int tsub4 = (time) / (4);``.
     """
 
     def visit_Iteration(self, o, subs={}, offsets=defaultdict(set)):
         nodes = self.visit(o.children, subs=subs, offsets=offsets)
+        init = []
         if o.dim.is_Buffered:
             # For buffered dimensions insert the explicit
             # definition of buffered variables, eg. t+1 => t1
-            init = []
             for i, off in enumerate(filter_ordered(offsets[o.dim])):
                 vname = Symbol("%s%d" % (o.dim.name, i))
                 value = (o.dim.parent + off) % o.dim.modulo
@@ -708,7 +756,19 @@ class ResolveIterationVariable(Transformer):
                 subs[o.dim + off] = LoweredDimension(vname.name, o.dim, off)
             # Always lower to symbol
             subs[o.dim.parent] = Symbol(o.dim.parent.name)
+            parent = o.dim.parent
+        else:
+            parent = o.dim
+        # For subsampled dimensions insert the definition of the subsampled
+        # index in terms of the loop index, eg. tsub4 = time / 4
+        for d in FindSymbols('dimensions').visit(o):
+            if d.is_Subsampled and d.parent == parent:
+                value = IntDiv(Symbol(parent.name), d.factor)
+                init.append(UnboundedIndex(Symbol(d.name), value, value))
+        if o.dim.is_Buffered:
             return o._rebuild(index=o.dim.parent.name, uindices=init)
+        elif init:
+            return o._rebuild(*nodes, uindices=init)
         else:
             return o._rebuild(*nodes)
 
@@ -747,7 +807,8 @@ class MergeOuterIterations(Transformer):
         newexpr = iter1.nodes + iter2.nodes
         return Iteration(newexpr, dimension=iter1.dim,
                          limits=iter1.limits,
-                         offsets=iter1.offsets)
+                         offsets=iter1.offsets,
+                         reverse=iter1.reverse)
 
     def visit_Iteration(self, o):
         rebuilt = self.visit(o.children)
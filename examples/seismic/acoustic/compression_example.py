@@ -0,0 +1,77 @@
+from argparse import ArgumentParser
+
+from numpy import linalg
+
+from devito.compression import FixedPoint
+from devito.logger import info
+from examples.seismic import Receiver
+from examples.seismic.acoustic.acoustic_example import smooth10, acoustic_setup
+
+
+def run(shape=(50, 50, 50), spacing=(20.0, 20.0, 20.0), tn=1000.0,
+        time_order=2, space_order=4, nbpml=40, amplitude=None, **kwargs):
+    """
+    Compare the memory footprint of the saved forward wavefield, the relative
+    error of the FWI gradient and the runtime, with and without compression.
+    """
+    solver = acoustic_setup(shape=shape, spacing=spacing, nbpml=nbpml, tn=tn,
+                            space_order=space_order, time_order=time_order,
+                            **kwargs)
+    m0 = smooth10(solver.model.m.data, solver.model.shape_domain)
+
+    info("Reference run (uncompressed)")
+    rec, _, _ = solver.forward()
+    rec0, u0, summary_fwd = solver.forward(m=m0, save=True)
+    residual = Receiver(name='rec', data=rec0.data - rec.data,
+                        coordinates=rec0.coordinates.data)
+    grad0, summary_grad = solver.gradient(residual, u0, m=m0)
+    amplitude = amplitude or 1.01*abs(u0.data).max()
+
+    results = [(None, u0.data.nbytes, 0., summary_fwd.timings['main'] +
+                summary_grad.timings['main'])]
+    del u0
+    for compression in ['float16', 'bfloat16', FixedPoint(16, amplitude),
+                        FixedPoint(8, amplitude)]:
+        info("Compressed run (%s)" % compression)
+        _, usave, summary_fwd = solver.forward(m=m0, save=True,
+                                               compression=compression)
+        grad, summary_grad = solver.gradient(residual, usave, m=m0)
+        error = linalg.norm(grad.data - grad0.data)/linalg.norm(grad0.data)
+        results.append((usave.codec, usave.data.nbytes, error,
+                        summary_fwd.timings['main'] + summary_grad.timings['main']))
+        del usave
+
+    info("%-20s %12s %12s %12s" % ('codec', 'memory [MB]', 'grad error', 'time [s]'))
+    for codec, size, error, runtime in results:
+        info("%-20s %12.1f %12.2e %12.3f" % (codec, size/1024.**2, error, runtime))
+    return results
+
+
+if __name__ == "__main__":
+    description = ("Example script to compare the memory, accuracy and runtime "
+                   "of FWI gradients from compressed forward wavefields.")
+    parser = ArgumentParser(description=description)
+    parser.add_argument("-d", "--shape", default=(51, 51, 51), type=int, nargs="+",
+                        help="Number of grid points along each axis")
+    parser.add_argument("--tn", default=750., type=float,
+                        help="Simulation time, in ms")
+    parser.add_argument("-so", "--space_order", default=4, type=int,
+                        help="Space order of the simulation")
+    parser.add_argument("--nbpml", default=40, type=int,
+                        help="Number of PML layers around the domain")
+    parser.add_argument("--amplitude", default=None, type=float,
+                        help="Amplitude bound of the fixed-point codecs "
+                        "(default: the peak of the reference wavefield)")
+    parser.add_argument("-dse", default="advanced",
+                        choices=["noop", "basic", "advanced",
+                                 "speculative", "aggressive"],
+                        help="Devito symbolic engine (DSE) mode")
+    parser.add_argument("-dle", default="advanced",
+                        choices=["noop", "advanced", "speculative"],
+                        help="Devito loop engine (DLE) mode")
+    args = parser.parse_args()
+
+    shape = tuple(args.shape)
+    run(shape=shape, spacing=tuple(15. for _ in shape), tn=args.tn,
+        space_order=args.space_order, nbpml=args.nbpml, amplitude=args.amplitude,
+        dse=args.dse, dle=args.dle)
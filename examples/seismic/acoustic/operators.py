@@ -58,7 +58,8 @@ def iso_stencil(field, time_order, m, s, damp, **kwargs):
 
 
 def ForwardOperator(model, source, receiver, time_order=2, space_order=4,
-                    save=False, **kwargs):
+                    save=False, nshots=None, subsample=None, compression=None,
+                    **kwargs):
     """
     Constructor method for the forward modelling operator in an acoustic media
 
@@ -68,17 +69,28 @@ def ForwardOperator(model, source, receiver, time_order=2, space_order=4,
     :param time_order: Time discretization order
     :param space_order: Space discretization order
     :param save: Saving flag, True saves all time steps, False only the three
+    :param nshots: Number of shots computed at once by a single run of the
+                   operator, in which case the wavefield and the source and
+                   receiver data gain a trailing shot dimension
+    :param subsample: If ``save`` is True, save only every ``subsample``-th
+                      time step, in the wavefield ``usave``, while the
+                      wavefield ``u`` only stores the three time steps
+    :param compression: If ``save`` is True, save the time steps in the
+                        wavefield ``usave``, compressed by the given codec
+                        (see :mod:`devito.compression`)
     """
     m, damp = model.m, model.damp
 
     # Create symbols for forward wavefield, source and receivers
+    separate = save and bool(subsample or compression)
     u = TimeData(name='u', shape=model.shape_domain, dtype=model.dtype,
-                 save=save, time_dim=source.nt if save else None,
-                 time_order=2, space_order=space_order)
+                 save=save and not separate,
+                 time_dim=source.nt if save and not separate else None,
+                 time_order=2, space_order=space_order, nshots=nshots)
     src = PointSource(name='src', ntime=source.nt, ndim=source.ndim,
-                      npoint=source.npoint)
+                      npoint=source.npoint, nshots=nshots)
     rec = Receiver(name='rec', ntime=receiver.nt, ndim=receiver.ndim,
-                   npoint=receiver.npoint)
+                   npoint=receiver.npoint, nshots=nshots)
 
     s = t.spacing
     # Get computational time-step value
@@ -93,10 +105,20 @@ def ForwardOperator(model, source, receiver, time_order=2, space_order=4,
     # Create interpolation expression for receivers
     rec_term = rec.interpolate(expr=u, offset=model.nbpml)
 
+    # Create expression to save the subsampled and/or compressed wavefield
+    if separate:
+        usave = TimeData(name='usave', shape=model.shape_domain, dtype=model.dtype,
+                         save=True, time_dim=source.nt, subsample=subsample,
+                         compression=compression, time_order=2,
+                         space_order=space_order, nshots=nshots)
+        save_term = [Eq(usave, u)]
+    else:
+        save_term = []
+
     subs = dict([(t.spacing, dt)] + [(time.spacing, dt)] +
                 [(i.spacing, model.get_spacing()[j]) for i, j
                  in zip(u.indices[1:], range(len(model.shape)))])
-    return Operator(eqn + src_term + rec_term,
+    return Operator(eqn + src_term + rec_term + save_term,
                     subs=subs,
                     time_axis=Forward, name='Forward', **kwargs)
 
@@ -140,7 +162,8 @@ def AdjointOperator(model, source, receiver, time_order=2, space_order=4, **kwar
                     time_axis=Backward, name='Adjoint', **kwargs)
 
 
-def GradientOperator(model, source, receiver, time_order=2, space_order=4, **kwargs):
+def GradientOperator(model, source, receiver, time_order=2, space_order=4,
+                     save=True, subsample=None, compression=None, **kwargs):
     """
     Constructor method for the gradient operator in an acoustic media
 
@@ -149,14 +172,25 @@ def GradientOperator(model, source, receiver, time_order=2, space_order=4, **kwa
     :param receiver: :class:`PointData` object containing the acquisition geometry
     :param time_order: Time discretization order
     :param space_order: Space discretization order
+    :param save: Saving flag, True if the forward wavefield stores all time steps,
+                 False if it only stores the three time steps required by each
+                 time step of the gradient (e.g., when it is recomputed from
+                 checkpoints)
+    :param subsample: If ``save`` is True, read the forward wavefield ``usave``,
+                      storing only every ``subsample``-th time step, rather than
+                      the forward wavefield ``u``. The imaging condition is then
+                      only evaluated at the stored time steps
+    :param compression: If ``save`` is True, read the forward wavefield ``usave``,
+                        compressed by the given codec, rather than the forward
+                        wavefield ``u``
     """
     m, damp = model.m, model.damp
 
     # Gradient symbol and wavefield symbols
     grad = DenseData(name='grad', shape=model.shape_domain,
                      dtype=model.dtype)
-    u = TimeData(name='u', shape=model.shape_domain, save=True,
-                 time_dim=source.nt, time_order=2,
+    u = TimeData(name='u', shape=model.shape_domain, save=save,
+                 time_dim=source.nt if save else None, time_order=2,
                  space_order=space_order, dtype=model.dtype)
     v = TimeData(name='v', shape=model.shape_domain, save=False,
                  time_order=2, space_order=space_order,
@@ -170,7 +204,20 @@ def GradientOperator(model, source, receiver, time_order=2, space_order=4, **kwa
 
     eqn = iso_stencil(v, time_order, m, s, damp, forward=False)
 
-    if time_order == 2:
+    if save and (subsample or compression):
+        # The second time derivative is moved onto the adjoint wavefield (by
+        # summation by parts), as the stored time steps may not be contiguous
+        usave = TimeData(name='usave', shape=model.shape_domain, save=True,
+                         time_dim=source.nt, subsample=subsample,
+                         compression=compression, time_order=2,
+                         space_order=space_order, dtype=model.dtype)
+        factor = subsample or 1
+        if time_order == 2:
+            gradient_update = Eq(grad, grad - factor * usave * v.dt2)
+        else:
+            gradient_update = Eq(grad, grad - factor * (
+                usave * v.dt2 + s**2 / 12.0 * usave.laplace2(m**(-2)) * v))
+    elif time_order == 2:
         gradient_update = Eq(grad, grad - u.dt2 * v)
     else:
         gradient_update = Eq(grad, grad - (u.dt2 +
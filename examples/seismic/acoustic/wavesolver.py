@@ -1,4 +1,5 @@
 from devito import DenseData, TimeData, memoized
+from devito.checkpointing import CheckpointOperator, DataCheckpoint, Revolver
 from examples.seismic import PointSource, Receiver
 from examples.seismic.acoustic.operators import (
     ForwardOperator, AdjointOperator, GradientOperator, BornOperator
@@ -43,11 +44,13 @@ class AcousticWaveSolver(object):
         self._kwargs = kwargs
 
     @memoized
-    def op_fwd(self, save=False):
+    def op_fwd(self, save=False, nshots=None, subsample=None, compression=None):
         """Cached operator for forward runs with buffered wavefield"""
         return ForwardOperator(self.model, save=save, source=self.source,
                                receiver=self.receiver, time_order=self.time_order,
-                               space_order=self.space_order, **self._kwargs)
+                               space_order=self.space_order, nshots=nshots,
+                               subsample=subsample, compression=compression,
+                               **self._kwargs)
 
     @memoized
     def op_adj(self):
@@ -57,11 +60,12 @@ class AcousticWaveSolver(object):
                                space_order=self.space_order, **self._kwargs)
 
     @memoized
-    def op_grad(self):
+    def op_grad(self, save=True, subsample=None, compression=None):
         """Cached operator for gradient runs"""
-        return GradientOperator(self.model, save=False, source=self.source,
+        return GradientOperator(self.model, save=save, source=self.source,
                                 receiver=self.receiver, time_order=self.time_order,
-                                space_order=self.space_order, **self._kwargs)
+                                space_order=self.space_order, subsample=subsample,
+                                compression=compression, **self._kwargs)
 
     @memoized
     def op_born(self):
@@ -70,7 +74,8 @@ class AcousticWaveSolver(object):
                             receiver=self.receiver, time_order=self.time_order,
                             space_order=self.space_order, **self._kwargs)
 
-    def forward(self, src=None, rec=None, u=None, m=None, save=False, **kwargs):
+    def forward(self, src=None, rec=None, u=None, m=None, save=False,
+                subsample=None, compression=None, memmap=None, **kwargs):
         """
         Forward modelling function that creates the necessary
         data objects for running a forward modelling operator.
@@ -80,30 +85,66 @@ class AcousticWaveSolver(object):
         :param u: (Optional) Symbol to store the computed wavefield
         :param m: (Optional) Symbol for the time-constant square slowness
         :param save: Option to store the entire (unrolled) wavefield
-
-        :returns: Receiver, wavefield and performance summary
+        :param subsample: (Optional) With ``save``, store only every
+                          ``subsample``-th time step of the wavefield
+        :param compression: (Optional) With ``save``, store the wavefield
+                            compressed by the given codec, or codec name
+                            (see :mod:`devito.compression`)
+        :param memmap: (Optional) With ``save``, back the stored wavefield with
+                       a memory-mapped file, either temporary (True) or at the
+                       given path, rather than with memory
+
+        :returns: Receiver, wavefield and performance summary. With
+                  ``subsample`` or ``compression``, the wavefield returned is
+                  the one storing the saved time steps, which may be passed
+                  to :meth:`gradient`
+
+        If ``src`` carries a batch of shots (i.e., it was created with
+        ``nshots``), all shots are computed at once by a single run of
+        the operator. Unless explicitly provided, the receivers, shared by
+        all shots, and the wavefield are then batched accordingly.
         """
         # Source term is read-only, so re-use the default
         if src is None:
             src = self.source
+        nshots = getattr(src, 'nshots', None)
         # Create a new receiver object to store the result
         if rec is None:
-            rec = Receiver(name='rec', ntime=self.receiver.nt,
+            rec = Receiver(name='rec', ntime=self.receiver.nt, nshots=nshots,
                            coordinates=self.receiver.coordinates.data)
 
+        # Pick m from model unless explicitly provided
+        if m is None:
+            m = m or self.model.m
+
+        if save and (subsample or compression):
+            # The wavefield storing the saved time steps, and the buffered one
+            usave = u
+            if usave is None:
+                usave = TimeData(name='usave', shape=self.model.shape_domain,
+                                 save=True, time_dim=self.source.nt,
+                                 subsample=subsample, compression=compression,
+                                 time_order=2, space_order=self.space_order,
+                                 dtype=self.model.dtype, nshots=nshots,
+                                 memmap=memmap)
+            u = TimeData(name='u', shape=self.model.shape_domain, save=False,
+                         time_order=2, space_order=self.space_order,
+                         dtype=self.model.dtype, nshots=nshots)
+            summary = self.op_fwd(save, nshots, subsample, usave.codec).apply(
+                src=src, rec=rec, u=u, usave=usave, m=m, **kwargs)
+            return rec, usave, summary
+
         # Create the forward wavefield if not provided
         if u is None:
             u = TimeData(name='u', shape=self.model.shape_domain, save=save,
                          time_dim=self.source.nt if save else None,
                          time_order=2, space_order=self.space_order,
-                         dtype=self.model.dtype)
-
-        # Pick m from model unless explicitly provided
-        if m is None:
-            m = m or self.model.m
+                         dtype=self.model.dtype, nshots=nshots,
+                         memmap=memmap if save else None)
 
         # Execute operator and return wavefield and receiver data
-        summary = self.op_fwd(save).apply(src=src, rec=rec, u=u, m=m, **kwargs)
+        summary = self.op_fwd(save, nshots).apply(src=src, rec=rec, u=u, m=m,
+                                                  **kwargs)
         return rec, u, summary
 
     def adjoint(self, rec, srca=None, v=None, m=None, **kwargs):
@@ -139,18 +180,30 @@ class AcousticWaveSolver(object):
         summary = self.op_adj().apply(srca=srca, rec=rec, v=v, m=m, **kwargs)
         return srca, v, summary
 
-    def gradient(self, rec, u, v=None, grad=None, m=None, **kwargs):
+    def gradient(self, rec, u=None, v=None, grad=None, m=None, src=None,
+                 ncheckpoints=None, **kwargs):
         """
         Gradient modelling function for computing the adjoint of the
         Linearized Born modelling function, ie. the action of the
         Jacobian adjoint on an input data.
 
         :param recin: Receiver data as a numpy array
-        :param u: Symbol for full wavefield `u` (created with save=True)
+        :param u: Symbol for full wavefield `u` (created with save=True), possibly
+                  storing only every few time steps (created with subsample),
+                  or compressed (created with compression).
+                  With checkpointing, (Optional) Symbol for the buffered
+                  wavefield
         :param v: (Optional) Symbol to store the computed wavefield
         :param grad: (Optional) Symbol to store the gradient field
-
-        :returns: Gradient field and performance summary
+        :param src: (Optional) Symbol with time series data for the injected
+                    source term, used with checkpointing
+        :param ncheckpoints: (Optional) Number of checkpoints of the forward
+                             wavefield stored at once. If provided, rather than
+                             reading a full wavefield, the forward wavefield is
+                             recomputed from the checkpoints as needed
+
+        :returns: Gradient field and performance summary (with checkpointing,
+                  the statistics of the :class:`Revolver`)
         """
 
         # Gradient symbol
@@ -168,9 +221,53 @@ class AcousticWaveSolver(object):
         if m is None:
             m = m or self.model.m
 
-        summary = self.op_grad().apply(rec=rec, grad=grad, v=v, u=u, m=m, **kwargs)
+        if ncheckpoints is not None:
+            return self._gradient_checkpointing(rec, u, v, grad, m, src,
+                                                ncheckpoints, **kwargs)
+
+        subsample = getattr(u, 'subsample', None)
+        compression = getattr(u, 'codec', None)
+        if subsample or compression:
+            summary = self.op_grad(True, subsample, compression).apply(
+                rec=rec, grad=grad, v=v, usave=u, m=m, **kwargs)
+        else:
+            summary = self.op_grad().apply(rec=rec, grad=grad, v=v, u=u, m=m,
+                                           **kwargs)
         return grad, summary
 
+    def _gradient_checkpointing(self, rec, u, v, grad, m, src, ncheckpoints,
+                                **kwargs):
+        """
+        Compute the gradient recomputing the forward wavefield, in windows of
+        time steps, from at most ``ncheckpoints`` copies of the buffered
+        wavefield, according to an optimal checkpointing schedule.
+        """
+        # Source term is read-only, so re-use the default
+        if src is None:
+            src = self.source
+
+        # The buffered forward wavefield, which makes up the checkpoints
+        if u is None:
+            u = TimeData(name='u', shape=self.model.shape_domain, save=False,
+                         time_order=2, space_order=self.space_order,
+                         dtype=self.model.dtype)
+
+        # The receiver data of the forward runs is not needed
+        rec_fwd = Receiver(name='rec', ntime=self.receiver.nt,
+                           coordinates=self.receiver.coordinates.data)
+
+        fwd = CheckpointOperator(self.op_fwd(), src=src, rec=rec_fwd, u=u, m=m,
+                                 **kwargs)
+        rev = CheckpointOperator(self.op_grad(False), rec=rec, grad=grad,
+                                 v=v, u=u, m=m, **kwargs)
+
+        # Both operators span one time step on either side of the computed one
+        revolver = Revolver(DataCheckpoint(u), fwd, rev, ncheckpoints,
+                            1, self.source.nt - 1)
+        revolver.apply_forward()
+        revolver.apply_reverse()
+        return grad, revolver.stats
+
     def born(self, dmin, src=None, rec=None, u=None, U=None, m=None, **kwargs):
         """
         Linearized Born modelling function that creates the necessary
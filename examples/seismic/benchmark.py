@@ -6,6 +6,7 @@ import numpy as np
 
 from devito import clear_cache
 from devito.logger import warning
+from devito.profiling import calibrate
 from acoustic.acoustic_example import run as acoustic_run
 from tti.tti_example import run as tti_run
 
@@ -66,8 +67,12 @@ if __name__ == "__main__":
     plotting = parser.add_argument_group("Plotting")
     plotting.add_argument("-p", "--plotdir", default="plots",
                           help="Directory containing plots")
-    plotting.add_argument("--max_bw", type=float, help="Max GB/s of the DRAM")
-    plotting.add_argument("--max_flops", type=float, help="Max GFLOPS/s of the CPU")
+    plotting.add_argument("--max_bw", type=float,
+                          help="Max GB/s of the DRAM; if not provided, measured "
+                               "on this machine")
+    plotting.add_argument("--max_flops", type=float,
+                          help="Max GFLOPS/s of the CPU; if not provided, measured "
+                               "on this machine")
     plotting.add_argument("--point_runtime", action="store_true",
                           help="Annotate points with runtime values")
 
@@ -171,6 +176,11 @@ if __name__ == "__main__":
             warning("Could not load any results, nothing to plot. Exiting...")
             sys.exit(0)
 
+        if args.max_bw is None or args.max_flops is None:
+            roofline = calibrate()
+            args.max_bw = args.max_bw or roofline.bandwidth
+            args.max_flops = args.max_flops or roofline.flops
+
         gflopss = bench.lookup(params=parameters, measure="gflopss", event="main")
         oi = bench.lookup(params=parameters, measure="oi", event="main")
         time = bench.lookup(params=parameters, measure="timings", event="main")
@@ -0,0 +1,138 @@
+from itertools import count
+import multiprocessing
+from multiprocessing import cpu_count
+
+import numpy as np
+
+from devito import DenseData, configuration
+from devito.memory import SharedMemory
+from examples.seismic import PointSource, Receiver
+from examples.seismic.tti import AnisotropicWaveSolver
+
+__all__ = ['ShotExecutor']
+
+# The solvers of the live executors, inherited by the workers at fork time
+_executors = {}
+_tokens = count()
+
+
+class ShotExecutor(object):
+    """
+    Run many independent shots concurrently, on a pool of worker processes,
+    using the forward operator of a wave solver (e.g.,
+    :class:`AcousticWaveSolver` or :class:`AnisotropicWaveSolver`).
+
+    :param solver: The wave solver. Its source provides the wavelet, and its
+                   receivers the acquisition geometry, shared by all shots.
+    :param nworkers: (Optional) Number of worker processes. Defaults to the
+                     number of cores.
+    :param nthreads: (Optional) Number of OpenMP threads used by each worker.
+                     Defaults to the number of cores divided by ``nworkers``.
+    :param kwargs: Additional arguments for ``solver.forward`` (e.g., the
+                   ``kernel`` of an :class:`AnisotropicWaveSolver`).
+
+    The model parameters are moved into POSIX shared memory and the forward
+    operator is compiled once, before the workers are forked; the workers thus
+    inherit both, rather than re-creating the :class:`Model` and recompiling.
+    The source coordinates and the receiver data are exchanged through shared
+    memory too.
+
+    .. note::
+
+       As the OpenMP runtime does not survive a ``fork``, an executor should
+       be created before running any OpenMP-parallel operator in the parent.
+    """
+
+    def __init__(self, solver, nworkers=None, nthreads=None, **kwargs):
+        self.solver = solver
+        self.nworkers = nworkers or cpu_count()
+        self.nthreads = nthreads or max(cpu_count() // self.nworkers, 1)
+        self.kwargs = kwargs
+
+        # Share, rather than copy-on-write, the model parameters with the workers
+        for i in vars(solver.model).values():
+            if isinstance(i, DenseData):
+                i.share()
+
+        # Compile the forward operator, so that the workers inherit it
+        if isinstance(solver, AnisotropicWaveSolver):
+            operator = solver.op_fwd(kwargs.get('kernel', 'centered'), False)
+        else:
+            operator = solver.op_fwd(False)
+        operator.cfunction
+
+        # Only OpenMP-parallel operators take the number of threads
+        if configuration['openmp'] and \
+                any(i.name == 'nthreads' for i in operator.parameters):
+            self.kwargs['nthreads'] = self.nthreads
+
+        self.token = next(_tokens)
+        _executors[self.token] = (solver, self.kwargs)
+        self.pool = fork_context().Pool(self.nworkers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes."""
+        self.pool.close()
+        self.pool.join()
+        _executors.pop(self.token, None)
+
+    def forward(self, coordinates):
+        """
+        Run one forward modelling per shot.
+
+        :param coordinates: The source coordinates of each shot, as an array of
+                            shape ``(nshots, npoint, ndim)``, or ``(nshots, ndim)``
+                            for single-point sources.
+
+        :returns: The receiver data of each shot, as an array of shape
+                  ``(nshots, ntime, nrec)``.
+        """
+        source, receiver = self.solver.source, self.solver.receiver
+        coordinates = np.asarray(coordinates, dtype=source.coordinates.dtype)
+        if coordinates.ndim == 2:
+            coordinates = coordinates[:, None, :]
+        nshots = coordinates.shape[0]
+
+        shots = SharedMemory(coordinates.shape, dtype=coordinates.dtype)
+        shots.ndpointer[:] = coordinates
+        data = SharedMemory((nshots,) + receiver.shape, dtype=receiver.dtype)
+
+        self.pool.map(_forward, [(self.token, shots, data, i) for i in range(nshots)],
+                      chunksize=1)
+
+        return data.ndpointer.copy()
+
+
+def fork_context():
+    """
+    Return the :mod:`multiprocessing` context forking the worker processes,
+    which is required for the workers to inherit the live executors.
+    """
+    try:
+        return multiprocessing.get_context('fork')
+    except AttributeError:
+        # Python 2, whose workers are always forked
+        return multiprocessing
+    except ValueError:
+        raise RuntimeError("ShotExecutor requires the 'fork' start method of "
+                           "multiprocessing, which is unavailable on this platform")
+
+
+def _forward(args):
+    """Run the ``i``-th shot in a worker process."""
+    token, shots, data, i = args
+    solver, kwargs = _executors[token]
+
+    src = PointSource(name='src', ntime=solver.source.nt, data=solver.source.data,
+                      coordinates=shots.ndpointer[i])
+    rec = Receiver(name='rec', ntime=solver.receiver.nt,
+                   coordinates=solver.receiver.coordinates.data)
+    solver.forward(src=src, rec=rec, **kwargs)
+
+    data.ndpointer[i] = rec.data
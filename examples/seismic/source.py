@@ -1,4 +1,4 @@
-from devito.dimension import Dimension, time
+from devito.dimension import Dimension, shot, time
 from devito.pointdata import PointData
 from devito.logger import error
 
@@ -18,6 +18,10 @@ class PointSource(PointData):
     :param npoint: (Optional) Number of sparse points represented by this source
     :param dimension: :(Optional) class:`Dimension` object for
                        representing the number of points in this source
+    :param nshots: (Optional) Number of shots, for batched execution. The
+                   data then has shape `(ntime, nshots, npoint)` and the
+                   coordinates shape `(nshots, npoint, ndim)`; coordinates
+                   of shape `(npoint, ndim)` are shared by all shots.
 
     Note, either the dimensions `ntime` and `npoint` or the fully
     initialised `data` array need to be provided.
@@ -26,8 +30,8 @@ class PointSource(PointData):
     def __new__(cls, name, ntime=None, npoint=None, ndim=None,
                 data=None, coordinates=None, **kwargs):
         p_dim = kwargs.get('dimension', Dimension('p_%s' % name))
-        ndim = ndim or coordinates.shape[1]
-        npoint = npoint or coordinates.shape[0]
+        ndim = ndim or coordinates.shape[-1]
+        npoint = npoint or coordinates.shape[-2]
         if data is None:
             if ntime is None:
                 error('Either data or ntime are required to'
@@ -36,7 +40,11 @@ class PointSource(PointData):
             ntime = ntime or data.shape[0]
 
         # Create the underlying PointData object
-        obj = PointData.__new__(cls, name=name, dimensions=[time, p_dim],
+        if kwargs.get('nshots') is None:
+            dimensions = [time, p_dim]
+        else:
+            dimensions = [time, shot, p_dim]
+        obj = PointData.__new__(cls, name=name, dimensions=dimensions,
                                 npoint=npoint, nt=ntime, ndim=ndim,
                                 coordinates=coordinates, **kwargs)
 
@@ -74,8 +82,11 @@ class WaveletSource(PointSource):
 
         obj.time = time
         obj.f0 = kwargs.get('f0')
+        # Same wavelet for all points (and all shots, if batched)
+        wavelet = obj.wavelet(obj.f0, obj.time)
+        wavelet = wavelet.reshape((-1,) + (1,)*(obj.data.ndim - 2))
         for p in range(npoint):
-            obj.data[:, p] = obj.wavelet(obj.f0, obj.time)
+            obj.data[..., p] = wavelet
         return obj
 
     def __init__(self, *args, **kwargs):
@@ -1,5 +1,8 @@
 from __future__ import absolute_import
 
+import sys
+from contextlib import contextmanager
+
 import pytest
 
 from sympy import Eq, cos  # noqa
@@ -198,3 +201,23 @@ def EVAL(exprs, *args):
     for i in as_tuple(exprs):
         processed.append(eval(i, globals(), scope))
     return processed[0] if isinstance(exprs, str) else processed
+
+
+@contextmanager
+def switch_often():
+    """Make the interpreter switch threads as often as possible, e.g. to make
+    races between threads likely."""
+    if hasattr(sys, 'setswitchinterval'):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+    else:
+        # Python 2
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+    try:
+        yield
+    finally:
+        if hasattr(sys, 'setswitchinterval'):
+            sys.setswitchinterval(interval)
+        else:
+            sys.setcheckinterval(interval)
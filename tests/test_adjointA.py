@@ -1,10 +1,16 @@
+from threading import Thread
+
+from conftest import switch_often
+
 import numpy as np
 import pytest
 from numpy import linalg
 
+from devito import configuration, time
 from devito.logger import info
 from examples.seismic import demo_model, RickerSource, Receiver
 from examples.seismic.acoustic import AcousticWaveSolver
+from examples.seismic.executor import ShotExecutor
 
 
 presets = {
@@ -70,3 +76,101 @@ def test_acoustic(mkey, shape, time_order, space_order, nbpml):
     info('<Ax,y>: %f, <x, A^Ty>: %f, difference: %12.12f, ratio: %f'
          % (term1, term2, term1 - term2, term1 / term2))
     assert np.isclose(term1, term2, rtol=1.e-5)
+
+
+@pytest.mark.parametrize('shape', [(60, 70), (60, 70, 80)])
+def test_acoustic_batched_shots(shape, nshots=3):
+    """Test that a batch of shots computed by a single run of the forward
+    operator matches the shots computed one at a time."""
+    model = demo_model(spacing=[15. for _ in shape], shape=shape, nbpml=10,
+                       **(presets['layers']))
+    dt = model.critical_dt
+    nt = int(1 + 250. / dt)
+    time_values = np.linspace(0., 250., nt)
+
+    src = RickerSource(name='src', ndim=model.dim, f0=0.01, time=time_values)
+    src.coordinates.data[0, :] = np.array(model.domain_size) * .5
+    src.coordinates.data[0, -1] = 30.
+    rec = Receiver(name='rec', ntime=nt, npoint=50, ndim=model.dim)
+    rec.coordinates.data[:, 0] = np.linspace(0., model.domain_size[0], num=50)
+    rec.coordinates.data[:, 1:] = src.coordinates.data[0, 1:]
+    solver = AcousticWaveSolver(model, source=src, receiver=rec, space_order=4)
+
+    # Shots spread across x, all sharing the same receivers
+    xsrc = np.linspace(.2, .8, nshots) * model.domain_size[0]
+    srcs = RickerSource(name='srcs', ndim=model.dim, f0=0.01, time=time_values,
+                        nshots=nshots, coordinates=src.coordinates.data)
+    srcs.coordinates.data[:, 0, 0] = xsrc
+    recs, u, _ = solver.forward(src=srcs)
+    assert recs.data.shape == (nt, nshots, 50)
+    assert u.data.shape[-1] == nshots
+
+    for i in range(nshots):
+        srci = RickerSource(name='src%d' % i, ndim=model.dim, f0=0.01,
+                            time=time_values, coordinates=srcs.coordinates.data[i])
+        reci, _, _ = solver.forward(src=srci)
+        assert np.allclose(recs.data[:, i], reci.data, rtol=1e-5, atol=1e-5)
+
+
+def test_shot_executor(shape=(60, 70), nshots=4):
+    """Test that shots run concurrently by a :class:`ShotExecutor` match
+    the shots run one at a time."""
+    model = demo_model(spacing=[15. for _ in shape], shape=shape, nbpml=10,
+                       **(presets['layers']))
+    nt = int(1 + 250. / model.critical_dt)
+    time_values = np.linspace(0., 250., nt)
+
+    src = RickerSource(name='src', ndim=model.dim, f0=0.01, time=time_values)
+    src.coordinates.data[0, :] = np.array(model.domain_size) * .5
+    src.coordinates.data[0, -1] = 30.
+    rec = Receiver(name='rec', ntime=nt, npoint=50, ndim=model.dim)
+    rec.coordinates.data[:, 0] = np.linspace(0., model.domain_size[0], num=50)
+    rec.coordinates.data[:, 1:] = src.coordinates.data[0, 1:]
+    solver = AcousticWaveSolver(model, source=src, receiver=rec, space_order=4)
+
+    coordinates = np.repeat(src.coordinates.data, nshots, axis=0)
+    coordinates[:, 0] = np.linspace(.2, .8, nshots) * model.domain_size[0]
+    with ShotExecutor(solver, nworkers=2) as executor:
+        data = executor.forward(coordinates)
+    assert data.shape == (nshots, nt, 50)
+
+    for i in range(nshots):
+        srci = RickerSource(name='src%d' % i, ndim=model.dim, f0=0.01,
+                            time=time_values, coordinates=coordinates[i:i+1])
+        reci, _, _ = solver.forward(src=srci)
+        assert np.allclose(data[i], reci.data, rtol=1e-5, atol=1e-5)
+
+
+def test_concurrent_construction(shape=(60, 70)):
+    """Test that the forward, adjoint, gradient and Born operators built
+    concurrently, in different threads, match those built one at a time."""
+    names = ['op_fwd', 'op_adj', 'op_grad', 'op_born']
+
+    def solver():
+        model = demo_model(spacing=[15. for _ in shape], shape=shape, nbpml=10,
+                           **(presets['layers']))
+        nt = int(1 + 250. / model.critical_dt)
+        src = RickerSource(name='src', ndim=model.dim, f0=0.01,
+                           time=np.linspace(0., 250., nt))
+        rec = Receiver(name='rec', ntime=nt, npoint=50, ndim=model.dim)
+        return AcousticWaveSolver(model, source=src, receiver=rec, space_order=4)
+
+    configuration['operator_cache'] = False
+    try:
+        serial, concurrent = solver(), solver()
+        expected = [str(getattr(serial, i)().ccode) for i in names]
+
+        # Switch threads often, to interleave the constructions as much as possible
+        built = {}
+        threads = [Thread(target=lambda i=i: built.update({i: getattr(concurrent, i)()}))
+                   for i in names]
+        with switch_often():
+            for i in threads:
+                i.start()
+            for i in threads:
+                i.join()
+    finally:
+        configuration['operator_cache'] = configuration._defaults['operator_cache']
+
+    assert [str(built[i].ccode) for i in names] == expected
+    assert time.reverse is False
@@ -15,14 +15,20 @@ from sympy import Eq
 
 from devito import DenseData, TimeData, Operator, t, x, y, z, configuration
 from devito.logger import logger, logging, set_log_level
-from devito.core.autotuning import options
+from devito.core.autotuning import db_file, options, parse_cache_size
 
 
-@pytest.mark.parametrize("shape,expected", [
-    ((30, 30), 12),
-    ((30, 30, 30), 16)
-])
-def test_at_is_actually_working(shape, expected):
+def setup_module(module):
+    # Always run the auto-tuner, regardless of what is in the database
+    configuration['autotuning_retune'] = True
+
+
+def teardown_module(module):
+    configuration['autotuning_retune'] = configuration._defaults['autotuning_retune']
+
+
+@pytest.mark.parametrize("shape", [(30, 30), (30, 30, 30)])
+def test_at_is_actually_working(shape):
     """
     Check that autotuning is actually running when switched on,
     in both 2D and 3D operators.
@@ -44,12 +50,18 @@ def test_at_is_actually_working(shape, expected):
     out = [i for i in buffer.getvalue().split('\n') if 'AutoTuner:' in i]
     assert len(out) == 3
 
-    # Now try the same with aggressive autotuning, which tries 9 more cases
+    # Now try the same with aggressive autotuning, which also tries
+    # rectangular blocks, and re-runs the most promising ones. The mode is
+    # that of the configuration the Operator is built with
     configuration['autotuning'] = 'aggressive'
-    op(infield=infield, outfield=outfield, autotune=True)
-    out = [i for i in buffer.getvalue().split('\n') if 'AutoTuner:' in i]
-    assert len(out) == expected
+    op = Operator(stencil, dle=('blocking', {'blockinner': True, 'blockalways': True}))
     configuration['autotuning'] = configuration._defaults['autotuning']
+    op(infield=infield, outfield=outfield, autotune=True)
+    out = [i for i in buffer.getvalue().split('\n') if 'AutoTuner:' in i][3:]
+    assert len(out) > options['at_max_attempts']
+    shapes = set(i.split('<')[1].split('>')[0] for i in out)
+    assert len(shapes) == options['at_max_attempts']
+    assert any(len(set(i.split(','))) > 1 for i in shapes)
 
     logger.removeHandler(temporary_handler)
 
@@ -110,3 +122,150 @@ def test_timesteps_per_at_run():
     buffer.flush()
     buffer.close()
     set_log_level('INFO')
+
+
+def test_at_database(tmpdir):
+    """
+    Check that the best block shape is stored in the auto-tuning database, and
+    that the auto-tuner is not run again for the same operator and problem
+    shape, unless retuning is forced.
+    """
+
+    buffer = StringIO()
+    temporary_handler = logging.StreamHandler(buffer)
+    logger.addHandler(temporary_handler)
+    set_log_level('DEBUG')
+    configuration['jit_cache_dir'] = str(tmpdir)
+    configuration['autotuning_retune'] = False
+
+    def run(shape):
+        buffer.truncate(0)
+        buffer.seek(0)
+        infield = DenseData(name='infield', shape=shape, dtype=np.int32)
+        outfield = DenseData(name='outfield', shape=shape, dtype=np.int32)
+        stencil = Eq(outfield.indexify(), outfield.indexify() + infield.indexify()*3.0)
+        op = Operator(stencil, dle=('blocking', {'blockalways': True}))
+        op(infield=infield, outfield=outfield, autotune=True)
+        return len([i for i in buffer.getvalue().split('\n') if 'AutoTuner:' in i])
+
+    assert run((30, 30, 30)) == 3
+    assert tmpdir.join('autotuning.json').check()
+    assert db_file() == str(tmpdir.join('autotuning.json'))
+
+    # Same operator and shape: the database is used
+    assert run((30, 30, 30)) == 0
+
+    # A different shape requires auto-tuning
+    assert run((40, 40, 40)) == 5
+
+    # Forced retuning
+    configuration['autotuning_retune'] = True
+    assert run((30, 30, 30)) == 3
+
+    configuration['jit_cache_dir'] = configuration._defaults['jit_cache_dir']
+
+    logger.removeHandler(temporary_handler)
+
+    temporary_handler.flush()
+    temporary_handler.close()
+    buffer.flush()
+    buffer.close()
+    set_log_level('INFO')
+
+
+@pytest.mark.parametrize("cache_size,expected", [
+    (1024**3, '24,24,24'),
+    (1, '8,8,8')
+])
+def test_at_model_ranking(cache_size, expected):
+    """
+    Check that, in aggressive mode, the block sizes are attempted in the order
+    established by the cache model: the largest blocks fitting in cache first,
+    or the smallest blocks first if no block fits in cache.
+    """
+
+    buffer = StringIO()
+    temporary_handler = logging.StreamHandler(buffer)
+    logger.addHandler(temporary_handler)
+    set_log_level('DEBUG')
+    configuration['autotuning'] = 'aggressive'
+    options['at_cache_size'] = cache_size
+
+    shape = (30, 30, 30)
+    infield = DenseData(name='infield', shape=shape, dtype=np.int32)
+    outfield = DenseData(name='outfield', shape=shape, dtype=np.int32)
+    stencil = Eq(outfield.indexify(), outfield.indexify() + infield.indexify()*3.0)
+    op = Operator(stencil, dle=('blocking', {'blockinner': True, 'blockalways': True}))
+    op(infield=infield, outfield=outfield, autotune=True)
+    out = [i for i in buffer.getvalue().split('\n') if 'AutoTuner:' in i]
+    assert out[0].split('<')[1].split('>')[0] == expected
+
+    options['at_cache_size'] = None
+    configuration['autotuning'] = configuration._defaults['autotuning']
+
+    logger.removeHandler(temporary_handler)
+
+    temporary_handler.flush()
+    temporary_handler.close()
+    buffer.flush()
+    buffer.close()
+    set_log_level('INFO')
+
+
+def test_at_openmp():
+    """
+    Check that, when OpenMP is enabled, the loop schedule and the number of
+    threads are auto-tuned alongside the block shape.
+    """
+
+    buffer = StringIO()
+    temporary_handler = logging.StreamHandler(buffer)
+    logger.addHandler(temporary_handler)
+    set_log_level('DEBUG')
+    configuration['openmp'] = True
+    # Rebuild the compiler so that it picks up the OpenMP flags
+    configuration['compiler'] = configuration._defaults['compiler']
+    options['at_nthreads'] = [2, 1]
+
+    shape = (30, 30, 30)
+    infield = DenseData(name='infield', shape=shape, dtype=np.int32)
+    infield.data[:] = np.arange(reduce(mul, shape), dtype=np.int32).reshape(shape)
+    outfield = DenseData(name='outfield', shape=shape, dtype=np.int32)
+    stencil = Eq(outfield.indexify(), outfield.indexify() + infield.indexify()*3.0)
+    op = Operator(stencil, dle=('blocking,openmp', {'blockalways': True}))
+    assert 'omp_set_schedule' in str(op.ccode)
+    assert all(i in [p.name for p in op.parameters]
+               for i in ['nthreads', 'sched_kind', 'sched_chunk'])
+
+    op(infield=infield, outfield=outfield, autotune=True)
+    out = [i for i in buffer.getvalue().split('\n') if 'AutoTuner:' in i]
+    assert len([i for i in out if 'Block shape' in i]) == 3
+    assert len([i for i in out if 'OpenMP parameters' in i]) ==\
+        len(options['at_schedule']) + 2
+    assert np.all(outfield.data == infield.data*3)
+
+    # The OpenMP parameters can also be provided at apply time
+    op(infield=infield, outfield=outfield, nthreads=2, sched_kind=2, sched_chunk=4)
+    assert np.all(outfield.data == infield.data*6)
+
+    options['at_nthreads'] = None
+    configuration['openmp'] = configuration._defaults['openmp']
+    configuration['compiler'] = configuration._defaults['compiler']
+
+    logger.removeHandler(temporary_handler)
+
+    temporary_handler.flush()
+    temporary_handler.close()
+    buffer.flush()
+    buffer.close()
+    set_log_level('INFO')
+
+
+@pytest.mark.parametrize('size, expected', [
+    (262144, 256*1024), ('256 KB', 256*1024), ('1 MB', 1024**2), ('4096', 4096),
+    (None, None), ('unknown', None)
+])
+def test_cache_size(size, expected):
+    """Test that the cache sizes reported by cpuinfo, as integers in bytes or
+    as strings with a unit, are parsed into bytes"""
+    assert parse_cache_size(size) == expected
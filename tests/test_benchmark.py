@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+
+import copy
+
+import pytest
+
+from devito import configuration
+from devito.benchmark import ResultSet, compare, execute, sweep
+from devito.benchmark.__main__ import main
+
+
+def test_execute():
+    """
+    Check that a benchmark run reports build time, run time and performance.
+    """
+    config = (configuration['jit_cache'], configuration['autotuning_retune'])
+    record = execute('diffusion', repeats=2, shape=(30, 30), timesteps=10)
+    assert record['problem'] == 'diffusion'
+    assert record['params'] == {'shape': (30, 30), 'timesteps': 10}
+    assert record['build_time'] > 0
+    assert len(record['run_time']) == 2
+    assert 'main' in record['sections']
+    assert record['sections']['main']['gflopss'] >= 0
+    assert record['metadata']['dse'] == 'advanced'
+    assert record['metadata']['cold_build'] is True
+    # The JIT cache and the autotuning database are only bypassed while benchmarking
+    assert (configuration['jit_cache'], configuration['autotuning_retune']) == config
+
+
+def test_execute_unknown():
+    with pytest.raises(ValueError):
+        execute('unknown')
+
+
+def test_sweep_and_store(tmpdir):
+    """
+    Check that all combinations of parameters are benchmarked, and that the
+    results are stored under the given tag, and can be reloaded.
+    """
+    results = ResultSet(str(tmpdir), 'mytag')
+    records = sweep('diffusion', {'shape': [(20, 20), (30, 30)],
+                                  'dse': ['noop', 'advanced'],
+                                  'timesteps': 5}, repeats=1, results=results)
+    assert len(records) == 4
+    assert tmpdir.join('mytag', 'results.json').check()
+
+    loaded = ResultSet(str(tmpdir), 'mytag').load()
+    assert len(loaded.records) == 4
+    assert set(loaded.records) == set(results.records)
+
+    # Result sets are versioned by default
+    from devito import __version__
+    assert ResultSet(str(tmpdir)).tag == __version__
+
+
+def test_compare(tmpdir):
+    """
+    Check that a slowdown beyond the threshold is flagged as a regression.
+    """
+    reference = ResultSet(str(tmpdir), 'reference')
+    reference.add(execute('diffusion', repeats=1, shape=(20, 20), timesteps=5))
+    current = ResultSet(str(tmpdir), 'current')
+    for record in reference.records.values():
+        record = copy.deepcopy(record)
+        record['run_time'] = [i*2 for i in record['run_time']]
+        current.add(record)
+
+    comparisons = compare(reference, current, threshold=0.05)
+    assert len(comparisons) == 2
+    assert [i.metric for i in comparisons if i.regression] == ['run_time']
+    assert not any(i.regression for i in compare(reference, reference))
+
+    # The command line interface returns non-zero in case of regressions
+    reference.save()
+    current.save()
+    argv = ['-r', str(tmpdir), 'compare']
+    assert main(argv + ['reference', 'current']) == 1
+    assert main(argv + ['reference', 'reference']) == 0
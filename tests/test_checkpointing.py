@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sympy import Eq
+
+from devito import Backward, DenseData, Operator, TimeData
+from devito.checkpointing import (CheckpointOperator, DataCheckpoint, Revolver,
+                                  REVERSE, revolve, revolve_cost)
+
+
+def optimal_cost(nsteps, nsnapshots, cache={}):
+    """Number of forward timesteps of an optimal schedule, by exhaustive search"""
+    if nsteps == 1:
+        return 1
+    if nsnapshots == 0:
+        return nsteps*(nsteps + 1)//2
+    if (nsteps, nsnapshots) not in cache:
+        cache[(nsteps, nsnapshots)] = min(i + optimal_cost(nsteps - i, nsnapshots - 1) +
+                                          optimal_cost(i, nsnapshots)
+                                          for i in range(1, nsteps))
+    return cache[(nsteps, nsnapshots)]
+
+
+@pytest.mark.parametrize('nsteps', [1, 2, 7, 30, 64])
+@pytest.mark.parametrize('nsnapshots', [0, 1, 2, 5])
+def test_revolve(nsteps, nsnapshots):
+    """Test that the binomial schedule reverses all timesteps, each from the
+    right forward state, with optimal recomputation and bounded storage"""
+    state = 0
+    storage = {}
+    reversed_steps = []
+    advanced = 0
+    for action in revolve(nsteps, nsnapshots):
+        if action[0] == 'advance':
+            assert action[1] == state
+            state = action[2]
+            advanced += action[2] - action[1]
+        elif action[0] == 'takeshot':
+            storage[action[1]] = state
+            assert len(storage) <= nsnapshots + 1
+        elif action[0] == 'restore':
+            state = storage[action[1]]
+        elif action[0] == 'free':
+            storage.pop(action[1])
+        elif action[0] == REVERSE:
+            assert state == action[1] + 1
+            reversed_steps.append(action[1])
+    assert reversed_steps == list(reversed(range(nsteps)))
+    assert not storage
+    assert advanced == revolve_cost(nsteps, nsnapshots)
+    assert advanced == optimal_cost(nsteps, nsnapshots)
+
+
+@pytest.mark.parametrize('ncheckpoints', [1, 3, 10])
+def test_revolver(ncheckpoints, shape=(8, 8), nt=20):
+    """Test that the reverse computation sees the same forward states with
+    checkpointing as when all of the timesteps are stored"""
+    def operators(u):
+        g = DenseData(name='g', shape=shape)
+        fwd = Operator(Eq(u.forward, 1.01*u + 1.))
+        rev = Operator(Eq(g, 0.5*g + u.forward), time_axis=Backward)
+        return fwd, rev, g
+
+    # The reference, with all of the timesteps stored
+    u = TimeData(name='u', shape=shape, time_order=1, save=True, time_dim=nt)
+    u.data[0] = 1.
+    fwd, rev, g = operators(u)
+    fwd.apply(u=u)
+    rev.apply(u=u, g=g)
+
+    # Only ``ncheckpoints`` copies of the buffered wavefield are stored
+    ub = TimeData(name='ub', shape=shape, time_order=1)
+    ub.data[0] = 1.
+    fwd, rev, gb = operators(ub)
+    revolver = Revolver(DataCheckpoint(ub), CheckpointOperator(fwd, time=nt),
+                        CheckpointOperator(rev, time=nt), ncheckpoints, 0, nt - 1)
+    revolver.apply_forward()
+    assert np.allclose(ub.data[(nt - 1) % 2], u.data[nt - 1])
+    revolver.apply_reverse()
+    assert np.allclose(gb.data, g.data)
+    assert revolver.stats['checkpoints'] <= ncheckpoints
+    assert revolver.stats['forward'] == revolve_cost(nt - 1, ncheckpoints - 1)
@@ -0,0 +1,127 @@
+from __future__ import absolute_import
+
+import os
+
+import numpy as np
+import pytest
+from sympy import Eq
+
+import devito.compiler as compiler
+from devito import DenseData, TimeData, Operator, configuration
+from devito.compiler import GNUCompiler, evict_jit_cache, get_lib_ext, jit_compile
+
+
+@pytest.fixture
+def jitdir(tmpdir):
+    configuration['jit_cache_dir'] = str(tmpdir)
+    yield str(tmpdir)
+    configuration['jit_cache_dir'] = configuration._defaults['jit_cache_dir']
+
+
+def simple_operator():
+    a = DenseData(name='a', shape=(10, 10), dtype=np.float32)
+    return Operator(Eq(a, a + 1.))
+
+
+def test_jit_cache_hit(jitdir, monkeypatch):
+    """
+    Test that a shared object found in the JIT cache is not recompiled.
+    """
+    op = simple_operator()
+    basename = jit_compile(op.ccode, op._compiler)
+    assert os.path.dirname(basename) == jitdir
+    assert os.path.exists('%s.%s' % (basename, get_lib_ext()))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Unexpected recompilation")
+    monkeypatch.setattr(compiler, 'extension_file_from_string', fail)
+    assert jit_compile(op.ccode, op._compiler) == basename
+
+    # No stale temporaries must be left behind
+    assert len(os.listdir(jitdir)) == 2
+
+
+def test_jit_cache_key(jitdir):
+    """
+    Test that the JIT cache key depends on both the code and the toolchain.
+    """
+    op = simple_operator()
+    gcc = GNUCompiler()
+    key = gcc.signature
+    gcc.cflags.append('-DDEVITO_TEST')
+    assert gcc.signature != key
+    assert GNUCompiler().signature == key
+    assert 'GNUCompiler' in key
+
+    basename = jit_compile(op.ccode, op._compiler)
+    assert jit_compile(str(op.ccode) + '\n', op._compiler) != basename
+
+
+def test_jit_cache_eviction(jitdir):
+    """
+    Test that the least recently used shared objects are evicted first.
+    """
+    ext = get_lib_ext()
+    files = [os.path.join(jitdir, '%s.%s' % (i, ext)) for i in 'abc']
+    for i, f in enumerate(files):
+        with open(f, 'wb') as handle:
+            handle.write(b'0' * 400 * 1024)
+        os.utime(f, (i, i))
+
+    configuration['jit_cache_size'] = 1
+    evict_jit_cache(jitdir, keep=files[2])
+    configuration['jit_cache_size'] = configuration._defaults['jit_cache_size']
+
+    assert not os.path.exists(files[0])
+    assert os.path.exists(files[1])
+    assert os.path.exists(files[2])
+
+
+def test_jit_split(jitdir):
+    """
+    Test that compiling elemental functions as separate translation units
+    produces the same results as compiling a single translation unit, and
+    that each translation unit is cached individually.
+    """
+    a = TimeData(name='a', shape=(20, 20, 20), dtype=np.float32)
+    b = TimeData(name='b', shape=(20, 20, 20), dtype=np.float32)
+    a.data[:] = 1.
+    b.data[:] = 1.
+    dle = ('advanced', {'blockalways': True})
+
+    op = Operator(Eq(a.forward, a + 1.), dle=dle)
+    op.apply(a=a, time=10)
+
+    configuration['jit_split'] = True
+    op_split = Operator(Eq(b.forward, b + 1.), dle=dle)
+    assert len(op_split.ccode_units) == len(op_split.elemental_functions) + 1
+    op_split.apply(b=b, time=10)
+    configuration['jit_split'] = configuration._defaults['jit_split']
+
+    assert np.allclose(a.data, b.data)
+    objects = [i for i in os.listdir(jitdir) if i.endswith('.o')]
+    assert len(objects) == len(op_split.ccode_units)
+
+
+def test_compile_async(jitdir):
+    """
+    Test that an Operator compiled in the background can be applied, and that
+    a background compilation is triggered at construction time if requested.
+    """
+    a = DenseData(name='a', shape=(10, 10), dtype=np.float32)
+    a.data[:] = 1.
+
+    op = Operator(Eq(a, a + 1.))
+    future = op.compile_async()
+    assert op.compile_async() is future
+    op.apply(a=a)
+    assert future.ready()
+    assert os.path.dirname(future.get()) == jitdir
+    assert np.allclose(a.data, 2.)
+
+    configuration['jit_async'] = True
+    op = Operator(Eq(a, a + 2.))
+    configuration['jit_async'] = configuration._defaults['jit_async']
+    assert op._compiling is not None
+    op.apply(a=a)
+    assert np.allclose(a.data, 4.)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from sympy import Eq
+
+from devito import Operator, TimeData
+from devito.compression import BFloat16, FixedPoint, Float16, get_codec
+
+
+@pytest.fixture(scope="session")
+def values():
+    return np.random.RandomState(0).randn(1000).astype(np.float32)
+
+
+@pytest.mark.parametrize('codec', [Float16(), BFloat16(), FixedPoint(8, 4.),
+                                   FixedPoint(16, 4.)])
+def test_codec_error(codec, values):
+    """Test that the decoded values are within the codec's error bound."""
+    codes = codec.encode(values)
+    assert codes.dtype == codec.dtype
+    assert np.all(np.abs(codec.decode(codes) - values) <= codec.error(values))
+
+
+def test_fixed_point_clipping():
+    codec = FixedPoint(8, 1.)
+    values = np.array([-3., -1., 0., 1., 3.], dtype=np.float32)
+    assert np.all(codec.decode(codec.encode(values)) == [-1., -1., 0., 1., 1.])
+    assert np.all(np.abs(codec.decode(codec.encode(values)) - values) <=
+                  codec.error(values))
+
+
+@pytest.mark.parametrize('tolerance, bits', [(1e-2, 8), (1e-3, 16)])
+def test_fixed_point_tolerance(tolerance, bits):
+    codec = FixedPoint.for_tolerance(2., tolerance)
+    assert codec.bits == bits
+    assert codec.error(np.float32(1.)) <= tolerance
+
+
+def test_invalid_codecs():
+    assert get_codec(None) is None
+    assert get_codec('float16') == Float16()
+    assert FixedPoint(8, 1.) != FixedPoint(8, 2.)
+    with pytest.raises(ValueError):
+        get_codec('zfp')
+    with pytest.raises(ValueError):
+        FixedPoint(12, 1.)
+    with pytest.raises(ValueError):
+        FixedPoint.for_tolerance(1., 1e-6)
+    with pytest.raises(ValueError):
+        TimeData(name='uinvalid', shape=(4, 4), compression='float16')
+
+
+@pytest.mark.parametrize('compression, name', [
+    ('float16', 'uf16'), ('bfloat16', 'ubf16'),
+    (FixedPoint(8, 4.), 'ufx8'), (FixedPoint(16, 4.), 'ufx16')
+])
+def test_compressed_save(compression, name, shape=(6, 7), nt=10):
+    """Test that the values encoded and decoded by the generated code are
+    those encoded and decoded by the codec."""
+    codec = get_codec(compression)
+    u = TimeData(name='%s_u' % name, shape=shape, time_order=1)
+    u.data[0] = np.random.RandomState(0).randn(*shape).astype(np.float32)
+    uref = TimeData(name='%s_ref' % name, shape=shape, time_order=1, save=True,
+                    time_dim=nt)
+    usave = TimeData(name='%s_save' % name, shape=shape, time_order=1, save=True,
+                     time_dim=nt, compression=compression)
+    assert usave.data.dtype == codec.dtype
+    Operator([Eq(u.forward, 1.1*u + 0.01), Eq(uref, u), Eq(usave, u)]).apply(time=nt)
+    assert np.all(usave.data[:nt - 1] == codec.encode(uref.data[:nt - 1]))
+
+    g = TimeData(name='%s_g' % name, shape=shape, time_order=1, save=True,
+                 time_dim=nt)
+    Operator(Eq(g, 2*usave)).apply(time=nt)
+    assert np.allclose(g.data[:nt - 1], 2*codec.decode(usave.data[:nt - 1]),
+                       rtol=1e-6)
+
+
+@pytest.mark.parametrize('first, second', [
+    ('float16', 'bfloat16'), (FixedPoint(16, 1.), FixedPoint(16, 4.))
+])
+def test_compressed_operator_cache(first, second, shape=(6, 7), nt=10):
+    """Test that Operators saving data compressed by codecs with the same
+    data type are not mistaken for one another."""
+    def save(compression):
+        u = TimeData(name='u', shape=shape, time_order=1)
+        u.data[0] = np.random.RandomState(0).randn(*shape).astype(np.float32)
+        uref = TimeData(name='uref', shape=shape, time_order=1, save=True,
+                        time_dim=nt)
+        usave = TimeData(name='usave', shape=shape, time_order=1, save=True,
+                         time_dim=nt, compression=compression)
+        op = Operator([Eq(u.forward, 1.1*u), Eq(uref, u), Eq(usave, u)])
+        op.apply(time=nt)
+        assert np.all(usave.data[:nt - 1] == usave.codec.encode(uref.data[:nt - 1]))
+        return op, usave
+
+    op1, usave1 = save(first)
+    op2, usave2 = save(second)
+    assert usave1.data.dtype == usave2.data.dtype
+    assert op1 is not op2
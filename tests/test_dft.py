@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from sympy import Eq
+
+from devito import Operator, TimeData, x, y
+from devito.dft import FrequencyData
+
+
+@pytest.mark.parametrize('frequencies', [[0.5], [0.2, 1.25, 3.]])
+def test_frequency_data(frequencies, shape=(11, 11), nt=30, dt=0.1):
+    """Test that the Fourier coefficients accumulated on the fly, with a
+    buffered wavefield, match the DFT of the whole saved wavefield"""
+    def operator(u, eqs=None):
+        eqn = Eq(u.forward, 2*u - u.backward + 0.05*(u.dx2 + u.dy2))
+        return Operator([eqn] + (eqs or []), subs={x.spacing: 1., y.spacing: 1.})
+
+    initial = np.zeros(shape, dtype=np.float32)
+    initial[4:7, 4:7] = 1.
+
+    # The reference, with all of the timesteps stored
+    u = TimeData(name='u', shape=shape, time_order=2, space_order=2,
+                 save=True, time_dim=nt)
+    u.data[0] = initial
+    u.data[1] = initial
+    operator(u).apply(time=nt)
+    n = np.arange(1, nt - 1)
+    expected = np.array([np.tensordot(np.exp(-2j*np.pi*f*n*dt)*dt, u.data[1:nt - 1],
+                                      axes=(0, 0)) for f in frequencies])
+
+    ub = TimeData(name='ub', shape=shape, time_order=2, space_order=2)
+    ub.data[:] = initial
+    freq = FrequencyData(name='ubf', shape=shape, frequencies=frequencies,
+                         nt=nt, dt=dt)
+    operator(ub, freq.accumulate(ub)).apply(time=nt)
+    assert freq.data.shape == (len(frequencies),) + shape
+    assert np.allclose(freq.data, expected, rtol=1e-4, atol=1e-5)
+
+    # Further runs add to the coefficients, unless these are zeroed
+    freq.reset()
+    assert np.all(freq.data == 0)
@@ -10,7 +10,8 @@ from conftest import EVAL
 
 from devito.dle import retrieve_iteration_tree, transform
 from devito.dle.backends import DevitoRewriter as Rewriter
-from devito import DenseData, TimeData, Operator, t, x, y
+from devito import (DenseData, Dimension, PointData, TimeData, Operator,
+                    configuration, t, x, y, z, time)
 from devito.nodes import ELEMENTAL, Expression, Function, Iteration, List, tagger
 from devito.visitors import (ResolveIterationVariable, SubstituteExpression,
                              Transformer, FindNodes)
@@ -368,6 +369,66 @@ def test_cache_blocking_edge_cases_highorder(shape, blockshape):
     assert np.equal(wo_blocking.data, w_blocking.data).all()
 
 
+@pytest.mark.parametrize("shape", [(20, 33), (45, 31, 45)])
+@pytest.mark.parametrize("blocktime", [1, 3, 4])
+@pytest.mark.parametrize("blockshape", [None, 5, (7, 9)])
+def test_time_tiling(shape, blocktime, blockshape):
+    wo_tiling, _ = _new_operator3(shape, time_order=1, dle='noop')
+    w_tiling, op = _new_operator3(shape, time_order=1,
+                                  dle=('tiling', {'blocktime': blocktime,
+                                                  'blockshape': blockshape}))
+
+    assert op.dle_flags['tiling']
+    assert np.equal(wo_tiling.data, w_tiling.data).all()
+
+
+@pytest.mark.parametrize("blockinner,expected", [
+    (False, ['time_tile', 'x_tile', 'time', 'x', 'y']),
+    (True, ['time_tile', 'x_tile', 'y_tile', 'time', 'x', 'y'])
+])
+def test_time_tiling_structure(blockinner, expected):
+    _, op = _new_operator3((20, 33), time_order=1,
+                           dle=('tiling', {'blockinner': blockinner}))
+
+    trees = retrieve_iteration_tree(op)
+    assert len(trees) == 1
+    tree = trees[0]
+    assert [i.index for i in tree] == expected
+    assert tree[0].is_Sequential and not tree[0].is_TimeTiled
+    assert all(i.is_TimeTiled and not i.is_Parallel for i in tree[1:-3])
+    assert tree[-3].is_Sequential and tree[-3].is_TimeTiled
+    assert 'time_tile_size' in [i.name for i in op.parameters]
+
+
+def test_time_tiling_sparse():
+    """
+    Test that time tiling can be applied in presence of the injection and the
+    interpolation of sparse points, and that the result is the same as the
+    untiled one.
+    """
+    results = []
+    for dle in ['noop', ('tiling', {'blocktime': 4, 'blockshape': (7, 9)})]:
+        u = TimeData(name='u', shape=(30, 30), time_order=2, space_order=2)
+        # Different numbers of points require different point dimensions
+        src = PointData(name='src', nt=12, npoint=3, ndim=2,
+                        dimensions=[time, Dimension('p_src')])
+        src.coordinates.data[:] = np.array([[5.5, 5.5], [14.2, 20.7], [26., 3.1]])
+        src.data[:] = 1.
+        rec = PointData(name='rec', nt=12, npoint=4, ndim=2,
+                        dimensions=[time, Dimension('p_rec')])
+        rec.coordinates.data[:] = np.array([[2.3, 7.5], [13.9, 13.9],
+                                            [17.5, 27.1], [27.2, 16.4]])
+        eqn = Eq(u.forward, 2*u - u.backward + 0.1*(u.dx2 + u.dy2))
+        op = Operator([eqn] + src.inject(u.forward, src) + rec.interpolate(expr=u),
+                      subs={x.spacing: 1., y.spacing: 1.}, dle=dle)
+        op.apply(t=12)
+        results.append((u.data.copy(), rec.data.copy()))
+
+    assert op.dle_flags['tiling']
+    assert np.allclose(results[0][0], results[1][0], rtol=1e-5)
+    assert np.allclose(results[0][1], results[1][1], rtol=1e-5)
+
+
 @pytest.mark.parametrize('exprs,expected', [
     # trivial 1D
     (['Eq(fa[x], fa[x] + fb[x])'],
@@ -498,3 +559,37 @@ def test_composite_transformation(shape):
     w_blocking, _ = _new_operator1(shape, dle='advanced')
 
     assert np.equal(wo_blocking.data, w_blocking.data).all()
+
+
+@pytest.mark.parametrize("precompute", [False, True])
+def test_sparse_injection_ompized(precompute):
+    """
+    Test that the injection of sparse points, which may share grid cells,
+    is parallelized through atomic updates, provided that there are enough
+    points, and that the result is the same as the sequential one.
+    """
+    configuration['openmp'] = True
+    configuration['compiler'] = configuration._defaults['compiler']
+
+    results = []
+    for dle in ['noop', 'advanced']:
+        u = TimeData(name='u', shape=(20, 20, 20), time_order=1)
+        src = PointData(name='src', nt=5, npoint=500, ndim=3)
+        src.coordinates.data[:] = np.random.RandomState(0).rand(500, 3)*0.9
+        src.data[:] = 1.
+        if precompute:
+            src.precompute(0.05)
+        op = Operator([Eq(u.forward, u + 1.)] + src.inject(u.forward, src),
+                      subs={x.spacing: .05, y.spacing: .05, z.spacing: .05}, dle=dle)
+        op.apply(t=5)
+        results.append(u.data.copy())
+
+    configuration['openmp'] = configuration._defaults['openmp']
+    configuration['compiler'] = configuration._defaults['compiler']
+
+    sparse = [i for i in retrieve_iteration_tree(op) if i[-1].dim.name == 'p'][0][-1]
+    assert sparse.is_ParallelAtomic
+    assert 'if(p_size >= %d)' % Rewriter.thresholds['min_atomic'] in\
+        sparse.pragmas[0].value
+    assert str(op.ccode).count('omp atomic') == 8
+    assert np.allclose(results[0], results[1], rtol=1e-5)
@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 from numpy import linalg
 
+from devito.compression import FixedPoint
 from devito.logger import info
 from examples.seismic.acoustic.acoustic_example import smooth10, acoustic_setup as setup
 from examples.seismic import Receiver
@@ -74,6 +75,89 @@ def test_gradientFWI(shape, time_order, space_order):
     assert np.isclose(p2[0], 2.0, rtol=0.1)
 
 
+@pytest.mark.parametrize('ncheckpoints', [1, 5, 40])
+@pytest.mark.parametrize('shape', [(70, 80)])
+def test_gradient_checkpointing(shape, ncheckpoints):
+    """
+    This test ensures that the FWI gradient computed by recomputing the forward
+    wavefield from checkpoints is the same as the one computed from the full
+    forward wavefield.
+    """
+    spacing = tuple(15. for _ in shape)
+    wave = setup(shape=shape, spacing=spacing, time_order=2, space_order=4,
+                 nbpml=12)
+    m0 = smooth10(wave.model.m.data, wave.model.shape_domain)
+
+    rec, _, _ = wave.forward()
+    rec0, u0, _ = wave.forward(m=m0, save=True)
+    residual = Receiver(name='rec', data=rec0.data - rec.data,
+                        coordinates=rec0.coordinates.data)
+
+    gradient, _ = wave.gradient(residual, u0, m=m0)
+    gradient_cp, stats = wave.gradient(residual, m=m0, ncheckpoints=ncheckpoints)
+    assert stats['checkpoints'] <= ncheckpoints
+    assert stats['reverse'] == stats['timesteps']
+    assert np.allclose(gradient_cp.data, gradient.data, rtol=1e-5,
+                       atol=1e-6*np.abs(gradient.data).max())
+
+
+@pytest.mark.parametrize('subsample, tolerance', [(1, 1e-5), (2, 1e-2), (4, 1e-2)])
+@pytest.mark.parametrize('shape', [(70, 80)])
+def test_gradient_subsampled(shape, subsample, tolerance):
+    """
+    This test ensures that the FWI gradient computed from a forward wavefield
+    saved every ``subsample`` timesteps is close to the one computed from the
+    full forward wavefield.
+    """
+    spacing = tuple(15. for _ in shape)
+    wave = setup(shape=shape, spacing=spacing, time_order=2, space_order=4,
+                 nbpml=12)
+    m0 = smooth10(wave.model.m.data, wave.model.shape_domain)
+
+    rec, _, _ = wave.forward()
+    rec0, u0, _ = wave.forward(m=m0, save=True)
+    residual = Receiver(name='rec', data=rec0.data - rec.data,
+                        coordinates=rec0.coordinates.data)
+    gradient, _ = wave.gradient(residual, u0, m=m0)
+
+    rec1, usave, _ = wave.forward(m=m0, save=True, subsample=subsample)
+    assert np.allclose(rec1.data, rec0.data)
+    assert usave.shape[0] == (u0.shape[0] + subsample - 1) // subsample
+    gradient_sub, _ = wave.gradient(residual, usave, m=m0)
+    error = linalg.norm(gradient_sub.data - gradient.data)/linalg.norm(gradient.data)
+    info('Relative error of the subsampled gradient: %s' % error)
+    assert error < tolerance
+
+
+@pytest.mark.parametrize('compression, tolerance', [
+    ('float16', 1e-3), ('bfloat16', 1e-2), (FixedPoint(16, 100.), 1e-3)
+])
+@pytest.mark.parametrize('shape', [(70, 80)])
+def test_gradient_compressed(shape, compression, tolerance):
+    """
+    This test ensures that the FWI gradient computed from a compressed forward
+    wavefield is close to the one computed from the full forward wavefield.
+    """
+    spacing = tuple(15. for _ in shape)
+    wave = setup(shape=shape, spacing=spacing, time_order=2, space_order=4,
+                 nbpml=12)
+    m0 = smooth10(wave.model.m.data, wave.model.shape_domain)
+
+    rec, _, _ = wave.forward()
+    rec0, u0, _ = wave.forward(m=m0, save=True)
+    residual = Receiver(name='rec', data=rec0.data - rec.data,
+                        coordinates=rec0.coordinates.data)
+    gradient, _ = wave.gradient(residual, u0, m=m0)
+
+    rec1, usave, _ = wave.forward(m=m0, save=True, compression=compression)
+    assert np.allclose(rec1.data, rec0.data)
+    assert usave.data.nbytes * usave.codec.ratio == u0.data.nbytes
+    gradient_cmp, _ = wave.gradient(residual, usave, m=m0)
+    error = linalg.norm(gradient_cmp.data - gradient.data)/linalg.norm(gradient.data)
+    info('Relative error of the compressed gradient: %s' % error)
+    assert error < tolerance
+
+
 @pytest.mark.parametrize('space_order', [4])
 @pytest.mark.parametrize('time_order', [2])
 @pytest.mark.parametrize('shape', [(70, 80)])
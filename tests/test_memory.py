@@ -1,4 +1,10 @@
-from devito import DenseData
+import os
+import pickle
+
+from sympy import Eq
+
+from devito import DenseData, Operator, TimeData, clear_cache
+from devito.memory import MappedMemory, SharedMemory
 import pytest
 import numpy as np
 
@@ -10,3 +16,122 @@ def test_first_touch(shape):
     m2 = DenseData(name='m2', shape=shape, first_touch=False)
     assert(np.allclose(m2.data, 0))
     assert(np.array_equal(m.data, m2.data))
+
+
+def test_shared_memory():
+    """Test that data moved into shared memory is preserved, seen by
+    other processes, and used by Operators."""
+    a = DenseData(name='a', shape=(20, 20))
+    a.data[:] = 1.
+    shm = a.share()
+    assert isinstance(shm, SharedMemory) and a.share() is shm
+    assert np.all(a.data == 1.)
+
+    # Attach to the segment, as another process would do through pickling
+    other = pickle.loads(pickle.dumps(shm))
+    assert other.name == shm.name
+    other.ndpointer[:] = 2.
+    assert np.all(a.data == 2.)
+
+    b = DenseData(name='b', shape=(20, 20))
+    Operator(Eq(b, a + 1.))(a=a, b=b)
+    assert np.all(b.data == 3.)
+
+    path = shm.path
+    del a, shm, other
+    clear_cache()
+    assert not os.path.exists(path)
+
+
+def test_shared_memory_binding():
+    """Test that moving data into shared memory after it was bound to an
+    Operator, without being passed at apply-time, is seen by later runs."""
+    a = DenseData(name='a', shape=(20, 20))
+    b = DenseData(name='b', shape=(20, 20))
+    b.data[:] = 1.
+    op = Operator(Eq(a, b + 1.))
+    op(a=a)
+    assert np.all(a.data == 2.)
+
+    view = b.data
+    b.share()
+    b.data[:] = 3.
+    op(a=a)
+    assert len(op._bindings) == 1
+    assert np.all(a.data == 4.)
+
+    # Earlier views of the data remain valid, although no longer shared
+    clear_cache()
+    view[:] = 5.
+    assert np.all(view == 5.) and np.all(b.data == 3.)
+
+
+@pytest.mark.parametrize('first_touch', [False, True])
+def test_shared_memory_allocation(first_touch):
+    """Test that data allocated straight into shared memory is initialized
+    as any other data."""
+    a = DenseData(name='a', shape=(20, 20), first_touch=first_touch)
+    assert isinstance(a.share(), SharedMemory)
+    assert np.all(a.data == 0.)
+
+
+def test_mapped_memory_temporary():
+    """Test that data backed by a temporary file is zero-filled, used by
+    Operators, and saved timesteps may be prefetched or released."""
+    u = TimeData(name='umapped', shape=(20, 20), time_order=1, save=True,
+                 time_dim=10, memmap=True)
+    assert u._data_object is None
+    assert np.all(u.data == 0.)
+    assert isinstance(u._data_object, MappedMemory)
+    assert u._data_object.path is None
+
+    u.data[0] = 1.
+    Operator(Eq(u.forward, u + 1.)).apply(time=10)
+    assert np.all(u.data == np.arange(1., 11.).reshape(10, 1, 1))
+
+    u.advise('willneed', 4, 8)
+    u.advise('dontneed')
+    assert np.all(u.data == np.arange(1., 11.).reshape(10, 1, 1))
+    with pytest.raises(ValueError):
+        u.advise('always')
+
+
+def test_mapped_memory_file(tmpdir):
+    """Test that data backed by a file is written back to it, and that
+    existing files are opened rather than overwritten."""
+    path = str(tmpdir.join('a.bin'))
+    a = DenseData(name='amapped', shape=(20, 20), memmap=path)
+    a.data[:] = 1.
+    b = DenseData(name='bmapped', shape=(20, 20))
+    Operator(Eq(a, a + 2.))()
+    a._data_object.flush()
+    assert np.all(np.fromfile(path, dtype=np.float32) == 3.)
+
+    c = DenseData(name='cmapped', shape=(20, 20), memmap=path)
+    Operator(Eq(b, c + 1.))()
+    assert np.all(b.data == 4.)
+
+    with pytest.raises(ValueError):
+        DenseData(name='dmapped', shape=(40, 40), memmap=path).data
+
+
+def test_mapped_memory_copy_on_write(tmpdir):
+    """Test that data at an offset of a file, e.g. after a header, may be
+    opened and modified without altering the file."""
+    path = str(tmpdir.join('model.bin'))
+    values = np.arange(2*3*4, dtype=np.float32).reshape(2, 3, 4)
+    with open(path, 'wb') as f:
+        f.write(b'header')
+        values.tofile(f)
+
+    data = MappedMemory((2, 3, 4), path=path, mode='c', offset=6,
+                        advice='sequential')
+    assert np.all(data.ndpointer == values)
+    data.fill(0.)
+    del data
+    with open(path, 'rb') as f:
+        f.seek(6)
+        assert np.all(np.fromfile(f, dtype=np.float32) == values.ravel())
+
+    with pytest.raises(ValueError):
+        MappedMemory((2, 3, 4), path=str(tmpdir.join('missing.bin')), mode='c')
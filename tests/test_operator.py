@@ -1,16 +1,22 @@
 from __future__ import absolute_import
 
+import csv
+import json
 from collections import OrderedDict
+from threading import Event, Thread
+from timeit import default_timer as timer
 
-from conftest import EVAL, dims, dims_open
+from conftest import EVAL, dims, dims_open, switch_often
 
 import numpy as np
 import pytest
 from sympy import Eq  # noqa
 
 from devito import (clear_cache, Operator, ConstantData, DenseData, TimeData,
-                    PointData, Dimension, time, x, y, z, configuration)
+                    PointData, Dimension, time, x, y, z, configuration, info)
+from devito.exceptions import InvalidArgument
 from devito.foreign import Operator as OperatorForeign
+from devito.profiling import BuildProfile, calibrate
 from devito.dle import retrieve_iteration_tree
 from devito.visitors import IsPerfectIteration
 
@@ -269,6 +275,31 @@ class TestArguments(object):
         op(a=a, time=5)
         assert(np.allclose(a.data[0], 4.))
 
+    def test_time_range(self, nt=10):
+        """Test that an Operator may be applied over any window of timesteps,
+        resuming the computation where a previous run left it"""
+        i, j, k = dimify('i j k')
+        a = TimeData(name='a', dimensions=(i, j, k), save=True, time_dim=nt)
+        one = symbol(name='one', dimensions=(i, j, k), value=1.)
+        op = Operator(Eq(a.forward, a + one))
+
+        _, dim_sizes = op.arguments(a=a)
+        assert dim_sizes['time_s'] == 0 and dim_sizes['time_e'] == nt - 1
+
+        op(a=a, time_e=4)
+        assert(np.allclose(a.data[4], 4.))
+        assert(np.allclose(a.data[5:], 0.))
+        summary = op.apply(a=a, time_s=4, time_e=7)
+        assert(np.allclose(a.data[7], 7.))
+        assert(np.allclose(a.data[8:], 0.))
+        assert summary['main'].itershape[0] == 3
+
+        # Timesteps outside of the iteration space of the data are illegal
+        with pytest.raises(InvalidArgument):
+            op(a=a, time_s=4, time_e=nt)
+        with pytest.raises(InvalidArgument):
+            op(a=a, time_s=5, time_e=4)
+
     def test_override_composite_data(self):
         original_coords = (1., 1.)
         new_coords = (2., 2.)
@@ -289,6 +320,371 @@ class TestArguments(object):
         arg_name = src1.name + "_coords"
         assert(np.array_equal(args[arg_name], np.asarray((new_coords,))))
 
+    def test_binding_plan(self):
+        """Test that apply-time arguments are only derived once per binding plan,
+        while the user-provided data objects are patched in at each call"""
+        i, j, k = dimify('i j k')
+        a = TimeData(name='a', dimensions=(i, j, k))
+        one = symbol(name='one', dimensions=(i, j, k), value=1.)
+        a1 = TimeData(name='a1', dimensions=(i, j, k))
+        op = Operator(Eq(a.forward, a + one))
+
+        op(a=a, t=4)
+        op(a=a1, t=4)
+        assert len(op._bindings) == 1
+        assert(np.allclose(a.data[1], 3.))
+        assert(np.allclose(a1.data[1], 3.))
+
+        # A different number of timesteps requires a new plan
+        a1.data[0] = 0.
+        op(a=a1, t=6)
+        assert len(op._bindings) == 2
+        assert(np.allclose(a1.data[1], 5.))
+
+    def test_binding_overhead(self, ncalls=200):
+        """Benchmark the per-call overhead of apply() on a trivial Operator,
+        with and without binding plans, and check that the arguments are only
+        derived on the first call matching a plan"""
+        a = DenseData(name='a', shape=(4, 4))
+        b = DenseData(name='b', shape=(4, 4))
+        op = Operator(Eq(a, a + b))
+        op.cfunction
+
+        derivations = []
+        arguments = op.arguments
+
+        def counted(**kwargs):
+            derivations.append(kwargs)
+            return arguments(**kwargs)
+        op.arguments = counted
+
+        def run(bind):
+            start = timer()
+            for _ in range(ncalls):
+                values, _ = bind(a=a, b=b)
+                op.cfunction(*values)
+            return (timer() - start) / ncalls
+
+        slow = run(lambda **kwargs: (list(op.arguments(**kwargs)[0].values()), None))
+        assert len(derivations) == ncalls
+        fast = run(op._bind)
+        assert len(derivations) == ncalls + 1
+        info("apply() overhead per call: %.1f us (derivation) -> %.1f us (binding plan)"
+             % (slow*1e6, fast*1e6))
+
+    def test_binding_key(self):
+        """Test that scalar arguments with the same hash get distinct plans"""
+        i, j, k = dimify('i j k')
+        a = TimeData(name='a', dimensions=(i, j, k))
+        s = ConstantData(name='s')
+        op = Operator(Eq(a.forward, a + s))
+
+        assert hash(-1) == hash(-2)
+        op(a=a, s=-1, t=2)
+        assert np.allclose(a.data[1], -1.)
+        op(a=a, s=-2, t=2)
+        assert np.allclose(a.data[1], -2.)
+        assert len(op._bindings) == 2
+
+    def test_concurrent_apply(self, nruns=50):
+        """Test that Operators sharing the same Dimensions, as well as the same
+        Operator on different data, can be applied concurrently from several
+        threads"""
+        u = TimeData(name='u', shape=(10, 10), time_order=1)
+        v = TimeData(name='v', shape=(30, 20), time_order=1)
+        u1 = TimeData(name='u1', shape=(10, 10), time_order=1)
+        op_u = Operator(Eq(u.forward, u + 1))
+        op_v = Operator(Eq(v.forward, v + 2))
+
+        start = Event()
+
+        def run(op, data, value, nt):
+            start.wait()
+            for _ in range(nruns):
+                data.data[:] = 0.
+                kwargs = {op.output[0].name: data}
+                # Force a full derivation, as apply() would do on a binding miss
+                _, dim_sizes = op.arguments(t=nt, **kwargs)
+                assert [dim_sizes[i] for i in 'txy'] == [nt] + list(data.shape[1:])
+                summary = op.apply(t=nt, **kwargs)
+                assert np.allclose(data.data[(nt - 1) % 2], value*(nt - 1))
+                assert summary['main'].itershape[0] == nt - 1
+            return summary
+
+        jobs = [(op_u, u, 1., 5), (op_v, v, 2., 9), (op_u, u1, 1., 7)]
+        summaries = [None]*len(jobs)
+        errors = []
+
+        def worker(n, job):
+            try:
+                summaries[n] = run(*job)
+            except Exception as e:
+                errors.append(e)
+        threads = [Thread(target=worker, args=i) for i in enumerate(jobs)]
+        # Switch threads often, to make races in the derivation of arguments likely
+        with switch_often():
+            for i in threads:
+                i.start()
+            start.set()
+            for i in threads:
+                i.join()
+        assert errors == []
+        assert [list(i['main'].itershape) for i in summaries] == \
+            [[4, 10, 10], [8, 30, 20], [6, 10, 10]]
+        assert all(i.timings['main'] > 0 for i in summaries)
+
+
+class TestOperatorCache(object):
+
+    @classmethod
+    def setup_class(cls):
+        clear_cache()
+
+    def test_cache_hit(self):
+        """Test that structurally identical Operators share the lowered code,
+        but are bound to their own symbolic objects"""
+        a = DenseData(name='a', shape=(10, 10))
+        b = DenseData(name='b', shape=(10, 10))
+        a.data[:] = 1.
+        op = Operator(Eq(a, a + b + 3))
+
+        a1 = DenseData(name='a', shape=(10, 10))
+        b1 = DenseData(name='b', shape=(10, 10))
+        a1.data[:] = 2.
+        b1.data[:] = 1.
+        op1 = Operator(Eq(a1, a1 + b1 + 3))
+        assert op1 is not op
+        assert op1.body is op.body
+        assert [i.provider for i in op1.parameters if i.is_TensorArgument] == [a1, b1]
+
+        op1()
+        assert np.allclose(a1.data, 6.)
+        assert np.allclose(a.data, 1.)
+        op()
+        assert np.allclose(a.data, 4.)
+
+    @pytest.mark.parametrize('kwargs', [
+        {'shape': (10, 11)},
+        {'shape': (10, 10), 'dtype': np.float64},
+        {'shape': (10, 10), 'subs': {x.spacing: 2.}},
+        {'shape': (10, 10), 'dse': 'noop'},
+        {'shape': (10, 10), 'name': 'Other'},
+    ])
+    def test_cache_miss(self, kwargs):
+        """Test that Operators differing in shapes, types or options are
+        lowered independently"""
+        a = DenseData(name='a', shape=(10, 10))
+        op = Operator(Eq(a, a + x.spacing), subs={x.spacing: 1.})
+
+        shape, dtype = kwargs.pop('shape'), kwargs.pop('dtype', np.float32)
+        a1 = DenseData(name='a', shape=shape, dtype=dtype)
+        kwargs.setdefault('subs', {x.spacing: 1.})
+        op1 = Operator(Eq(a1, a1 + x.spacing), **kwargs)
+        assert op1.body is not op.body
+
+    def test_cache_disabled(self):
+        """Test that no Operator is retrieved from a disabled cache"""
+        a = DenseData(name='a', shape=(10, 10))
+        op = Operator(Eq(a, a + 1))
+        configuration['operator_cache'] = False
+        op1 = Operator(Eq(a, a + 1))
+        configuration['operator_cache'] = configuration._defaults['operator_cache']
+        assert op1.body is not op.body
+
+
+class TestProfiling(object):
+
+    def setup_method(self, method):
+        configuration['profiling'] = 'advanced'
+
+    def teardown_method(self, method):
+        configuration['profiling'] = configuration._defaults['profiling']
+        configuration['profiling_counters'] = \
+            configuration._defaults['profiling_counters']
+
+    def test_basic_unchanged(self):
+        """Test that the basic profiling mode only times the profiled sections"""
+        configuration['profiling'] = 'basic'
+        u = TimeData(name='u', shape=(10, 10), time_order=1)
+        op = Operator(Eq(u.forward, u + 1))
+        assert 'nsteps' not in str(op.ccode)
+        summary = op.apply(t=5)
+        assert summary.details == {}
+        assert summary.steps == {}
+
+    def test_timesteps(self):
+        """Test that the time taken by each timestep is recorded"""
+        u = TimeData(name='u', shape=(10, 10), time_order=1)
+        op = Operator(Eq(u.forward, u + 1))
+        summary = op.apply(t=10)
+        assert np.allclose(u.data[1], 9.)
+        steps = summary.steps['main']
+        assert steps.size == summary['main'].itershape[0]
+        assert np.isclose(steps.sum(), summary.timings['main'], atol=1e-5)
+        counts, _ = summary.histogram('main', bins=4)
+        assert counts.sum() == steps.size
+
+        # Only the steps of the last run are recorded
+        summary = op.apply(t=5)
+        assert summary.steps['main'].size == summary['main'].itershape[0]
+
+    def test_threads(self):
+        """Test that the time spent by each thread in a parallel region
+        is recorded"""
+        configuration['openmp'] = True
+        configuration['compiler'] = configuration._defaults['compiler']
+        u = TimeData(name='u', shape=(20, 20), time_order=1)
+        op = Operator(Eq(u.forward, u + 1), dle='openmp')
+        assert 'nowait' in str(op.ccode)
+        summary = op.apply(t=10, nthreads=2)
+        configuration['openmp'] = configuration._defaults['openmp']
+        configuration['compiler'] = configuration._defaults['compiler']
+        assert np.allclose(u.data[1], 9.)
+        threads = summary.threads['main']
+        assert threads.size == 2
+        assert np.all(threads > 0)
+
+    def test_counters(self):
+        """Test that the hardware counters are collected, or read as 0 if
+        not accessible"""
+        configuration['profiling_counters'] = ('cycles', 'cache_misses')
+        u = TimeData(name='u', shape=(10, 10), time_order=1)
+        op = Operator(Eq(u.forward, u + 1))
+        assert 'perf_event_open' in str(op.ccode)
+        summary = op.apply(t=5)
+        assert np.allclose(u.data[0], 4.)
+        counters = summary.counters['main']
+        assert list(counters) == ['cycles', 'cache_misses']
+        assert all(i >= 0 for i in counters.values())
+
+    @pytest.mark.parametrize('filename', ['perf.json', 'perf.csv'])
+    def test_export(self, tmpdir, filename):
+        """Test that performance reports are appended to a JSON/CSV file"""
+        configuration['profiling'] = 'basic'
+        configuration['profiling_report'] = str(tmpdir.join(filename))
+        u = TimeData(name='u', shape=(10, 10, 10), time_order=1)
+        op = Operator(Eq(u.forward, u + 1), dle=('blocking', {'blockalways': True}))
+        summary = op.apply(t=5)
+        summary = op.apply(t=5)
+        configuration['profiling_report'] = configuration._defaults['profiling_report']
+
+        metadata = summary.metadata
+        assert metadata['name'] == op.name
+        assert metadata['dse'] == configuration['dse']
+        assert metadata['dle'] == 'blocking'
+        assert metadata['ccode_hash'] in op._lib.name
+        assert len(metadata['dle_arguments']) == 2
+
+        lines = tmpdir.join(filename).read().strip().split('\n')
+        if filename.endswith('.json'):
+            assert len(lines) == 2
+            report = json.loads(lines[-1])
+            assert report['metadata']['ccode_hash'] == metadata['ccode_hash']
+            assert report['sections']['main']['itershape'] == [4, 10, 10, 10]
+        else:
+            assert len(lines) == 3
+            report = list(csv.DictReader(lines))
+            assert len(report) == 2
+            assert report[-1]['section'] == 'main'
+            assert float(report[-1]['time']) == summary['main'].time
+            assert json.loads(report[-1]['dle_arguments']) == metadata['dle_arguments']
+
+    def test_export_config(self, tmpdir):
+        """Test that performance reports follow the configuration the Operator
+        was built with, rather than that in place when it is run"""
+        configuration['profiling_report'] = str(tmpdir.join('perf1.json'))
+        u = TimeData(name='u', shape=(10, 10), time_order=1)
+        op1 = Operator(Eq(u.forward, u + 1))
+        configuration['profiling_report'] = str(tmpdir.join('perf2.json'))
+        op2 = Operator(Eq(u.forward, u + 1))
+        configuration['profiling_report'] = configuration._defaults['profiling_report']
+        configuration['openmp'] = not configuration['openmp']
+        try:
+            assert op1 is not op2
+            summary = op1.apply(t=5)
+            op2.apply(t=5)
+        finally:
+            configuration['openmp'] = configuration._defaults['openmp']
+        assert summary.metadata['openmp'] == op1.config['openmp']
+        assert len(tmpdir.join('perf1.json').read().strip().split('\n')) == 1
+        assert len(tmpdir.join('perf2.json').read().strip().split('\n')) == 1
+
+    def test_roofline(self, tmpdir):
+        """Test that the machine is calibrated once, and that the performance
+        of each section is reported as a percentage of the roofline"""
+        # The calibration of this test is tiny and cache-resident, so it must not
+        # be seen by any later roofline summary
+        cache = dict(calibrate.cache)
+        configuration['profiling'] = 'basic'
+        configuration['jit_cache_dir'] = str(tmpdir)
+        try:
+            roofline = calibrate(size=2**16, nflops=2**12, repeats=1, force=True)
+            assert roofline.bandwidth > 0 and roofline.flops > 0
+            assert tmpdir.join('roofline.json').check()
+            assert calibrate() == roofline
+
+            configuration['profiling_roofline'] = True
+            u = TimeData(name='u', shape=(20, 20, 20), time_order=1)
+            op = Operator(Eq(u.forward, 0.3*(u + u.subs(x, x + 1) + u.subs(x, x - 1))))
+            summary = op.apply(t=5)
+        finally:
+            configuration['profiling_roofline'] = \
+                configuration._defaults['profiling_roofline']
+            configuration['jit_cache_dir'] = configuration._defaults['jit_cache_dir']
+            calibrate.cache.clear()
+            calibrate.cache.update(cache)
+        assert summary.metadata['max_bw'] == roofline.bandwidth
+        assert summary.roofline['main'] > 0
+
+    @pytest.mark.parametrize('mode', ['basic', 'advanced'])
+    def test_build_profile(self, mode, tmpdir):
+        """Test that each stage of the Operator construction is profiled"""
+        clear_cache()
+        configuration['profiling_build'] = mode
+        u = TimeData(name='u', shape=(10, 10), time_order=1)
+        op = Operator(Eq(u.forward, u + 1), dle='advanced')
+        op.cfunction
+        configuration['profiling_build'] = configuration._defaults['profiling_build']
+        profile = op.build_profile
+        assert list(profile) == ['indexify', 'analysis', 'clusterize', 'dse',
+                                 'schedule', 'profile', 'resolve', 'dle',
+                                 'specialize', 'declarations', 'codegen', 'compile']
+        assert all(v.time >= 0 for v in profile.values())
+        assert np.isclose(profile.total, sum(profile.timings.values()))
+        assert profile['indexify'].nin == profile['clusterize'].nout == 1
+        assert profile['schedule'].nout > 1
+        assert profile['codegen'].nout == len(str(op.ccode).split('\n'))
+        if mode == 'basic':
+            assert all(v.memory is None for v in profile.values())
+        else:
+            assert profile['dse'].memory > 0
+
+        filename = str(tmpdir.join('build.csv'))
+        profile.save(filename)
+        with open(filename) as f:
+            rows = list(csv.DictReader(f))
+        assert [i['stage'] for i in rows] == list(profile)
+        assert rows[0]['dse'] == 'advanced'
+
+    def test_build_profile_memory(self):
+        """Test that the memory is only tracked by the stages tracing it from
+        scratch, not by nested stages nor by the stages of other profiles"""
+        configuration['profiling_build'] = 'advanced'
+        try:
+            profile, other = BuildProfile(), BuildProfile()
+        finally:
+            configuration['profiling_build'] = \
+                configuration._defaults['profiling_build']
+        if not profile.memory:
+            pytest.skip("tracemalloc is unavailable")
+        with profile.stage('outer'):
+            with profile.stage('inner'):
+                with other.stage('other'):
+                    data = [list(range(100)) for _ in range(100)]
+        assert profile['outer'].memory > 0
+        assert profile['inner'].memory is None and other['other'].memory is None
+        del data
+
 
 class TestDeclarator(object):
 
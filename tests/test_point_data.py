@@ -1,8 +1,9 @@
 import numpy as np
 import pytest
+from sympy import Eq
 
 from devito.cgen_utils import FLOAT
-from devito import Operator, DenseData, PointData, x, y, z
+from devito import Operator, DenseData, PointData, TimeData, shot, t, x, y, z
 
 
 @pytest.fixture
@@ -128,3 +129,84 @@ def test_adjoint_inject_interpolate(shape, coords,
     term1 = np.dot(p2.data.reshape(-1), p.data.reshape(-1))
     term2 = np.dot(c.data.reshape(-1), a.data.reshape(-1))
     assert np.isclose((term1-term2) / term1, 0., atol=1.e-6)
+
+
+@pytest.mark.parametrize('shape, coords', [
+    ((11, 11), [(.05, .9), (.01, .8)]),
+    ((11, 11, 11), [(.05, .9), (.01, .8), (0.07, 0.84)])
+])
+def test_precompute(shape, coords, npoints=20):
+    """Test that interpolation and injection through precomputed grid
+    indices and weights match the on-the-fly computation.
+    """
+    a = unit_box(shape=shape)
+    spacing = a.data[tuple([1 for _ in shape])]
+    subs = {x.spacing: spacing, y.spacing: spacing, z.spacing: spacing}
+
+    results = []
+    for precompute in [False, True]:
+        p = points(coords, npoints=npoints, name='p%d' % precompute)
+        p.data[:] = np.linspace(1., 2., npoints)
+        b = DenseData(name='b%d' % precompute, shape=shape)
+        if precompute:
+            p.precompute(spacing)
+            assert p.gridpoints.data.min() >= 0
+            assert np.allclose(p.weights.data.sum(axis=1), 1., rtol=1e-6)
+        rec = p.interpolate(a)
+        op = Operator(rec + p.inject(b, p), subs=subs)
+        assert ('floor' in str(op.ccode)) != precompute
+        op(time=1)
+        results.append((p.data.copy(), b.data.copy()))
+
+    assert np.allclose(results[0][0], results[1][0], rtol=1e-5, atol=1e-6)
+    assert np.allclose(results[0][1], results[1][1], rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize('shape, precompute', [
+    ((11, 11), False), ((11, 11), True), ((11, 11, 11), False)
+])
+def test_batched_shots(shape, precompute, nshots=3, npoints=4, nt=5):
+    """Test that a batch of shots, injected into and interpolated from a
+    :class:`TimeData` with a shot dimension, matches the shots computed
+    one at a time.
+    """
+    spacing = 0.1
+    subs = {x.spacing: spacing, y.spacing: spacing, z.spacing: spacing,
+            t.spacing: 0.1}
+    coords = np.random.RandomState(0).rand(nshots, npoints, len(shape))*.8 + .05
+    values = np.random.RandomState(1).rand(nt, nshots, npoints)
+    m = unit_box(name='m', shape=shape)
+    m.data[:] += 1.
+
+    def run(name, **kwargs):
+        u = TimeData(name='u%s' % name, shape=shape, time_order=2, space_order=2,
+                     **kwargs)
+        src = PointData(name='src%s' % name, nt=nt, npoint=npoints,
+                        ndim=len(shape), **kwargs)
+        rec = PointData(name='rec%s' % name, nt=nt, npoint=npoints,
+                        ndim=len(shape), **kwargs)
+        return u, src, rec
+
+    u, src, rec = run('b', nshots=nshots)
+    assert u.indices[-1] == shot and u.dim == len(shape)
+    src.coordinates.data[:] = coords
+    rec.coordinates.data[:] = coords[:, ::-1]
+    src.data[:] = values
+    if precompute:
+        src.precompute(spacing)
+        rec.precompute(spacing)
+    eqn = Eq(u.forward, 2*u - u.backward + .01*u.laplace/m)
+    op = Operator([eqn] + src.inject(u.forward, src/m) + rec.interpolate(u),
+                  subs=subs)
+    op(t=nt)
+
+    for i in range(nshots):
+        ui, srci, reci = run('%d' % i)
+        srci.coordinates.data[:] = coords[i]
+        reci.coordinates.data[:] = coords[i, ::-1]
+        srci.data[:] = values[:, i]
+        eqn = Eq(ui.forward, 2*ui - ui.backward + .01*ui.laplace/m)
+        Operator([eqn] + srci.inject(ui.forward, srci/m) + reci.interpolate(ui),
+                 subs=subs)(t=nt)
+        assert np.allclose(u.data[..., i], ui.data, rtol=1e-5)
+        assert np.allclose(rec.data[:, i], reci.data, rtol=1e-5)
@@ -1,4 +1,5 @@
 import numpy as np
+import pytest
 from sympy import Eq, solve, symbols
 
 from devito import Operator, TimeData, Forward, x, y, time
@@ -46,3 +47,22 @@ def run_simulation(save=False, dx=0.01, dy=0.01, a=0.5, timesteps=100):
 
 def test_save():
     assert(np.array_equal(run_simulation(True), run_simulation()))
+
+
+@pytest.mark.parametrize('subsample', [1, 3, 4])
+def test_save_subsampled(subsample, shape=(8, 8), nt=20):
+    """Test that a subsampled TimeData stores every ``subsample``-th timestep
+    of a buffered TimeData"""
+    u = TimeData(name='u', shape=shape, time_order=1, save=True, time_dim=nt)
+    u.data[0] = 1.
+    Operator(Eq(u.forward, 1.01*u + 1.)).apply(time=nt)
+
+    ub = TimeData(name='ub', shape=shape, time_order=1)
+    ub.data[0] = 1.
+    usave = TimeData(name='usave', shape=shape, time_order=1, save=True,
+                     time_dim=nt, subsample=subsample)
+    assert usave.shape == ((nt + subsample - 1)//subsample,) + shape
+    Operator([Eq(ub.forward, 1.01*ub + 1.), Eq(usave, ub)]).apply(time=nt)
+    # The timesteps [0, nt - 1) are computed, each storing ``ub`` before its update
+    stored = u.data[:nt - 1:subsample]
+    assert np.allclose(usave.data[:len(stored)], stored)